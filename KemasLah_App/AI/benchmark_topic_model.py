@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+# Make the app's src/ package importable when run from the AI folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.organise.topic_model import TopicClassifier, benchmark
+
+# 1. Load the same dataset train_ai.py uses
+print("Loading dataset...")
+# Ensure bbc_data.csv is sitting in the same folder as this script
+df = pd.read_csv("bbc_data.csv")
+
+category_map = {
+    "business": "Business & Finance",
+    "tech": "Technology & IT",
+    "politics": "Politics & Government",
+    "sport": "Sports",
+    "entertainment": "Entertainment & Media"
+}
+texts = df['data'].tolist()
+labels = df['labels'].map(category_map).tolist()
+
+# 2. Load the pretrained artifacts once (the same path Smart Organise's topic mode uses)
+print("Loading pretrained topic model...")
+classifier = TopicClassifier(os.path.dirname(os.path.abspath(__file__)))
+print(f"--> {classifier.model_name} loaded in {classifier.load_seconds:.2f}s")
+
+# 3. Throughput of transform + predict, with and without confidences, per batch size
+report = {"model": classifier.model_name, "runs": []}
+for batch_size in (32, 256, 1024):
+    for with_confidence in (False, True):
+        run = benchmark(texts, batch_size=batch_size, with_confidence=with_confidence, classifier=classifier)
+        run["with_confidence"] = with_confidence
+        report["runs"].append(run)
+        print(f"--> batch {batch_size:<5} confidence {str(with_confidence):<5} "
+              f"{run['files_per_second']:,.0f} files/sec")
+
+# 4. Sanity check: accuracy on the whole dataset (includes the training split)
+predicted = [label for label, _ in classifier.classify(texts, with_confidence=False)]
+report["accuracy"] = accuracy_score(labels, predicted)
+print(f"--> Accuracy: {report['accuracy'] * 100:.2f}%")
+
+# 5. Save next to ai_metrics.json
+with open('topic_model_benchmark.json', 'w') as f:
+    json.dump(report, f, indent=4)
+
+print("Benchmark saved to 'topic_model_benchmark.json'!")
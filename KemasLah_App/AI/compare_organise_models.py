@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Make the app's src/ package importable when run from the AI folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.organise.fast_models import compare_with_ensemble
+
+# 1. Load the same dataset train_ai.py uses
+print("Loading dataset...")
+# Ensure bbc_data.csv is sitting in the same folder as this script
+df = pd.read_csv("bbc_data.csv")
+
+# 2. TF-IDF, with the same settings Smart Organise uses for its classifiers
+print("Vectorizing text...")
+vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_features=8000, sublinear_tf=True)
+X = vectorizer.fit_transform(df['data'])
+y = df['labels'].values
+
+# 3. Cross-validate Fast mode (SGD + centroid) against the RF + SVM ensemble
+print("Comparing Fast mode against the RF + SVM ensemble (3-fold)...")
+report = compare_with_ensemble(X, y, n_splits=3)
+
+for mode, metrics in report.items():
+    print(f"--> {mode:<9} accuracy {metrics['accuracy'] * 100:.2f}%  "
+          f"precision {metrics['precision'] * 100:.2f}%  "
+          f"fit {metrics['fit_seconds']:.2f}s per fold")
+
+speedup = report['ensemble']['fit_seconds'] / max(report['fast']['fit_seconds'], 1e-9)
+print(f"--> Fast mode trains {speedup:.1f}x faster")
+
+# 4. Save the comparison next to ai_metrics.json
+with open('organise_model_comparison.json', 'w') as f:
+    json.dump(report, f, indent=4)
+
+print("Comparison saved to 'organise_model_comparison.json'!")
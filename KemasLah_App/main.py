@@ -1,9 +1,10 @@
 import sys
 import threading
+import time
+import heapq
 import logging
 import os
-import shutil
-import re
+from functools import partial
 from pathlib import Path
 
 from PyQt6.QtWidgets import (
@@ -21,6 +22,7 @@ from auth.server import app as flask_app
 # Import your existing GUI components
 from src.gui.widgets.sidebar import Sidebar
 from src.gui.widgets.topbar import TopBar
+from src.gui.widgets.file_table import FilenameIndexWorker, CatalogueWorker
 from src.gui.widgets.actionbar import ActionBar
 from src.gui.widgets.loading_overlay import LoadingOverlay
 from src.gui.views.home_view import HomeView
@@ -28,6 +30,9 @@ from src.gui.views.file_browser_view import FileBrowserView
 from src.gui.views.archive_view import ArchiveView
 from src.gui.views.statistics_view import StatisticsView, record_feature_use
 from src.gui.views.settings_view import SettingsView
+from src.gui.views.deep_search_results_dialog import DeepSearchResultsDialog
+from src.gui.views.organise_plan_dialog import OrganisePlanDialog
+from src.gui.views.undo_history_dialog import UndoHistoryDialog
 
 # --- Import the Share Dialog and File Sharing View ---
 from src.gui.views.share_dialog import ShareFileDialog
@@ -38,6 +43,29 @@ from src.gui.views.file_sharing_view import FileSharingView
 from src.inference.classifier_worker import (
     CNNSearchWorker, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
 )
+from src.search.query_matcher import QueryMatcher
+from src.extraction.budget import BudgetedExtractor
+from src.search.archive_index import ArchiveIndex, describe_path, is_archive, path_exists
+from src.search.result_cache import SearchResultCache, CachedSearch, directory_stamp
+from src.organise.fast_models import fast_mode_enabled, make_model_pair
+from src.organise.profile_store import FolderProfileStore
+from src.organise.merge_planner import plan_merges, DEFAULT_MERGE_THRESHOLD
+from src.organise.clustering import cluster_documents
+from src.organise.file_pool import iter_pool, partition_by_type
+from src.organise.duplicates import collapse_duplicates
+from src.filesystem.crawler import walk
+from src.organise.topic_model import TopicClassifier, topic_mode_enabled, DEFAULT_BATCH_SIZE as TOPIC_BATCH_SIZE
+from src.organise.pipelines import (
+    PipelineRunner, split_cpu_budget, torch_threads, MEDIA_SHARE, TEXT_SHARE
+)
+from src.organise.plan import OrganisePlan, OrganisePlanCache, apply_plan
+from src.organise.move_engine import recover_incomplete_runs
+from src.organise.undo_journal import rollback_run
+from src.utils.perf import PerfRecorder
+from src.extraction.token_pipeline import (
+    OrganiseDocument, WeightedTfidfVectorizer, StreamingTfidfVectorizer,
+    NAME_WEIGHT, FIRST_PAGE_WEIGHT, FIRST_PAGE_CHARS, MAX_PROFILE_TOKENS
+)
 
 CNN_MODEL_PATH = os.path.join(
     os.path.dirname(os.path.abspath(__file__)),
@@ -46,17 +74,31 @@ CNN_MODEL_PATH = os.path.join(
 
 _MEDIA_EXTS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
 
+# Loose-file pools above this many text files are vectorised out of core
+OUT_OF_CORE_THRESHOLD = 20_000
+STREAM_CHUNK_SIZE = 2_000
+
+
+def _file_size(path):
+    """Size for the perf log's byte counts (0 when the file has gone)"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
 
 class DeepSearchWorker(QThread):
     progress = pyqtSignal(str)
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
 
-    def __init__(self, text_files, ai_query):
+    def __init__(self, text_files, ai_query, index_root=None):
         super().__init__()
         self.text_files = text_files
         self.ai_query = ai_query
+        self.index_root = index_root
         self.query_lower = ai_query.lower()
+        self.matcher = QueryMatcher(ai_query)
         self._is_cancelled = False
 
         self.supported_text_types = {
@@ -75,80 +117,69 @@ class DeepSearchWorker(QThread):
 
     def quick_content_extract(self, filepath, unsupported_files):
         ext = filepath.lower().split('.')[-1] if '.' in filepath else ''
-        raw_text = ""
 
-        if ext in self.unsupported_types:
+        if ext in self.unsupported_types or ext not in self.supported_text_types:
             unsupported_files.append(os.path.basename(filepath))
             return ""
 
         try:
-            if ext == 'pdf':
-                import PyPDF2
-                with open(filepath, 'rb') as f:
-                    reader = PyPDF2.PdfReader(f)
-                    for i in range(min(5, len(reader.pages))):
-                        if self._is_cancelled:
-                            return ""
-                        page_text = reader.pages[i].extract_text()
-                        if page_text:
-                            raw_text += page_text + " "
-
-            elif ext == 'docx':
-                import docx
-                doc = docx.Document(filepath)
-                for para in doc.paragraphs[:50]:
-                    if self._is_cancelled:
-                        return ""
-                    raw_text += para.text + " "
-
-            elif ext in ['xlsx', 'xls']:
-                import openpyxl
-                wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-                for sheet in wb.worksheets:
-                    for row in sheet.iter_rows(max_row=100, values_only=True):
-                        if self._is_cancelled:
-                            wb.close()
-                            return ""
-                        raw_text += " ".join(str(c) for c in row if c is not None) + " "
-                wb.close()
-
-            elif ext == 'pptx':
-                from pptx import Presentation as PptxPresentation
-                prs = PptxPresentation(filepath)
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        if self._is_cancelled:
-                            return ""
-                        if hasattr(shape, "text"):
-                            raw_text += shape.text + " "
-
-            elif ext in [
-                'txt', 'md', 'csv', 'py', 'json', 'rtf', 'xml',
-                'html', 'htm', 'yaml', 'yml', 'toml', 'ini', 'log'
-            ]:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    raw_text = f.read(10000)
-
-            elif ext not in self.supported_text_types:
-                unsupported_files.append(os.path.basename(filepath))
-                return ""
-
+            with self.perf.span("read", items=1, bytes=_file_size(filepath)):
+                chunks = self.extractor.extract(
+                    filepath, ext,
+                    max_pages=5, max_paragraphs=50, max_rows=100, max_chars=10000,
+                    should_cancel=lambda: self._is_cancelled
+                )
+        except InterruptedError:
+            return ""
         except Exception as read_err:
             print(f"Error reading file {filepath}: {read_err}")
             unsupported_files.append(os.path.basename(filepath))
             return ""
 
-        return raw_text.lower()
+        if self._is_cancelled:
+            return ""
+        return " ".join(chunks).lower()
+
+    def archive_members(self, archive_path, unsupported_files):
+        """[(virtual member path, text)] for a ZIP archive; member names are searchable too."""
+        try:
+            members = self.archives.entries(archive_path, should_cancel=lambda: self._is_cancelled)
+        except InterruptedError:
+            return []
+        except Exception as read_err:
+            print(f"Error reading archive {archive_path}: {read_err}")
+            unsupported_files.append(os.path.basename(archive_path))
+            return []
+        return [
+            (os.path.join(archive_path, *name.split('/')), f"{name.lower()} {text}")
+            for name, text in members
+        ]
 
     def run(self):
+        # Same query on an unchanged folder: answer from the result cache
+        cache = SearchResultCache.shared()
+        folder = self.index_root
+        stamp = directory_stamp(folder) if folder else None
+        if folder:
+            cached = cache.get(self.ai_query, folder, "deep")
+            if cached is not None and cached.hits_for(folder, stamp) is not None and cached.result:
+                self.finished.emit(dict(cached.result))
+                return
+
+        self.perf = PerfRecorder("deep_search")
+        self.extractor = BudgetedExtractor()
+        self.archives = ArchiveIndex(self.extractor)
         try:
             unsupported_files = []
             docs = []
             valid_files = []
 
-            total_files = len(self.text_files)
+            # Files quarantined by earlier runs are deferred or skipped
+            text_files, skipped = self.extractor.order(self.text_files)
+            unsupported_files.extend(f"{os.path.basename(fp)} (quarantined: slow or broken)" for fp in skipped)
+            total_files = len(text_files)
 
-            for i, fp in enumerate(self.text_files, start=1):
+            for i, fp in enumerate(text_files, start=1):
                 if self._is_cancelled:
                     self.finished.emit({
                         "cancelled": True,
@@ -159,6 +190,13 @@ class DeepSearchWorker(QThread):
                     return
 
                 self.progress.emit(f"Scanning {i}/{total_files}: {os.path.basename(fp)}")
+                if is_archive(fp):
+                    with self.perf.span("archives", items=1, bytes=_file_size(fp)):
+                        for member_path, content in self.archive_members(fp, unsupported_files):
+                            docs.append(content)
+                            valid_files.append(member_path)
+                    continue
+
                 content = self.quick_content_extract(fp, unsupported_files)
 
                 if content.strip():
@@ -168,34 +206,238 @@ class DeepSearchWorker(QThread):
             found_matches = []
 
             if valid_files and not self._is_cancelled:
-                for idx, content in enumerate(docs):
-                    if self.query_lower in content:
-                        found_matches.append((idx, 1.0, "Exact Keyword Match"))
+                exact_hits = []
+                with self.perf.span("match", items=len(docs)):
+                    for idx, content in enumerate(docs):
+                        hits = self.matcher.scan(content)
+                        if hits.is_match:
+                            exact_hits.append((idx, hits.score))
+
+                # Rank by term frequency, relative to the strongest document
+                exact_hits.sort(key=lambda h: h[1], reverse=True)
+                best_score = exact_hits[0][1] if exact_hits else 1
+                for idx, score in exact_hits:
+                    found_matches.append((idx, score / best_score, "Exact Keyword Match"))
 
                 if not found_matches:
-                    from sklearn.feature_extraction.text import TfidfVectorizer
-                    from sklearn.metrics.pairwise import cosine_similarity
+                    from src.search.semantic_index import SemanticIndex
 
                     self.progress.emit("Running semantic AI matching...")
 
-                    vectorizer = TfidfVectorizer(token_pattern=r'(?u)\b\w+\b')
-                    tfidf_matrix = vectorizer.fit_transform([self.query_lower] + docs)
-                    cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
+                    # Persistent per-folder index: only new/modified files are re-vectorised
+                    with self.perf.span("semantic index", items=len(docs)):
+                        index = SemanticIndex(self.index_root or os.path.dirname(valid_files[0]))
+                        index.sync(valid_files, docs)
+                        index.save()
 
-                    top_indices = cosine_sim.argsort()[-5:][::-1]
-                    for idx in top_indices:
-                        if cosine_sim[idx] > 0.001:
-                            found_matches.append((idx, cosine_sim[idx], "Semantic AI Match"))
+                    with self.perf.span("semantic query"):
+                        file_idx = {fp: idx for idx, fp in enumerate(valid_files)}
+                        for path, score in index.query(self.query_lower, top_k=5, min_score=0.001):
+                            found_matches.append((file_idx[path], score, "Semantic AI Match"))
 
-            self.finished.emit({
+            result = {
                 "cancelled": False,
                 "unsupported_files": unsupported_files,
                 "valid_files": valid_files,
                 "found_matches": found_matches
-            })
+            }
+            if folder and stamp is not None:
+                cache.put(self.ai_query, folder, "deep", CachedSearch({folder: (stamp, [])}, result=result))
+            self.perf.log(files=total_files, matches=len(found_matches))
+            self.finished.emit(result)
 
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            self.extractor.close()
+
+
+class RecursiveDeepSearchWorker(DeepSearchWorker):
+    """
+    Deep Search over a whole folder tree, ranked with BM25.
+
+    Files already in the tree's content index are scored first, so the best
+    cached hits reach the UI almost immediately; new or modified files are then
+    read in batches and merged into a bounded top-k heap, and the visible page
+    is re-emitted whenever it changes.
+    """
+    results_ready = pyqtSignal(list, bool)   # [(path, score)] best first, is_final
+
+    PAGE_SIZE = 20
+    BATCH_SIZE = 25
+    SKIP_DIRS = {'Windows', 'Program Files', 'Program Files (x86)', 'ProgramData',
+                 'AppData', 'node_modules', '__pycache__', 'venv', '.venv'}
+
+    def __init__(self, root_path, ai_query):
+        super().__init__([], ai_query, index_root=root_path)
+        self.root_path = root_path
+        self.visible_limit = self.PAGE_SIZE
+        self._more_requested = False
+        self._scores = {}
+        self._page = {}             # best `visible_limit` entries of _scores
+        self._stamps = {}
+
+    def load_more(self):
+        self.visible_limit += self.PAGE_SIZE
+        self._more_requested = True
+
+    def _skip_dir(self, name):
+        return name.startswith(('.', '$')) or name in self.SKIP_DIRS
+
+    def _walk_text_files(self):
+        for dirpath, dirnames, filenames in walk(
+            self.root_path, skip=self._skip_dir, should_cancel=lambda: self._is_cancelled
+        ):
+            self._stamps[dirpath] = directory_stamp(dirpath, filenames)
+            for name in filenames:
+                ext = name.lower().split('.')[-1] if '.' in name else ''
+                if ext in self.supported_text_types or is_archive(name):
+                    yield os.path.join(dirpath, name)
+
+    def _rebuild_page(self):
+        self._page = dict(heapq.nlargest(self.visible_limit, self._scores.items(), key=lambda kv: kv[1]))
+
+    def _top_page(self):
+        return sorted(self._page.items(), key=lambda kv: kv[1], reverse=True)
+
+    def _merge_scores(self, scorer, paths, index):
+        """Scores `paths`; returns whether the visible page changed."""
+        paths = [p for p in paths if p in index]
+        if not paths:
+            return False
+        page_before = dict(self._page)
+
+        demoted = False
+        scores = scorer.score(self.query_lower, rows=index.row_indices(paths))
+        for path, score in zip(paths, scores):
+            old = self._scores.pop(path, None)
+            if score > 0:
+                self._scores[path] = float(score)
+            demoted = demoted or (path in self._page and (score <= 0 or score < old))
+
+        if demoted:
+            # A page entry fell: something outside the page may now belong in it
+            self._rebuild_page()
+        else:
+            candidates = dict(self._page)
+            candidates.update((p, self._scores[p]) for p in paths if p in self._scores)
+            self._page = dict(heapq.nlargest(self.visible_limit, candidates.items(), key=lambda kv: kv[1]))
+        return self._page != page_before
+
+    def run(self):
+        from src.search.semantic_index import SemanticIndex
+        from src.search.bm25 import BM25Scorer
+
+        # Same query over an unchanged tree: replay the cached ranking
+        cache = SearchResultCache.shared()
+        cached = cache.get(self.ai_query, self.root_path, "deep_tree")
+        if cached is not None and cached.result and cached.is_fresh():
+            self.results_ready.emit(list(cached.result["ranked"]), True)
+            self.finished.emit(dict(cached.result["summary"]))
+            return
+
+        self.perf = PerfRecorder("deep_search_tree")
+        self.extractor = BudgetedExtractor()
+        self.archives = ArchiveIndex(self.extractor)
+        try:
+            unsupported_files = []
+            with self.perf.span("load index"):
+                index = SemanticIndex(self.root_path, scope="tree")
+                scorer = BM25Scorer(index)
+
+            # Phase 1: rank whatever the index already holds
+            with self.perf.span("score cached") as span:
+                # Archive members are virtual paths: kept while their archive exists
+                cached = [p for p in index.paths if path_exists(p)]
+                span.add(items=len(cached))
+                if self._merge_scores(scorer, cached, index):
+                    self.results_ready.emit(self._top_page(), False)
+
+            # Phase 2: pick up new and modified files
+            self.progress.emit("Walking folder tree...")
+            live = []
+            member_texts = {}
+            with self.perf.span("walk") as span:
+                for fp in self._walk_text_files():
+                    if not is_archive(fp):
+                        live.append(fp)
+                        continue
+                    # ZIP members are read from the archive cache (each archive is read once)
+                    self.progress.emit(f"Reading archive {os.path.basename(fp)}...")
+                    for member_path, text in self.archive_members(fp, unsupported_files):
+                        member_texts[member_path] = text
+                live.extend(member_texts)
+                span.add(items=len(live))
+
+            dropped = index.remove_missing(live)
+            for p in dropped:
+                self._scores.pop(p, None)
+            if dropped & self._page.keys():
+                self._rebuild_page()
+
+            stale, skipped = self.extractor.order(index.stale_paths(live))
+            unsupported_files.extend(f"{os.path.basename(fp)} (quarantined: slow or broken)" for fp in skipped)
+
+            for start in range(0, len(stale), self.BATCH_SIZE):
+                if self._is_cancelled:
+                    break
+                batch = stale[start:start + self.BATCH_SIZE]
+                self.progress.emit(f"Reading {start + len(batch)}/{len(stale)} new or changed files...")
+
+                texts = [
+                    member_texts[fp] if fp in member_texts else self.quick_content_extract(fp, unsupported_files)
+                    for fp in batch
+                ]
+                if self._is_cancelled:
+                    break
+                # Empty texts are still indexed so unreadable files aren't re-read next time
+                with self.perf.span("index", items=len(batch)):
+                    index.upsert(batch, texts)
+
+                with self.perf.span("score", items=len(batch)):
+                    changed = self._merge_scores(scorer, batch, index)
+                if self._more_requested:
+                    self._more_requested = False
+                    self._rebuild_page()
+                    changed = True
+                if changed:
+                    self.results_ready.emit(self._top_page(), False)
+
+            if self._is_cancelled:
+                index.save()
+                self.finished.emit({"cancelled": True, "recursive": True,
+                                    "unsupported_files": unsupported_files})
+                return
+
+            # Final ranking: corpus statistics have settled, so rescore every file
+            with self.perf.span("rank", items=len(index)):
+                self._scores = {}
+                self._page = {}
+                self._merge_scores(scorer, index.paths, index)
+                ranked = sorted(self._scores.items(), key=lambda kv: kv[1], reverse=True)
+            self.results_ready.emit(ranked, True)
+            with self.perf.span("save index"):
+                index.save()
+
+            summary = {
+                "cancelled": False,
+                "recursive": True,
+                "unsupported_files": unsupported_files,
+                "files_indexed": len(index),
+                "result_count": len(ranked),
+            }
+            if None not in self._stamps.values():
+                cache.put(self.ai_query, self.root_path, "deep_tree", CachedSearch(
+                    {d: (stamp, []) for d, stamp in self._stamps.items()},
+                    result={"ranked": ranked, "summary": summary},
+                ))
+            self.perf.log(files=len(index), read=len(stale), matches=len(ranked))
+            self.finished.emit(summary)
+
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.extractor.close()
 
 
 class SmartOrganiseWorker(QThread):
@@ -208,6 +450,10 @@ class SmartOrganiseWorker(QThread):
         self.selected_paths = selected_paths
         self.current_view_path = current_view_path
         self.cnn_model_path = cnn_model_path
+        # Linear SGD + centroid models instead of RandomForest + probability SVC
+        self.fast_mode = fast_mode_enabled()
+        # Loose documents go to the pretrained BBC topic folders instead of clusters
+        self.topic_mode = topic_mode_enabled()
         self._is_cancelled = False
 
         self.supported_text_types = {
@@ -228,108 +474,93 @@ class SmartOrganiseWorker(QThread):
         if self._is_cancelled:
             raise InterruptedError("Smart organise cancelled.")
 
-    def read_ultimate_precision_content(self, filepath, unsupported_files):
+    def _extract_chunks(self, filepath, unsupported_files):
+        """Budgeted text chunks of one file, or None when it is unsupported or unreadable"""
         self._ensure_not_cancelled()
 
         file_name = os.path.basename(filepath)
         ext = file_name.lower().split('.')[-1] if '.' in file_name else ''
 
-        clean_name = re.sub(r'[^a-zA-Z\s]', ' ', file_name.replace('_', ' ').replace('-', ' '))
-        content = (clean_name + " ") * 20
-
-        if ext in self.unsupported_types:
+        if ext in self.unsupported_types or ext not in self.supported_text_types:
             unsupported_files.append(file_name)
-            return ""
+            return None
 
-        raw_text = ""
         try:
-            if ext == 'pdf':
-                import PyPDF2
-                with open(filepath, 'rb') as f:
-                    reader = PyPDF2.PdfReader(f)
-                    for i in range(min(6, len(reader.pages))):
-                        self._ensure_not_cancelled()
-                        page_text = reader.pages[i].extract_text()
-                        if page_text:
-                            if i == 0:
-                                raw_text += (page_text[:2000] + " ") * 10
-                            raw_text += page_text + " "
-
-            elif ext == 'docx':
-                import docx
-                doc = docx.Document(filepath)
-                for para in doc.paragraphs[:40]:
-                    self._ensure_not_cancelled()
-                    raw_text += para.text + " "
-
-            elif ext in ['xlsx', 'xls']:
-                import openpyxl
-                wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
-                for sheet in wb.worksheets:
-                    for row in sheet.iter_rows(max_row=100, values_only=True):
-                        self._ensure_not_cancelled()
-                        raw_text += " ".join(str(c) for c in row if c is not None) + " "
-                wb.close()
-
-            elif ext == 'pptx':
-                from pptx import Presentation as PptxPresentation
-                prs = PptxPresentation(filepath)
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        self._ensure_not_cancelled()
-                        if hasattr(shape, "text"):
-                            raw_text += shape.text + " "
-
-            elif ext in [
-                'txt', 'md', 'csv', 'py', 'json', 'rtf', 'xml',
-                'html', 'htm', 'yaml', 'yml', 'toml', 'ini', 'log'
-            ]:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    raw_text = f.read(15000)
-
-            elif ext not in self.supported_text_types:
-                unsupported_files.append(file_name)
-                return ""
-
+            with self.perf.span("read", items=1, bytes=_file_size(filepath)):
+                chunks = self.extractor.extract(
+                    filepath, ext,
+                    max_pages=6, max_paragraphs=40, max_rows=100, max_chars=15000,
+                    should_cancel=lambda: self._is_cancelled
+                )
+        except InterruptedError:
+            raise
         except Exception as e:
             print(f"Extraction error for {file_name}: {e}")
             unsupported_files.append(file_name)
-            return ""
-
-        raw_text = raw_text.lower()
-        words = re.findall(r'\b[a-z]{3,15}\b', raw_text)
-        stemmed_words = [re.sub(r'(ing|tion|ment|ies|s)$', '', w) for w in words]
-        raw_text = " ".join(stemmed_words)
+            return None
 
-        academic_noise = (
-            r'\b(chapter|page|university|note|lecture|assignment|pdf|introduction|case|study|faculty|tarc|student|course|module|www|http|com|appendix|reference|conclusion|objective|assessment|rubric|tutorial|practical|guideline|data|result|table)\b'
-        )
-        raw_text = re.sub(academic_noise, '', raw_text)
-
-        return content + re.sub(r'\s+', ' ', raw_text).strip()
-
-    def _move_file_safely(self, source_path, dest_folder_path, move_history):
         self._ensure_not_cancelled()
+        return chunks
 
-        os.makedirs(dest_folder_path, exist_ok=True)
-
-        file_name = os.path.basename(source_path)
-        dest_file_path = os.path.join(dest_folder_path, file_name)
-
-        base, ext_name = os.path.splitext(file_name)
-        counter = 1
-        while os.path.exists(dest_file_path):
-            dest_file_path = os.path.join(dest_folder_path, f"{base}_copy{counter}{ext_name}")
-            counter += 1
+    def read_ultimate_precision_content(self, filepath, unsupported_files):
+        """Reads one file as weighted token segments (empty for unreadable files)"""
+        doc = OrganiseDocument()
+        chunks = self._extract_chunks(filepath, unsupported_files)
+        if chunks is None:
+            return doc
 
-        shutil.move(source_path, dest_file_path)
-        move_history.append((dest_file_path, source_path))
-        return dest_file_path
+        file_name = os.path.basename(filepath)
+        ext = file_name.lower().split('.')[-1] if '.' in file_name else ''
 
-    def _classify_and_move_media(self, image_paths, video_paths, dest_base, move_history):
+        # Filename and first-page boosts are weights, not repeated text
+        doc.add_name(file_name, weight=NAME_WEIGHT)
+        if ext == 'pdf' and chunks and chunks[0]:
+            doc.add_text(chunks[0][:FIRST_PAGE_CHARS], weight=FIRST_PAGE_WEIGHT)
+        for chunk in chunks:
+            doc.add_text(chunk)
+        return doc
+
+    def _read_profile_document(self, filepath):
+        """read_ultimate_precision_content for the profile store: (doc, unsupported)"""
+        unsupported = []
+        doc = self.read_ultimate_precision_content(filepath, unsupported)
+        return doc, bool(unsupported)
+
+    def _folder_documents(self, folder, unsupported_files, max_tokens=None):
+        """Documents for every file under a destination folder, re-reading only changed files"""
+        self._ensure_not_cancelled()
+        entries, stats = self.profile_store.documents(folder, max_tokens=max_tokens)
+        self.profile_stats["reused"] += stats["reused"]
+        self.profile_stats["read"] += stats["read"]
+        for path, doc, unsupported in entries:
+            if unsupported:
+                unsupported_files.append(os.path.basename(path))
+        return [doc for _, doc, _ in entries]
+
+    def _plan_move(self, plan, source_path, dest_folder_path, reason, confidence=None, message=""):
+        """Records a move in the plan; nothing on disk changes until the plan is applied"""
+        self._ensure_not_cancelled()
+        plan.add_move(source_path, dest_folder_path, reason=reason, confidence=confidence, message=message)
+
+    @property
+    def plan_mode(self):
+        mode = "fast" if self.fast_mode else "ensemble"
+        return f"{mode}+topic" if self.topic_mode else mode
+
+    def _emit_plan(self, plan, cached=False):
+        if not cached:
+            self.plan_cache.put(self.selected_paths, self.current_view_path, self.plan_mode, plan)
+        self.perf.log(mode=self.plan_mode, cached=cached, moves=len(plan.steps), selected=len(self.selected_paths))
+        self.finished.emit({
+            "cancelled": False,
+            "cached": cached,
+            "plan": plan.to_dict(),
+            "current_view_path": self.current_view_path
+        })
+
+    def _classify_media(self, image_paths, video_paths, dest_base, plan):
         from src.inference.classifier import ImageClassifier, extract_keyframe
 
-        results_msg = ""
         metrics_msg = ""
         temp_kfs = []
         classify_paths = list(image_paths)
@@ -338,27 +569,30 @@ class SmartOrganiseWorker(QThread):
         for vp in video_paths:
             self._ensure_not_cancelled()
             self.progress.emit(f"Extracting keyframe: {os.path.basename(vp)}")
-            kf = extract_keyframe(vp, output_dir="outputs/keyframes")
+            with self.perf.span("keyframes", items=1, bytes=_file_size(vp)):
+                kf = extract_keyframe(vp, output_dir="outputs/keyframes")
             if kf:
                 classify_paths.append(kf)
                 kf_to_video[kf] = vp
                 temp_kfs.append(kf)
             else:
-                results_msg += f"⚠️ Could not read keyframe from '{os.path.basename(vp)}' — skipped.\n"
+                plan.note(f"⚠️ Could not read keyframe from '{os.path.basename(vp)}' — skipped.")
 
         if not classify_paths:
-            return results_msg, metrics_msg
+            return metrics_msg
 
         if not os.path.exists(self.cnn_model_path):
-            results_msg += "❌ CNN model missing — images not sorted.\n"
+            plan.note("❌ CNN model missing — images not sorted.")
             metrics_msg += "❌ CNN model missing — images not sorted.\n\n"
-            return results_msg, metrics_msg
+            return metrics_msg
 
         self.progress.emit("Loading CNN model...")
-        classifier = ImageClassifier(self.cnn_model_path)
+        with self.perf.span("cnn load"):
+            classifier = ImageClassifier(self.cnn_model_path)
 
         self.progress.emit(f"Classifying {len(classify_paths)} media file(s)...")
-        cnn_results = classifier.classify_batch(classify_paths, batch_size=16)
+        with self.perf.span("cnn classify", items=len(classify_paths)):
+            cnn_results = classifier.classify_batch(classify_paths, batch_size=16)
 
         confident = 0
         fallback = 0
@@ -374,12 +608,12 @@ class SmartOrganiseWorker(QThread):
             real_path = kf_to_video.get(clf_path, clf_path)
             file_name = os.path.basename(real_path)
 
-            self.progress.emit(f"Moving media {idx}/{len(cnn_results)}: {file_name}")
             dest_folder = os.path.join(dest_base, category)
-            self._move_file_safely(real_path, dest_folder, move_history)
-
             status = "✓" if accepted else "⚡"
-            results_msg += f"{status} CNN: '{file_name}' ➡️ [{category}] ({confidence:.0%})\n"
+            self._plan_move(
+                plan, real_path, dest_folder, reason="cnn", confidence=float(confidence),
+                message=f"{status} CNN: '{file_name}' ➡️ [{category}] ({confidence:.0%})"
+            )
 
             if accepted:
                 confident += 1
@@ -401,16 +635,376 @@ class SmartOrganiseWorker(QThread):
             f"   • High confidence   : {confident}  ({confident/total:.0%} of media)\n"
             f"   • Fallback category : {fallback}\n\n"
         )
-        return results_msg, metrics_msg
+        return metrics_msg
+
+    def _skip_duplicates(self, *path_lists):
+        """
+        Drops identical copies from the path lists, so each duplicate set is
+        read and classified once. Returns (filtered lists, twins) where twins
+        maps each kept path to its dropped copies.
+        """
+        self.progress.emit("Checking for duplicate files...")
+        paths = [p for paths in path_lists for p in paths]
+        with self.perf.span("duplicates", items=len(paths)):
+            unique, twins = collapse_duplicates(paths, should_cancel=lambda: self._is_cancelled)
+        keep = set(unique)
+        return [[p for p in paths if p in keep] for paths in path_lists], twins
+
+    def _plan_twins(self, plan, twins):
+        """Plans every dropped copy into the same folder as the file it duplicates"""
+        if not twins:
+            return ""
+        planned = 0
+        for step in list(plan.steps):
+            if step.kind != "file":
+                continue
+            for twin in twins.get(step.source, ()):
+                self._plan_move(
+                    plan, twin, step.destination, reason="duplicate", confidence=step.confidence,
+                    message=(
+                        f"🧬 Duplicate of '{os.path.basename(step.source)}' ➡️ "
+                        f"[{os.path.basename(step.destination)}]"
+                    )
+                )
+                planned += 1
+        copies = sum(len(copies) for copies in twins.values())
+        return (
+            f"🧬 DUPLICATE FILES:\n"
+            f"   • Identical Copies Skipped In Analysis: {copies}\n"
+            f"   • Planned Alongside Their Original: {planned}\n\n"
+        )
+
+    def _media_pipeline(self, image_paths, video_paths, threads):
+        """CNN pipeline on its own plan: (media_plan, metrics), PyTorch capped to `threads`"""
+        media_plan = OrganisePlan(self.current_view_path)
+        if not image_paths and not video_paths:
+            return media_plan, ""
+        with torch_threads(threads):
+            metrics = self._classify_media(image_paths, video_paths, self.current_view_path, media_plan)
+        return media_plan, metrics
+
+    def _run_pipelines(self, image_paths, video_paths, text_pipeline=None):
+        """
+        Runs the media pipeline on a background thread while text_pipeline(n_jobs)
+        runs on this one, sharing the CPU budget. Returns
+        ((media_plan, media_metrics, timing_line), text_metrics).
+        """
+        has_media = bool(image_paths or video_paths)
+        shares = {}
+        if has_media:
+            shares["media"] = MEDIA_SHARE
+        if text_pipeline is not None:
+            shares["text"] = TEXT_SHARE
+        budget = split_cpu_budget(shares) if shares else {}
+
+        runner = PipelineRunner(on_failure=self.stop)
+        if has_media:
+            runner.start("media", self._media_pipeline, image_paths, video_paths, budget["media"])
+        if text_pipeline is not None:
+            runner.run("text", text_pipeline, budget["text"])
+        results = runner.join()
+
+        media_plan, media_metrics = results.get("media", (OrganisePlan(self.current_view_path), ""))
+        timing_line = ""
+        if len(results) == 2:
+            timing_line = f"⏱️ CONCURRENT PIPELINES:\n{runner.report()}\n"
+        return (media_plan, media_metrics, timing_line), results.get("text", "")
+
+    def _sort_text_into_folders(self, text_files, folders_selected, plan, unsupported_organise_files, n_jobs=-1):
+        """Text pipeline for folders + files: train on the folders, plan a move per file"""
+        import numpy as np
+        from sklearn.metrics import precision_score
+
+        metrics_message = ""
+
+        training_texts, training_labels = [], []
+        folder_paths_map = {}
+
+        self.progress.emit("Preparing training data from selected folders...")
+        for i, folder in enumerate(folders_selected, start=1):
+            self._ensure_not_cancelled()
+            folder_name = os.path.basename(folder)
+            folder_paths_map[folder_name] = folder
+
+            self.progress.emit(f"Reading folder {i}/{len(folders_selected)}: {folder_name}")
+            synthetic_data = OrganiseDocument().add_name(folder_name, weight=50)
+            for _ in range(5):
+                training_texts.append(synthetic_data)
+                training_labels.append(folder_name)
+
+            for doc in self._folder_documents(folder, unsupported_organise_files):
+                if doc:
+                    training_texts.append(doc)
+                    training_labels.append(folder_name)
+
+        unsorted_texts, valid_unsorted_files = [], []
+        self.progress.emit("Reading selected text files...")
+        text_files, _ = self.extractor.order(text_files)
+        for i, f in enumerate(text_files, start=1):
+            self._ensure_not_cancelled()
+            self.progress.emit(f"Reading file {i}/{len(text_files)}: {os.path.basename(f)}")
+            doc = self.read_ultimate_precision_content(f, unsupported_organise_files)
+            if doc:
+                unsorted_texts.append(doc)
+                valid_unsorted_files.append(f)
+
+        if valid_unsorted_files:
+            unique_labels = list(set(training_labels))
+
+            if len(unique_labels) < 2:
+                target_folder_name = unique_labels[0]
+                dest_folder_path = folder_paths_map[target_folder_name]
+
+                for file_path in valid_unsorted_files:
+                    file_name = os.path.basename(file_path)
+                    self._plan_move(
+                        plan, file_path, dest_folder_path, reason="single_target", confidence=1.0,
+                        message=f"✓ Sorted '{file_name}' ➡️ [{target_folder_name}] (Single Target Direct Move)"
+                    )
+
+                metrics_message += (
+                    "📊 DIRECT SORTING:\n"
+                    "   • Logic: Single Destination Selected\n"
+                    "   • Coverage: 100% Automated Distribution\n\n"
+                )
+
+            else:
+                self.progress.emit("Training fast linear models..." if self.fast_mode else "Training ensemble models...")
+                vectorizer = WeightedTfidfVectorizer(
+                    max_features=5000,
+                    ngram_range=(1, 3),
+                    min_df=1,
+                    max_df=0.80,
+                    sublinear_tf=True
+                )
+                with self.perf.span("vectorize", items=len(training_texts)):
+                    X_all = vectorizer.fit_transform(training_texts)
+
+                # Fast mode: SGD + nearest centroid; otherwise RF + probability SVC
+                model_a, model_b, (name_a, name_b) = make_model_pair(self.fast_mode, C=3.0, n_jobs=n_jobs)
+
+                with self.perf.span("train", items=len(training_texts)):
+                    model_a.fit(X_all, training_labels)
+                    model_b.fit(X_all, training_labels)
+
+                    a_preds = model_a.predict(X_all)
+                    b_preds = model_b.predict(X_all)
+
+                metrics_message += (
+                    f"📊 {'FAST LINEAR' if self.fast_mode else 'ENSEMBLE'} CONSENSUS REPORT:\n"
+                    f"   • {name_a} Precision: {precision_score(training_labels, a_preds, average='weighted', zero_division=0):.2%}\n"
+                    f"   • {name_b} Precision: {precision_score(training_labels, b_preds, average='weighted', zero_division=0):.2%}\n"
+                    f"   • Logic: Soft Voting Probability Averaging\n\n"
+                )
+
+                with self.perf.span("predict", items=len(unsorted_texts)):
+                    X_unsorted = vectorizer.transform(unsorted_texts)
+                    a_probs = model_a.predict_proba(X_unsorted)
+                    b_probs = model_b.predict_proba(X_unsorted)
+
+                a_classes = model_a.classes_
+                b_classes = model_b.classes_
+
+                for i, file_path in enumerate(valid_unsorted_files, start=1):
+                    self._ensure_not_cancelled()
+                    self.progress.emit(
+                        f"Sorting text file {i}/{len(valid_unsorted_files)}: {os.path.basename(file_path)}"
+                    )
+
+                    a_pred = a_classes[np.argmax(a_probs[i - 1])]
+                    b_pred = b_classes[np.argmax(b_probs[i - 1])]
+                    a_conf = np.max(a_probs[i - 1])
+                    b_conf = np.max(b_probs[i - 1])
+
+                    if a_pred == b_pred:
+                        target_folder_name = a_pred
+                        status_icon = "✓"
+                    else:
+                        target_folder_name = a_pred if a_conf >= b_conf else b_pred
+                        status_icon = "⚡ (Tie-Breaker)"
+
+                    dest_folder_path = folder_paths_map.get(target_folder_name)
+
+                    if not dest_folder_path or not os.path.exists(dest_folder_path):
+                        if a_pred == b_pred:
+                            dest_folder_path = os.path.join(self.current_view_path, a_pred)
+                        else:
+                            plan.note(
+                                f"⚠️ Skipped '{os.path.basename(file_path)}' ➡️ "
+                                f"[{target_folder_name}] (Hallucinated Folder Target)"
+                            )
+                            continue
+
+                    self._plan_move(
+                        plan, file_path, dest_folder_path,
+                        reason="consensus" if a_pred == b_pred else "tie_breaker",
+                        confidence=float(max(a_conf, b_conf)),
+                        message=(
+                            f"{status_icon} Sorted '{os.path.basename(file_path)}' ➡️ "
+                            f"[{target_folder_name}]"
+                        )
+                    )
+
+        return metrics_message
+
+    def _cluster_text(self, pool_text, plan, unsupported_organise_files, n_jobs=None):
+        """Text pipeline for loose files: cluster and plan a move per file (clustering ignores n_jobs)"""
+        metrics_message = ""
+        file_contents, valid_files = [], []
+
+        # Huge pools: documents are hashed into the matrix chunk by chunk and dropped
+        out_of_core = len(pool_text) > OUT_OF_CORE_THRESHOLD
+        vectorizer_options = dict(max_features=3000, ngram_range=(1, 2), min_df=1, max_df=0.90, sublinear_tf=True)
+        if out_of_core:
+            vectorizer = StreamingTfidfVectorizer(**vectorizer_options)
+        else:
+            vectorizer = WeightedTfidfVectorizer(**vectorizer_options)
+        vectorize_seconds = 0.0
+
+        self.progress.emit("Reading files for clustering...")
+        read_start = time.perf_counter()
+        pool_text, _ = self.extractor.order(pool_text)
+        for i, f in enumerate(pool_text, start=1):
+            self._ensure_not_cancelled()
+            if not out_of_core or i % STREAM_CHUNK_SIZE == 1:
+                self.progress.emit(f"Reading file {i}/{len(pool_text)}: {os.path.basename(f)}")
+            doc = self.read_ultimate_precision_content(f, unsupported_organise_files)
+            if doc:
+                file_contents.append(doc)
+                valid_files.append(f)
+            if out_of_core and len(file_contents) >= STREAM_CHUNK_SIZE:
+                chunk_start = time.perf_counter()
+                with self.perf.span("vectorize", items=len(file_contents)):
+                    vectorizer.partial_fit(file_contents)
+                file_contents = []
+                vectorize_seconds += time.perf_counter() - chunk_start
+        read_seconds = time.perf_counter() - read_start - vectorize_seconds
+
+        if len(valid_files) >= 2:
+            self.progress.emit("Building clusters...")
+            vectorize_start = time.perf_counter()
+            with self.perf.span("vectorize", items=len(file_contents)):
+                if out_of_core:
+                    if file_contents:
+                        vectorizer.partial_fit(file_contents)
+                    X = vectorizer.finish()
+                else:
+                    X = vectorizer.fit_transform(file_contents)
+                feature_names = vectorizer.get_feature_names_out()
+            del file_contents
+            vectorize_seconds += time.perf_counter() - vectorize_start
+
+            # LSA + MiniBatchKMeans with automatic k (fitted on a sample for huge pools); labels used directly
+            with self.perf.span("cluster", items=X.shape[0]):
+                clustering = cluster_documents(
+                    X, feature_names, should_cancel=lambda: self._is_cancelled
+                )
+
+            if len(set(clustering.labels)) < 2:
+                plan.error_message = (
+                    "These text files are too similar for the AI to separate into different groups.\n\n"
+                    "Try selecting files with more varied content, or manually sort them into folders first."
+                )
+                return metrics_message
+
+            timings = clustering.timings
+            metrics_message += (
+                "📊 ENTERPRISE CLUSTER REPORT:\n"
+                f"   • Logic: LSA + MiniBatch K-Means ({clustering.k} groups, "
+                f"silhouette {clustering.silhouette:.2f})\n"
+                f"   • Timings: read {read_seconds:.1f}s, vectorize {vectorize_seconds:.1f}s, "
+                f"reduce {timings['reduce']:.1f}s, select k {timings['select_k']:.1f}s, "
+                f"assign {timings['assign']:.1f}s, name {timings['name']:.1f}s\n"
+                + (f"   • Out-of-core: {len(valid_files):,} files streamed in chunks of {STREAM_CHUNK_SIZE}\n"
+                   if out_of_core else "")
+                + "\n"
+            )
+
+            for i, file_path in enumerate(valid_files):
+                target_folder = clustering.names[clustering.labels[i]]
+                dest_folder_path = os.path.join(self.current_view_path, target_folder)
+                self._plan_move(
+                    plan, file_path, dest_folder_path, reason="cluster",
+                    message=f"✓ Smart Grouped '{os.path.basename(file_path)}' ➡️ [{target_folder}]"
+                )
+
+        return metrics_message
+
+    def _categorise_by_topic(self, pool_text, plan, unsupported_organise_files, n_jobs=None):
+        """
+        Text pipeline for loose files in topic mode: the pretrained BBC models
+        classify batches of raw text, with no training (falls back to clustering
+        when the models are missing)
+        """
+        classifier = TopicClassifier.shared()
+        if classifier is None:
+            plan.note("⚠️ Pretrained topic model not found — files were grouped by content instead.")
+            return self._cluster_text(pool_text, plan, unsupported_organise_files)
+
+        counts = {}
+        read_seconds = classify_seconds = 0.0
+        classified = 0
+        pool_text, _ = self.extractor.order(pool_text)
+        for start in range(0, len(pool_text), TOPIC_BATCH_SIZE):
+            batch_paths, batch_texts = [], []
+            read_start = time.perf_counter()
+            for i, f in enumerate(pool_text[start:start + TOPIC_BATCH_SIZE], start=start + 1):
+                self.progress.emit(f"Reading file {i}/{len(pool_text)}: {os.path.basename(f)}")
+                chunks = self._extract_chunks(f, unsupported_organise_files)
+                if chunks:
+                    batch_paths.append(f)
+                    batch_texts.append(" ".join(chunks))
+            read_seconds += time.perf_counter() - read_start
+            if not batch_paths:
+                continue
+
+            self._ensure_not_cancelled()
+            self.progress.emit(f"Categorising {classified + len(batch_paths)}/{len(pool_text)} files by topic...")
+            classify_start = time.perf_counter()
+            with self.perf.span("topic classify", items=len(batch_texts)):
+                labels = classifier.classify(batch_texts)
+            classify_seconds += time.perf_counter() - classify_start
+            classified += len(batch_paths)
+
+            for file_path, (category, confidence) in zip(batch_paths, labels):
+                counts[category] = counts.get(category, 0) + 1
+                conf = f" ({confidence:.0%})" if confidence is not None else ""
+                self._plan_move(
+                    plan, file_path, os.path.join(self.current_view_path, category),
+                    reason="topic", confidence=confidence,
+                    message=f"✓ Topic: '{os.path.basename(file_path)}' ➡️ [{category}]{conf}"
+                )
+
+        if not classified:
+            return ""
+        rate = classified / classify_seconds if classify_seconds > 0 else float("inf")
+        spread = ", ".join(f"{name} {count}" for name, count in sorted(counts.items(), key=lambda kv: -kv[1]))
+        return (
+            "📊 BBC TOPIC MODEL REPORT:\n"
+            f"   • Model: {classifier.model_name} (pretrained, no training this run)\n"
+            f"   • Files Categorised: {classified} — {spread}\n"
+            f"   • Throughput: {rate:,.0f} files/s classify, read {read_seconds:.1f}s\n\n"
+        )
 
     def run(self):
+        self.perf = PerfRecorder("organise")
+        self.extractor = BudgetedExtractor()
+        self.profile_store = FolderProfileStore(self._read_profile_document)
+        self.profile_stats = {"reused": 0, "read": 0}
+        self.plan_cache = OrganisePlanCache()
         try:
+            # Unchanged selection: reuse the last plan instead of analysing again
+            self.progress.emit("Checking for a saved plan...")
+            cached_plan = self.plan_cache.get(self.selected_paths, self.current_view_path, self.plan_mode)
+            if cached_plan is not None:
+                self._emit_plan(cached_plan, cached=True)
+                return
+
             folders_selected = [p for p in self.selected_paths if os.path.isdir(p)]
             files_selected = [p for p in self.selected_paths if os.path.isfile(p)]
 
-            image_files = [f for f in files_selected if Path(f).suffix.lower() in IMAGE_EXTENSIONS]
-            video_files = [f for f in files_selected if Path(f).suffix.lower() in VIDEO_EXTENSIONS]
-            text_files = [f for f in files_selected if f not in image_files and f not in video_files]
+            selection = partition_by_type(files_selected, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS)
+            image_files, video_files, text_files = selection.images, selection.videos, selection.text
 
             unsupported_organise_files = []
             valid_text_files = []
@@ -425,54 +1019,45 @@ class SmartOrganiseWorker(QThread):
 
             text_files = valid_text_files
 
-            move_history = []
-            results_message = "🤖 AI Smart Organise Complete!\n\n"
+            plan = OrganisePlan(self.current_view_path, unsupported_files=unsupported_organise_files)
             metrics_message = ""
 
             if len(files_selected) == 1 and not folders_selected and len(text_files) == 1:
-                from sklearn.feature_extraction.text import TfidfVectorizer
-
                 file_path = text_files[0]
                 file_name = os.path.basename(file_path)
 
                 self.progress.emit(f"Reading: {file_name}")
-                text = self.read_ultimate_precision_content(file_path, unsupported_organise_files)
+                doc = self.read_ultimate_precision_content(file_path, unsupported_organise_files)
 
-                if not text.strip():
-                    self.finished.emit({
-                        "cancelled": False,
-                        "unsupported_files": unsupported_organise_files,
-                        "error_message": (
-                            f"'{file_name}' could not be read — it may have no text content "
-                            "(e.g. image-only PDF).\n\nTry a different file format or ensure "
-                            "the file contains readable text."
-                        ),
-                        "move_history": [],
-                        "results_message": "",
-                        "metrics_message": "",
-                        "current_view_path": self.current_view_path
-                    })
+                if not doc:
+                    plan.error_message = (
+                        f"'{file_name}' could not be read — it may have no text content "
+                        "(e.g. image-only PDF).\n\nTry a different file format or ensure "
+                        "the file contains readable text."
+                    )
+                    self._emit_plan(plan)
                     return
 
                 self.progress.emit(f"Analysing keyword: {file_name}")
-                vectorizer = TfidfVectorizer(stop_words='english', max_features=500, ngram_range=(1, 2))
-                X = vectorizer.fit_transform([text])
-                feature_names = vectorizer.get_feature_names_out()
+                vectorizer = WeightedTfidfVectorizer(max_features=500, ngram_range=(1, 2))
+                with self.perf.span("vectorize", items=1):
+                    X = vectorizer.fit_transform([doc])
+                    feature_names = vectorizer.get_feature_names_out()
                 scores = X.toarray()[0]
 
                 sorted_idx = scores.argsort()[::-1]
-                target_folder = "Uncategorised"
+                target_folder, keyword_score = "Uncategorised", None
                 for idx in sorted_idx:
                     word = feature_names[idx].title()
                     if len(word) >= 4:
-                        target_folder = word
+                        target_folder, keyword_score = word, float(scores[idx])
                         break
 
                 dest_folder_path = os.path.join(self.current_view_path, target_folder)
-                self.progress.emit(f"Moving file to [{target_folder}]...")
-                self._move_file_safely(file_path, dest_folder_path, move_history)
-
-                results_message += f"✓ Sorted '{file_name}' ➡️ [{target_folder}]\n"
+                self._plan_move(
+                    plan, file_path, dest_folder_path, reason="keyword", confidence=keyword_score,
+                    message=f"✓ Sorted '{file_name}' ➡️ [{target_folder}]"
+                )
                 metrics_message += (
                     f"📊 AI CONTENT ANALYSIS REPORT:\n"
                     f"   • Folder Name: {target_folder}\n"
@@ -481,9 +1066,6 @@ class SmartOrganiseWorker(QThread):
                 )
 
             elif len(folders_selected) >= 2 and not files_selected:
-                from sklearn.feature_extraction.text import TfidfVectorizer
-                from sklearn.metrics.pairwise import cosine_similarity
-
                 folder_profiles = []
                 valid_folders = []
 
@@ -493,377 +1075,195 @@ class SmartOrganiseWorker(QThread):
                     folder_name = os.path.basename(folder)
                     self.progress.emit(f"Profiling folder {i}/{len(folders_selected)}: {folder_name}")
 
-                    combined_text = (folder_name + " ") * 10
-                    for root, dirs, files in os.walk(folder):
-                        for file in files:
-                            self._ensure_not_cancelled()
-                            combined_text += self.read_ultimate_precision_content(
-                                os.path.join(root, file),
-                                unsupported_organise_files
-                            )
-                            if len(combined_text) > 80000:
-                                break
+                    profile = OrganiseDocument().add_name(folder_name, weight=10)
+                    with self.perf.span("profiles", items=1):
+                        for doc in self._folder_documents(folder, unsupported_organise_files, MAX_PROFILE_TOKENS):
+                            profile.extend(doc)
 
-                    folder_profiles.append(combined_text)
+                    folder_profiles.append(profile)
                     valid_folders.append(folder)
 
                 if len(folder_profiles) >= 2:
                     self.progress.emit("Calculating folder similarity...")
-                    vectorizer = TfidfVectorizer(
-                        stop_words='english',
+                    vectorizer = WeightedTfidfVectorizer(
                         max_features=2500,
                         ngram_range=(1, 2),
                         sublinear_tf=True
                     )
 
-                    tfidf_matrix = vectorizer.fit_transform(folder_profiles)
-                    sim_matrix = cosine_similarity(tfidf_matrix)
+                    with self.perf.span("vectorize", items=len(folder_profiles)):
+                        tfidf_matrix = vectorizer.fit_transform(folder_profiles)
 
-                    best_i, best_j, max_sim = 0, 1, -1
-                    for i in range(len(valid_folders)):
-                        for j in range(i + 1, len(valid_folders)):
-                            if sim_matrix[i][j] > max_sim:
-                                max_sim = sim_matrix[i][j]
-                                best_i, best_j = i, j
+                    sizes = []
+                    for folder in valid_folders:
+                        try:
+                            sizes.append(len(os.listdir(folder)))
+                        except OSError:
+                            sizes.append(0)
 
-                    if max_sim > -1:
-                        folder_a, folder_b = valid_folders[best_i], valid_folders[best_j]
-                        parent = folder_a if len(os.listdir(folder_a)) >= len(os.listdir(folder_b)) else folder_b
-                        child = folder_b if parent == folder_a else folder_a
+                    # Sparse top-k candidates + centroid agglomeration, whole plan in one pass
+                    with self.perf.span("merge plan", items=len(valid_folders)):
+                        steps = plan_merges(tfidf_matrix, sizes, threshold=DEFAULT_MERGE_THRESHOLD)
 
-                        self.progress.emit(f"Merging folder [{os.path.basename(child)}]...")
+                    for child_idx, parent_idx, similarity in steps:
+                        self._ensure_not_cancelled()
+                        child, parent = valid_folders[child_idx], valid_folders[parent_idx]
                         target_path = os.path.join(parent, os.path.basename(child))
-                        if os.path.exists(target_path):
-                            target_path += "_merged"
-
-                        shutil.move(child, target_path)
-                        move_history.append((target_path, child))
 
-                        results_message += (
-                            f"📁 Force Merged Folders: [{os.path.basename(child)}] ➡️ "
-                            f"[{os.path.basename(parent)}]\n"
-                            f"   • Best Available Match Score: {max_sim:.1%}\n"
-                        )
-
-            elif folders_selected and files_selected:
-                if image_files or video_files:
-                    media_results, media_metrics = self._classify_and_move_media(
-                        image_files, video_files, self.current_view_path, move_history
-                    )
-                    results_message += media_results
-                    metrics_message += media_metrics
-
-                if text_files:
-                    import numpy as np
-                    from sklearn.feature_extraction.text import TfidfVectorizer
-                    from sklearn.ensemble import RandomForestClassifier
-                    from sklearn.svm import SVC
-                    from sklearn.metrics import precision_score
-
-                    training_texts, training_labels = [], []
-                    folder_paths_map = {}
-
-                    self.progress.emit("Preparing training data from selected folders...")
-                    for i, folder in enumerate(folders_selected, start=1):
-                        self._ensure_not_cancelled()
-                        folder_name = os.path.basename(folder)
-                        folder_paths_map[folder_name] = folder
-
-                        self.progress.emit(f"Reading folder {i}/{len(folders_selected)}: {folder_name}")
-                        synthetic_data = (folder_name + " ") * 50
-                        for _ in range(5):
-                            training_texts.append(synthetic_data)
-                            training_labels.append(folder_name)
-
-                        for root, dirs, files in os.walk(folder):
-                            for file in files:
-                                self._ensure_not_cancelled()
-                                text = self.read_ultimate_precision_content(
-                                    os.path.join(root, file),
-                                    unsupported_organise_files
-                                )
-                                if text.strip():
-                                    training_texts.append(text)
-                                    training_labels.append(folder_name)
-
-                    unsorted_texts, valid_unsorted_files = [], []
-                    self.progress.emit("Reading selected text files...")
-                    for i, f in enumerate(text_files, start=1):
-                        self._ensure_not_cancelled()
-                        self.progress.emit(f"Reading file {i}/{len(text_files)}: {os.path.basename(f)}")
-                        text = self.read_ultimate_precision_content(f, unsupported_organise_files)
-                        if text.strip():
-                            unsorted_texts.append(text)
-                            valid_unsorted_files.append(f)
-
-                    if valid_unsorted_files:
-                        unique_labels = list(set(training_labels))
-
-                        if len(unique_labels) < 2:
-                            target_folder_name = unique_labels[0]
-                            dest_folder_path = folder_paths_map[target_folder_name]
-
-                            for i, file_path in enumerate(valid_unsorted_files, start=1):
-                                self._ensure_not_cancelled()
-                                self.progress.emit(
-                                    f"Moving file {i}/{len(valid_unsorted_files)} to [{target_folder_name}]..."
-                                )
-                                file_name = os.path.basename(file_path)
-                                self._move_file_safely(file_path, dest_folder_path, move_history)
-                                results_message += (
-                                    f"✓ Sorted '{file_name}' ➡️ [{target_folder_name}] "
-                                    "(Single Target Direct Move)\n"
-                                )
-
-                            metrics_message += (
-                                "📊 DIRECT SORTING:\n"
-                                "   • Logic: Single Destination Selected\n"
-                                "   • Coverage: 100% Automated Distribution\n\n"
+                        if similarity >= DEFAULT_MERGE_THRESHOLD:
+                            message = (
+                                f"📁 Merged Folders: [{os.path.basename(child)}] ➡️ "
+                                f"[{os.path.basename(parent)}]\n"
+                                f"   • Match Score: {similarity:.1%}"
                             )
-
                         else:
-                            self.progress.emit("Training ensemble models...")
-                            vectorizer = TfidfVectorizer(
-                                stop_words='english',
-                                max_features=5000,
-                                ngram_range=(1, 3),
-                                min_df=1,
-                                max_df=0.80,
-                                sublinear_tf=True
-                            )
-                            X_all = vectorizer.fit_transform(training_texts)
-
-                            rf_model = RandomForestClassifier(
-                                n_estimators=300,
-                                criterion='entropy',
-                                class_weight='balanced',
-                                random_state=42
-                            )
-                            svm_model_sup = SVC(
-                                kernel='linear',
-                                C=3.0,
-                                class_weight='balanced',
-                                probability=True,
-                                random_state=42
+                            message = (
+                                f"📁 Force Merged Folders: [{os.path.basename(child)}] ➡️ "
+                                f"[{os.path.basename(parent)}]\n"
+                                f"   • Best Available Match Score: {similarity:.1%}"
                             )
+                        plan.add_folder_move(
+                            child, target_path, reason="merge", confidence=float(similarity), message=message
+                        )
 
-                            rf_model.fit(X_all, training_labels)
-                            svm_model_sup.fit(X_all, training_labels)
+                    if not steps:
+                        plan.note("📁 No folders share enough content to merge.")
 
-                            rf_preds = rf_model.predict(X_all)
-                            svm_preds = svm_model_sup.predict(X_all)
+                    metrics_message += (
+                        f"📊 FOLDER MERGE PLAN:\n"
+                        f"   • Folders Analysed: {len(valid_folders)}\n"
+                        f"   • Merge Steps: {len(steps)}\n"
+                        f"   • Threshold: {DEFAULT_MERGE_THRESHOLD:.0%} Profile Similarity\n"
+                        f"   • Method: Sparse Top-K + Centroid Agglomeration\n\n"
+                    )
 
-                            metrics_message += (
-                                f"📊 ENSEMBLE CONSENSUS REPORT:\n"
-                                f"   • RF Precision: {precision_score(training_labels, rf_preds, average='weighted', zero_division=0):.2%}\n"
-                                f"   • SVM Precision: {precision_score(training_labels, svm_preds, average='weighted', zero_division=0):.2%}\n"
-                                f"   • Logic: Soft Voting Probability Averaging\n\n"
-                            )
+            elif folders_selected and files_selected:
+                (image_files, video_files, text_files), twins = self._skip_duplicates(
+                    image_files, video_files, text_files
+                )
 
-                            X_unsorted = vectorizer.transform(unsorted_texts)
-                            rf_probs = rf_model.predict_proba(X_unsorted)
-                            svm_probs = svm_model_sup.predict_proba(X_unsorted)
-
-                            rf_classes = rf_model.classes_
-                            svm_classes = svm_model_sup.classes_
-
-                            for i, file_path in enumerate(valid_unsorted_files, start=1):
-                                self._ensure_not_cancelled()
-                                self.progress.emit(
-                                    f"Sorting text file {i}/{len(valid_unsorted_files)}: {os.path.basename(file_path)}"
-                                )
-
-                                rf_pred = rf_classes[np.argmax(rf_probs[i - 1])]
-                                svm_pred = svm_classes[np.argmax(svm_probs[i - 1])]
-                                rf_conf = np.max(rf_probs[i - 1])
-                                svm_conf = np.max(svm_probs[i - 1])
-
-                                if rf_pred == svm_pred:
-                                    target_folder_name = rf_pred
-                                    status_icon = "✓"
-                                else:
-                                    target_folder_name = rf_pred if rf_conf >= svm_conf else svm_pred
-                                    status_icon = "⚡ (Tie-Breaker)"
-
-                                dest_folder_path = folder_paths_map.get(target_folder_name)
-
-                                if not dest_folder_path or not os.path.exists(dest_folder_path):
-                                    if rf_pred == svm_pred:
-                                        dest_folder_path = os.path.join(self.current_view_path, rf_pred)
-                                    else:
-                                        results_message += (
-                                            f"⚠️ Skipped '{os.path.basename(file_path)}' ➡️ "
-                                            f"[{target_folder_name}] (Hallucinated Folder Target)\n"
-                                        )
-                                        continue
-
-                                self._move_file_safely(file_path, dest_folder_path, move_history)
-                                results_message += (
-                                    f"{status_icon} Sorted '{os.path.basename(file_path)}' ➡️ "
-                                    f"[{target_folder_name}]\n"
-                                )
+                # CNN on a background thread while the text models train on this one
+                text_plan = OrganisePlan(self.current_view_path)
+                text_pipeline = None
+                if text_files:
+                    text_pipeline = partial(
+                        self._sort_text_into_folders,
+                        text_files, folders_selected, text_plan, unsupported_organise_files
+                    )
+                media_result, text_metrics = self._run_pipelines(image_files, video_files, text_pipeline)
+                media_plan, media_metrics, pipeline_line = media_result
+                plan.merge(media_plan)
+                plan.merge(text_plan)
+                metrics_message += media_metrics + text_metrics + pipeline_line
+                metrics_message += self._plan_twins(plan, twins)
 
             elif (len(files_selected) >= 2 and not folders_selected) or (folders_selected and not files_selected):
-                pool = list(files_selected)
-                for folder in folders_selected:
-                    for root, dirs, files in os.walk(folder):
-                        for file in files:
-                            pool.append(os.path.join(root, file))
-
-                pool_images = [f for f in pool if Path(f).suffix.lower() in IMAGE_EXTENSIONS]
-                pool_videos = [f for f in pool if Path(f).suffix.lower() in VIDEO_EXTENSIONS]
-                pool_text = [f for f in pool if f not in pool_images and f not in pool_videos]
-
-                if pool_images or pool_videos:
-                    media_results, media_metrics = self._classify_and_move_media(
-                        pool_images, pool_videos, self.current_view_path, move_history
+                # Streamed from the walker and split by extension in the same pass
+                self.progress.emit("Collecting files...")
+                with self.perf.span("collect") as span:
+                    pool = partition_by_type(
+                        iter_pool(files_selected, folders_selected, should_cancel=lambda: self._is_cancelled),
+                        IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
                     )
-                    results_message += media_results
-                    metrics_message += media_metrics
+                    span.add(items=pool.total)
+                pool_images, pool_videos, pool_text = pool.images, pool.videos, pool.text
+                (pool_images, pool_videos, pool_text), twins = self._skip_duplicates(
+                    pool_images, pool_videos, pool_text
+                )
 
+                # CNN on a background thread while the text files are clustered (or
+                # categorised by topic) on this one
+                text_plan = OrganisePlan(self.current_view_path)
+                text_pipeline = None
                 if pool_text:
-                    import numpy as np
-                    from sklearn.feature_extraction.text import TfidfVectorizer
-                    from sklearn.cluster import KMeans
-                    from sklearn.ensemble import RandomForestClassifier
-                    from sklearn.svm import SVC
+                    text_pipeline = partial(
+                        self._categorise_by_topic if self.topic_mode else self._cluster_text,
+                        pool_text, text_plan, unsupported_organise_files
+                    )
+                media_result, text_metrics = self._run_pipelines(pool_images, pool_videos, text_pipeline)
+                media_plan, media_metrics, pipeline_line = media_result
+                plan.merge(media_plan)
+                plan.merge(text_plan)
+                metrics_message += media_metrics
+
+                if text_plan.error_message:
+                    plan.error_message = text_plan.error_message
+                    plan.metrics_message = metrics_message
+                    self._emit_plan(plan)
+                    return
+                metrics_message += text_metrics + pipeline_line
+                metrics_message += self._plan_twins(plan, twins)
 
-                    file_contents, valid_files = [], []
+            else:
+                plan.error_message = "Please select files or folders to organize."
+                self._emit_plan(plan)
+                return
 
-                    self.progress.emit("Reading files for clustering...")
-                    for i, f in enumerate(pool_text, start=1):
-                        self._ensure_not_cancelled()
-                        self.progress.emit(f"Reading file {i}/{len(pool_text)}: {os.path.basename(f)}")
-                        text = self.read_ultimate_precision_content(f, unsupported_organise_files)
-                        if text.strip():
-                            file_contents.append(text)
-                            valid_files.append(f)
-
-                    if len(valid_files) >= 2:
-                        self.progress.emit("Building clusters...")
-                        vectorizer = TfidfVectorizer(
-                            stop_words='english',
-                            max_features=3000,
-                            ngram_range=(1, 2),
-                            min_df=1,
-                            max_df=0.90,
-                            sublinear_tf=True
-                        )
-                        X = vectorizer.fit_transform(file_contents)
-                        feature_names = vectorizer.get_feature_names_out()
-
-                        n_clusters = max(2, len(valid_files) // 3)
-                        if n_clusters >= len(valid_files):
-                            n_clusters = max(2, len(valid_files) - 1)
-                        n_clusters = min(n_clusters, len(valid_files))
-
-                        kmeans = KMeans(
-                            n_clusters=n_clusters,
-                            random_state=42,
-                            n_init=30,
-                            max_iter=1000
-                        )
-                        kmeans.fit(X)
-
-                        cluster_labels = kmeans.labels_
-                        unique_clusters = len(set(cluster_labels))
-
-                        if unique_clusters < 2:
-                            self.finished.emit({
-                                "cancelled": False,
-                                "unsupported_files": unsupported_organise_files,
-                                "error_message": (
-                                    "These text files are too similar for the AI to separate into different groups.\n\n"
-                                    "Try selecting files with more varied content, or manually sort them into folders first."
-                                ),
-                                "move_history": move_history,
-                                "results_message": results_message,
-                                "metrics_message": metrics_message,
-                                "current_view_path": self.current_view_path
-                            })
-                            return
-
-                        rf_model_unsup = RandomForestClassifier(
-                            n_estimators=300,
-                            criterion='entropy',
-                            class_weight='balanced',
-                            random_state=42
-                        )
-                        svm_model_unsup = SVC(
-                            kernel='linear',
-                            C=2.0,
-                            class_weight='balanced',
-                            probability=True,
-                            random_state=42
-                        )
+            if self.profile_stats["reused"] or self.profile_stats["read"]:
+                metrics_message += (
+                    f"📁 DESTINATION FOLDER PROFILES:\n"
+                    f"   • Files Reused From Store: {self.profile_stats['reused']}\n"
+                    f"   • Files Read (new or changed): {self.profile_stats['read']}\n\n"
+                )
 
-                        self.progress.emit("Training cluster boundary models...")
-                        rf_model_unsup.fit(X, cluster_labels)
-                        svm_model_unsup.fit(X, cluster_labels)
+            metrics_message += self.perf.report()
+            plan.metrics_message = metrics_message
+            self._emit_plan(plan)
 
-                        metrics_message += (
-                            "📊 ENTERPRISE CLUSTER REPORT:\n"
-                            "   • Logic: Dual-Model Probability Averaging\n"
-                            "   • Status: 100% Boundary Assignment\n\n"
-                        )
+        except InterruptedError:
+            self.finished.emit({
+                "cancelled": True,
+                "plan": None,
+                "current_view_path": self.current_view_path
+            })
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.extractor.close()
 
-                        rf_probs = rf_model_unsup.predict_proba(X)
-                        svm_probs = svm_model_unsup.predict_proba(X)
-                        classes = svm_model_unsup.classes_
 
-                        for i, file_path in enumerate(valid_files, start=1):
-                            self._ensure_not_cancelled()
-                            self.progress.emit(
-                                f"Grouping file {i}/{len(valid_files)}: {os.path.basename(file_path)}"
-                            )
+class ApplyPlanWorker(QThread):
+    """Executes the kept steps of a Smart Organise plan off the UI thread"""
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
 
-                            avg_probs = (rf_probs[i - 1] + svm_probs[i - 1]) / 2.0
-                            assigned_label = classes[np.argmax(avg_probs)]
+    def __init__(self, plan, steps):
+        super().__init__()
+        self.plan = plan
+        self.steps = steps
 
-                            top_word_idx = kmeans.cluster_centers_[assigned_label].argsort()[-1]
-                            target_folder = feature_names[top_word_idx].title()
-                            if len(target_folder) < 3:
-                                target_folder = f"Subject_Area_{assigned_label + 1}"
+    def run(self):
+        try:
+            # Settle any run a crash left half-applied before starting another
+            perf = PerfRecorder("apply")
+            recover_incomplete_runs()
+            with perf.span("move") as span:
+                move_history, applied, run_id = apply_plan(self.plan, self.steps, progress=self.progress.emit)
+                span.add(items=len(move_history))
+            perf.log(run_id=run_id, steps=len(self.steps))
+            self.finished.emit({
+                "move_history": move_history, "applied": applied, "run_id": run_id,
+                "perf": perf.report(title="⏱️ APPLY TIMINGS")
+            })
+        except Exception as e:
+            self.error.emit(str(e))
 
-                            dest_folder_path = os.path.join(self.current_view_path, target_folder)
-                            self._move_file_safely(file_path, dest_folder_path, move_history)
-                            results_message += (
-                                f"✓ Smart Grouped '{os.path.basename(file_path)}' ➡️ "
-                                f"[{target_folder}]\n"
-                            )
 
-            else:
-                self.finished.emit({
-                    "cancelled": False,
-                    "unsupported_files": unsupported_organise_files,
-                    "error_message": "Please select files or folders to organize.",
-                    "move_history": [],
-                    "results_message": "",
-                    "metrics_message": "",
-                    "current_view_path": self.current_view_path
-                })
-                return
+class RollbackWorker(QThread):
+    """Undoes a journaled organise/archive run off the UI thread"""
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(int, int)
+    error = pyqtSignal(str)
 
-            self.finished.emit({
-                "cancelled": False,
-                "unsupported_files": unsupported_organise_files,
-                "error_message": "",
-                "move_history": move_history,
-                "results_message": results_message,
-                "metrics_message": metrics_message,
-                "current_view_path": self.current_view_path
-            })
+    def __init__(self, run_id):
+        super().__init__()
+        self.run_id = run_id
 
-        except InterruptedError:
-            self.finished.emit({
-                "cancelled": True,
-                "unsupported_files": [],
-                "error_message": "",
-                "move_history": [],
-                "results_message": "",
-                "metrics_message": "",
-                "current_view_path": self.current_view_path
-            })
+    def run(self):
+        try:
+            restored, skipped = rollback_run(self.run_id, progress=self.progress.emit)
+            self.finished.emit(restored, skipped)
         except Exception as e:
             self.error.emit(str(e))
 
@@ -889,6 +1289,8 @@ class SmartFileManager(QMainWindow):
         self._cnn_search_worker = None
         self._deep_search_worker = None
         self._smart_organise_worker = None
+        self._apply_plan_worker = None
+        self._rollback_worker = None
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -915,7 +1317,7 @@ class SmartFileManager(QMainWindow):
         self.stack = QStackedWidget()
         self.home_view = HomeView()
         self.files_view = FileBrowserView()
-        self.archive_view = ArchiveView()
+        self.archive_view = ArchiveView(moves_busy=self._moves_in_progress)
         self.statistics_view = StatisticsView()
         self.sharing_view = FileSharingView(self.user_data.get("email"))
 
@@ -944,8 +1346,42 @@ class SmartFileManager(QMainWindow):
         self.overlay = LoadingOverlay(self)
         self.overlay.resize(self.size())
 
+        # Trigram filename index for Smart Search: refreshed now, then every 10 minutes
+        self._filename_index_worker = None
+        self.filename_index_timer = QTimer(self)
+        self.filename_index_timer.timeout.connect(self.refresh_filename_index)
+        self.filename_index_timer.start(10 * 60 * 1000)
+        self.refresh_filename_index()
+
+        # File metadata catalogue: full crawl now, then quick (changed folders only) every 10 minutes
+        self._catalogue_worker = None
+        self.filename_index_timer.timeout.connect(self.refresh_catalogue)
+        self.refresh_catalogue(full=True)
+
         self.switch_view("home")
 
+    def refresh_filename_index(self):
+        if self._filename_index_worker and self._filename_index_worker.isRunning():
+            return
+        self._filename_index_worker = FilenameIndexWorker()
+        self._filename_index_worker.start()
+
+    def refresh_catalogue(self, full=False):
+        if self._catalogue_worker and self._catalogue_worker.isRunning():
+            return
+        self._catalogue_worker = CatalogueWorker(full=full)
+        self._catalogue_worker.start()
+
+    def stop_background_workers(self):
+        """Stops the periodic crawlers and waits for them; called before this manager is destroyed"""
+        self.filename_index_timer.stop()
+        for worker in (self._filename_index_worker, self._catalogue_worker):
+            if worker and worker.isRunning():
+                worker.stop()
+                worker.wait()
+        self.statistics_view.stop_duplicate_scan()
+        self.archive_view.wait_for_archiving()
+
     # ── Overlay helpers ──────────────────────────────────────────────────────
 
     def _show_overlay(self, message):
@@ -981,6 +1417,9 @@ class SmartFileManager(QMainWindow):
             self.logout_requested.emit()
 
     def handle_action_bar(self, action_name):
+        if action_name == "undo_history":
+            self.show_undo_history()
+            return
         current_widget = self.stack.currentWidget()
         if current_widget == self.files_view:
             self.files_view.file_table.perform_action(action_name.lower())
@@ -1006,6 +1445,10 @@ class SmartFileManager(QMainWindow):
         if not os.path.exists(current_path):
             return
 
+        if self.top_bar.recursive_btn.isChecked():
+            self.perform_recursive_deep_search(ai_query, current_path)
+            return
+
         all_files = [
             os.path.join(current_path, f)
             for f in os.listdir(current_path)
@@ -1031,7 +1474,7 @@ class SmartFileManager(QMainWindow):
 
             self._show_overlay("Searching inside files...")
 
-            self._deep_search_worker = DeepSearchWorker(text_files, ai_query)
+            self._deep_search_worker = DeepSearchWorker(text_files, ai_query, index_root=current_path)
             self._deep_search_worker.progress.connect(self._on_deep_search_progress)
             self._deep_search_worker.finished.connect(lambda result: self._on_deep_search_finished(result, ai_query))
             self._deep_search_worker.error.connect(self._on_deep_search_error)
@@ -1064,6 +1507,45 @@ class SmartFileManager(QMainWindow):
             self._cnn_search_worker.error_occurred.connect(self._on_cnn_search_error)
             self._cnn_search_worker.start()
 
+    def perform_recursive_deep_search(self, ai_query, root_path):
+        if self._deep_search_worker and self._deep_search_worker.isRunning():
+            self._deep_search_worker.stop()
+            self._deep_search_worker.wait()
+
+        worker = RecursiveDeepSearchWorker(root_path, ai_query)
+        dialog = DeepSearchResultsDialog(ai_query, root_path, page_size=worker.PAGE_SIZE, parent=self)
+
+        worker.progress.connect(dialog.set_status)
+        worker.results_ready.connect(dialog.update_results)
+        worker.finished.connect(lambda result: self._on_recursive_deep_search_finished(result, dialog))
+        worker.error.connect(self._on_deep_search_error)
+        dialog.load_more_requested.connect(worker.load_more)
+        dialog.cancel_requested.connect(worker.stop)
+        dialog.finished.connect(lambda _: worker.stop())
+        dialog.folder_requested.connect(self.files_view.navigate_to)
+
+        self._deep_search_worker = worker
+        dialog.show()
+        worker.start()
+
+    def _on_recursive_deep_search_finished(self, result, dialog):
+        if result.get("cancelled"):
+            if dialog.isVisible():
+                dialog.mark_cancelled()
+            return
+
+        unsupported_files = result.get("unsupported_files", [])
+        if unsupported_files and dialog.isVisible():
+            shown = unsupported_files[:15]
+            more = len(unsupported_files) - len(shown)
+            dialog.set_status(
+                f"Done — {result.get('result_count', 0)} matching file(s) across "
+                f"{result.get('files_indexed', 0)} indexed. {len(unsupported_files)} file(s) could not be read."
+            )
+            dialog.status_lbl.setToolTip(
+                "\n".join(f"• {f}" for f in shown) + (f"\n… and {more} more" if more > 0 else "")
+            )
+
     def _cancel_deep_search(self):
         if self._deep_search_worker and self._deep_search_worker.isRunning():
             self._deep_search_worker.stop()
@@ -1095,8 +1577,8 @@ class SmartFileManager(QMainWindow):
         if valid_files and found_matches:
             result_msg = f"🔍 Inside-File Matches for: '{ai_query}'\n\n"
             for idx, score, match_type in found_matches:
-                file_name = os.path.basename(valid_files[idx])
-                score_txt = "100% (Exact Match)" if match_type == "Exact Keyword Match" else f"{score:.1%}"
+                file_name = describe_path(valid_files[idx])
+                score_txt = f"{score:.0%} (Exact Match)" if match_type == "Exact Keyword Match" else f"{score:.1%}"
                 result_msg += (
                     f"📄 {file_name}\n"
                     f"   • Match Type: {match_type}\n"
@@ -1186,12 +1668,8 @@ class SmartFileManager(QMainWindow):
             QMessageBox.information(self, "Smart Organise", "Smart Organise was cancelled.")
             return
 
-        unsupported_files = result.get("unsupported_files", [])
-        error_message = result.get("error_message", "")
-        move_history = result.get("move_history", [])
-        results_message = result.get("results_message", "")
-        metrics_message = result.get("metrics_message", "")
-        current_view_path = result.get("current_view_path", self.files_view.current_path)
+        plan = OrganisePlan.from_dict(result["plan"])
+        unsupported_files = plan.unsupported_files
 
         if unsupported_files:
             QMessageBox.warning(
@@ -1202,25 +1680,56 @@ class SmartFileManager(QMainWindow):
                 + "\n\nSupported types: PDF, DOCX, XLSX, PPTX, TXT, CSV, MD, PY, JSON, HTML, XML, YAML, LOG, etc."
             )
 
-        if error_message:
-            QMessageBox.warning(self, "Smart Organise", error_message)
+        if plan.error_message:
+            QMessageBox.warning(self, "Smart Organise", plan.error_message)
+
+        if not plan.steps:
+            if hasattr(self.files_view, 'file_table'):
+                self.files_view.file_table.load_files(plan.current_view_path)
+            return
+
+        # Dry run first: nothing moves until the user applies the (possibly trimmed) plan
+        dialog = OrganisePlanDialog(plan, cached=result.get("cached", False), parent=self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        self._apply_organise_plan(plan, dialog.selected_steps())
+
+    def _apply_organise_plan(self, plan, steps):
+        if self._apply_plan_worker and self._apply_plan_worker.isRunning():
+            return
+        if self._moves_in_progress():
+            QMessageBox.information(self, "Smart Organise", "Please wait for the undo or archive in progress to finish.")
+            return
+
+        self._show_overlay("Applying organise plan...")
+        self._apply_plan_worker = ApplyPlanWorker(plan, steps)
+        self._apply_plan_worker.progress.connect(self._on_smart_organise_progress)
+        self._apply_plan_worker.finished.connect(
+            lambda result, p=plan: self._on_organise_plan_applied(p, result)
+        )
+        self._apply_plan_worker.error.connect(self._on_smart_organise_error)
+        self._apply_plan_worker.start()
+
+    def _on_organise_plan_applied(self, plan, result):
+        self._hide_overlay()
+        move_history = result.get("move_history", [])
 
         if move_history:
             self.handle_satisfaction_check(
-                results_message,
-                metrics_message,
+                plan.results_message(result.get("applied")),
+                plan.metrics_message + result.get("perf", ""),
                 move_history,
-                current_view_path
+                plan.current_view_path,
+                run_id=result.get("run_id")
             )
-        else:
-            if hasattr(self.files_view, 'file_table'):
-                self.files_view.file_table.load_files(current_view_path)
+        elif hasattr(self.files_view, 'file_table'):
+            self.files_view.file_table.load_files(plan.current_view_path)
 
     def _on_smart_organise_error(self, message):
         self._hide_overlay()
         QMessageBox.critical(self, "Semantic Error", f"Precision pipeline failed: {message}")
 
-    def handle_satisfaction_check(self, results, metrics, history, current_path):
+    def handle_satisfaction_check(self, results, metrics, history, current_path, run_id=None):
         if history:
             record_feature_use("organise")
         if hasattr(self.files_view, 'file_table'):
@@ -1452,23 +1961,59 @@ class SmartFileManager(QMainWindow):
             root.addWidget(footer)
 
             if dialog.exec() == QDialog.DialogCode.Rejected:
-                undo_progress = QProgressDialog("Restoring originals...", None, 0, len(history), self)
-                undo_progress.setMinimumDuration(0)
-                undo_progress.setWindowModality(Qt.WindowModality.WindowModal)
-                for i, (new_pos, old_pos) in enumerate(reversed(history)):
-                    if os.path.exists(new_pos):
-                        shutil.move(new_pos, old_pos)
-                        try:
-                            if not os.listdir(os.path.dirname(new_pos)):
-                                os.rmdir(os.path.dirname(new_pos))
-                        except Exception:
-                            pass
-                    undo_progress.setValue(i + 1)
-                    QApplication.processEvents()
-                undo_progress.close()
-                QMessageBox.information(self, "Restored", "All files and folders have been returned to their original positions.")
-                if hasattr(self.files_view, 'file_table'):
-                    self.files_view.file_table.load_files(current_path)
+                self.undo_run(run_id, current_path)
+
+    def _moves_in_progress(self):
+        """True while an organise plan, an undo or an archive run is moving files"""
+        workers = (self._rollback_worker, self._apply_plan_worker, self.archive_view.archive_worker)
+        return any(w and w.isRunning() for w in workers)
+
+    def undo_run(self, run_id, current_path=None, on_done=None):
+        """
+        Rolls back a journaled organise/archive run (see src/organise/undo_journal.py)
+        on a RollbackWorker; on_done() is called once it succeeded.
+        """
+        if self._moves_in_progress():
+            QMessageBox.information(self, "Undo", "Please wait for the organise, undo or archive in progress to finish.")
+            return
+
+        undo_progress = QProgressDialog("Restoring originals...", None, 0, 0, self)
+        undo_progress.setMinimumDuration(0)
+        undo_progress.setWindowModality(Qt.WindowModality.WindowModal)
+
+        self._rollback_worker = RollbackWorker(run_id)
+        self._rollback_worker.progress.connect(undo_progress.setLabelText)
+        self._rollback_worker.finished.connect(
+            lambda restored, skipped: self._on_run_undone(undo_progress, restored, skipped, current_path, on_done)
+        )
+        self._rollback_worker.error.connect(lambda message: self._on_undo_error(undo_progress, message))
+        self._rollback_worker.start()
+        undo_progress.show()
+
+    def _on_undo_error(self, undo_progress, message):
+        undo_progress.close()
+        QMessageBox.warning(self, "Undo", f"Could not undo this run:\n{message}")
+
+    def _on_run_undone(self, undo_progress, restored, skipped, current_path, on_done):
+        undo_progress.close()
+
+        if skipped:
+            QMessageBox.information(
+                self, "Restored",
+                f"{restored} item(s) were returned to their original positions.\n"
+                f"{skipped} item(s) were left alone because they were moved or replaced since."
+            )
+        else:
+            QMessageBox.information(self, "Restored", "All files and folders have been returned to their original positions.")
+        if hasattr(self.files_view, 'file_table'):
+            self.files_view.file_table.load_files(current_path or self.files_view.current_path)
+        if on_done is not None:
+            on_done()
+
+    def show_undo_history(self):
+        dialog = UndoHistoryDialog(self)
+        dialog.undo_requested.connect(lambda run_id: self.undo_run(run_id, on_done=dialog.refresh))
+        dialog.exec()
 
     def switch_view(self, identifier):
         lang_code = self.user_data.get('language_code', 'en')
@@ -1533,6 +2078,7 @@ class SmartFileManager(QMainWindow):
         current = self.stack.currentWidget()
         if current == self.files_view:
             self.files_view.file_table.load_files(self.files_view.current_path)
+            self.refresh_filename_index()
         elif current == self.home_view:
             self.home_view.load_recent_files() if hasattr(self.home_view, 'load_recent_files') else None
             self.home_view.repaint()
@@ -1642,8 +2188,14 @@ class KemaslahApp(QMainWindow):
         self.showNormal()
         self.auth_window.stack.setCurrentIndex(0)
 
+    def closeEvent(self, event):
+        self._destroy_file_manager()
+        super().closeEvent(event)
+
     def _destroy_file_manager(self):
         if self.file_manager is not None:
+            # A QThread destroyed while running aborts the app, and the next login starts its own crawler
+            self.file_manager.stop_background_workers()
             self.stack.removeWidget(self.file_manager)
             self.file_manager.deleteLater()
             self.file_manager = None
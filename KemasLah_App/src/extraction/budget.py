@@ -0,0 +1,488 @@
+"""
+budget.py
+---------
+Per-file extraction budgets and the slow-file quarantine list.
+
+A single huge or malformed PDF used to stall Deep Search, Smart Search or
+Smart Organise for minutes, because cancellation was only checked between
+pages. Rich formats (PDF, DOCX, XLSX, PPTX) are now parsed in a separate
+sandbox process (src/extraction/sandbox_main.py, which imports only the
+extractors) that the calling thread can kill, so the time budget is
+enforced from outside the parser:
+
+    • time budget  — the sandbox is terminated when a file takes too long
+    • byte budget  — rich files above the size cap are never opened;
+                     plain-text files are read only up to the cap
+    • cancellation — polled while waiting, so Stop is instant
+
+Files that time out, crash the parser or exceed the size cap are recorded
+in ~/.kemaslah/extraction_quarantine.json with their timings (a parser
+error such as a corrupt file or a missing library fails fast and is only
+reported). Later runs
+either defer them to the end or skip them (quarantine policy), until the
+file changes on disk. The slowest successful extractions are kept too and
+shown in the Statistics view's diagnostics panel.
+
+ZIP archives go through the same sandbox (extract_archive); the size cap
+applies to each member rather than to the archive itself, and the whole
+archive shares an enlarged time budget.
+
+Usage:
+    from src.extraction.budget import BudgetedExtractor
+    extractor = BudgetedExtractor()
+    try:
+        ordered, skipped = extractor.order(paths)
+        for path in ordered:
+            chunks = extractor.extract(path, max_pages=5, should_cancel=...)
+    finally:
+        extractor.close()
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+from datetime import datetime
+from multiprocessing.connection import Client
+
+from src.extraction.text_extractor import RICH_TEXT_TYPES, extract_chunks, file_extension
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
+
+
+DEFAULT_TIME_BUDGET_SECONDS = 15.0
+DEFAULT_MAX_FILE_MB = 50
+DEFAULT_QUARANTINE_POLICY = "defer"     # "defer" | "skip"
+
+# Extracted text sent back from the sandbox is capped (characters)
+MAX_OUTPUT_CHARS = 2_000_000
+
+# An archive holds many documents, so it gets this many per-file time budgets
+ARCHIVE_BUDGET_MULTIPLIER = 4
+
+SANDBOX_MODULE = "src.extraction.sandbox_main"
+
+# The sandbox must report its address within this many seconds of launch
+SANDBOX_START_TIMEOUT = 30.0
+SANDBOX_AUTHKEY_ENV = "KEMASLAH_SANDBOX_AUTHKEY"
+
+# KemasLah_App, the directory `src` is imported from
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ExtractionError(Exception):
+    """The parser raised an exception for this file."""
+
+
+class ExtractionBudgetExceeded(ExtractionError):
+    """The file blew its time or byte budget."""
+
+
+class ExtractionTimeout(ExtractionBudgetExceeded):
+    pass
+
+
+class FileTooLarge(ExtractionBudgetExceeded):
+    pass
+
+
+class ExtractionCrashed(ExtractionError):
+    """The sandbox process died while parsing (segfault, OOM, ...)."""
+
+
+class FileQuarantined(ExtractionError):
+    """Skipped because an earlier run quarantined the file."""
+
+
+class SandboxUnavailable(ExtractionError):
+    """The parser process could not be started; says nothing about the file."""
+
+
+# ─── Budget configuration ─────────────────────────────────────────────────────
+
+class ExtractionBudget:
+    def __init__(
+        self,
+        time_budget_seconds: float = DEFAULT_TIME_BUDGET_SECONDS,
+        max_file_bytes: int = DEFAULT_MAX_FILE_MB * 1024 * 1024,
+        quarantine_policy: str = DEFAULT_QUARANTINE_POLICY,
+    ):
+        self.time_budget_seconds = time_budget_seconds
+        self.max_file_bytes = max_file_bytes
+        self.quarantine_policy = quarantine_policy if quarantine_policy in ("defer", "skip") else "defer"
+
+    @property
+    def slow_threshold_seconds(self) -> float:
+        """Successful extractions slower than this are kept for diagnostics."""
+        return self.time_budget_seconds / 4
+
+    @classmethod
+    def from_settings(cls) -> "ExtractionBudget":
+        """Reads the user's budget from QSettings (falls back to defaults)."""
+        try:
+            from PyQt6.QtCore import QSettings
+            s = QSettings("Kemaslah", "SmartFileManager")
+            return cls(
+                time_budget_seconds=s.value("extraction/time_budget_seconds", DEFAULT_TIME_BUDGET_SECONDS, float),
+                max_file_bytes=s.value("extraction/max_file_mb", DEFAULT_MAX_FILE_MB, int) * 1024 * 1024,
+                quarantine_policy=s.value("extraction/quarantine_policy", DEFAULT_QUARANTINE_POLICY, str),
+            )
+        except Exception:
+            return cls()
+
+
+# ─── Sandbox process ──────────────────────────────────────────────────────────
+
+class ExtractionSandbox:
+    """One long-lived parser process, restarted after it is killed."""
+
+    def __init__(self, poll_interval: float = 0.05):
+        self.poll_interval = poll_interval
+        self._proc = None
+        self._conn = None
+
+    def _alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _ensure_started(self):
+        if self._alive():
+            return
+        self.kill()
+        authkey = os.urandom(16)
+        env = dict(os.environ)
+        env[SANDBOX_AUTHKEY_ENV] = authkey.hex()
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (_APP_ROOT, env.get("PYTHONPATH")) if p)
+        self._proc = subprocess.Popen(
+            [sys.executable, "-m", SANDBOX_MODULE],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, env=env, cwd=_APP_ROOT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        # The child prints the address it listens on once its imports are done
+        address = self._read_address(SANDBOX_START_TIMEOUT)
+        if address is None:
+            self.kill()
+            raise SandboxUnavailable(f"parser process did not start within {SANDBOX_START_TIMEOUT:.0f}s")
+        self._proc.stdout.close()
+        if not address:
+            self.kill()
+            raise SandboxUnavailable("parser process failed to start")
+        try:
+            self._conn = Client(address, authkey=authkey)
+        except OSError as e:
+            self.kill()
+            raise SandboxUnavailable(f"could not connect to parser process: {e}")
+
+    def _read_address(self, timeout):
+        """The child's first stdout line, or None if it takes longer than `timeout`."""
+        # Pipes can't be polled with a timeout on Windows, so the blocking read gets
+        # its own thread; killing the child ends it with EOF
+        stdout, lines = self._proc.stdout, []
+        reader = threading.Thread(target=lambda: lines.append(stdout.readline()), daemon=True)
+        reader.start()
+        reader.join(timeout)
+        return lines[0].decode().strip() if lines else None
+
+    def run(self, filepath, ext, limits, timeout, should_cancel=None) -> list[str]:
+        self._ensure_started()
+        self._conn.send((filepath, ext, limits))
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.kill()
+                raise ExtractionTimeout(f"exceeded {timeout:.0f}s time budget")
+            if should_cancel is not None and should_cancel():
+                self.kill()
+                raise InterruptedError("Extraction cancelled.")
+
+            try:
+                ready = self._conn.poll(min(self.poll_interval, remaining))
+            except (EOFError, OSError):
+                ready = True
+
+            if ready:
+                try:
+                    status, payload = self._conn.recv()
+                except (EOFError, OSError):
+                    self.kill()
+                    raise ExtractionCrashed("parser process died")
+                if status == "ok":
+                    return payload
+                raise ExtractionError(payload)
+
+            if not self._alive():
+                code = self._proc.returncode
+                self.kill()
+                raise ExtractionCrashed(f"parser process exited with code {code}")
+
+    def kill(self):
+        if self._proc is not None:
+            try:
+                if self._alive():
+                    self._proc.kill()
+                self._proc.wait(1)
+            except Exception:
+                pass
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._proc = None
+        self._conn = None
+
+    def close(self):
+        if self._alive() and self._conn is not None:
+            try:
+                self._conn.send(None)
+                self._proc.wait(1)
+            except Exception:
+                pass
+        self.kill()
+
+
+# ─── Persistent quarantine list ───────────────────────────────────────────────
+
+_STORE_LOCK = threading.Lock()
+
+
+def _file_fingerprint(path):
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime
+    except OSError:
+        return None, None
+
+
+class ExtractionQuarantine:
+    """
+    JSON-backed record of problem files:
+
+        {"quarantined": {path: entry}, "slow": {path: entry}}
+
+    entry = {"reason", "detail", "elapsed", "size", "mtime", "count", "last_seen"}
+    """
+
+    FILE_NAME = "extraction_quarantine.json"
+    MAX_SLOW_ENTRIES = 50
+
+    def __init__(self, path: str | None = None):
+        self.path = path or app_data_path(self.FILE_NAME)
+        data = load_json(self.path, {})
+        self.quarantined: dict = data.get("quarantined", {})
+        self.slow: dict = data.get("slow", {})
+        self._touched = {"quarantined": set(), "slow": set()}
+        self._released: set = set()
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def is_quarantined(self, path: str) -> bool:
+        entry = self.quarantined.get(path)
+        # Plain parser errors were quarantined by earlier versions; no longer
+        if not entry or entry.get("reason") == "error":
+            return False
+        size, mtime = _file_fingerprint(path)
+        # A modified file gets another chance
+        return size == entry.get("size") and mtime == entry.get("mtime")
+
+    def order(self, paths, policy: str = DEFAULT_QUARANTINE_POLICY):
+        """Returns (paths_to_process, skipped). Quarantined files go last or are skipped."""
+        healthy, flagged = [], []
+        for p in paths:
+            (flagged if self.is_quarantined(p) else healthy).append(p)
+        if policy == "skip":
+            return healthy, flagged
+        return healthy + flagged, []
+
+    def slowest(self, limit: int = 20) -> list[dict]:
+        rows = []
+        for status, section in (("Quarantined", self.quarantined), ("Slow", self.slow)):
+            for path, entry in section.items():
+                rows.append({"path": path, "status": status, **entry})
+        rows.sort(key=lambda r: r.get("elapsed", 0), reverse=True)
+        return rows[:limit]
+
+    # ── updates ──────────────────────────────────────────────────────────────
+
+    def _entry(self, path, reason, elapsed, detail=""):
+        size, mtime = _file_fingerprint(path)
+        return {
+            "reason": reason,
+            "detail": detail,
+            "elapsed": round(elapsed, 3),
+            "size": size,
+            "mtime": mtime,
+            "count": 1,
+            "last_seen": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def record_failure(self, path, reason, elapsed, detail=""):
+        entry = self._entry(path, reason, elapsed, detail)
+        previous = self.quarantined.get(path)
+        if previous:
+            entry["count"] = previous.get("count", 1) + 1
+        self.quarantined[path] = entry
+        self._touched["quarantined"].add(path)
+        self._released.discard(path)
+
+    def record_timing(self, path, elapsed, slow_threshold):
+        if path in self.quarantined:
+            # It finished within budget this time — release it
+            del self.quarantined[path]
+            self._released.add(path)
+
+        if elapsed < slow_threshold:
+            return
+        self.slow[path] = self._entry(path, "slow", elapsed)
+        self._touched["slow"].add(path)
+
+    def clear(self):
+        with _STORE_LOCK:
+            self.quarantined.clear()
+            self.slow.clear()
+            self._touched = {"quarantined": set(), "slow": set()}
+            self._released.clear()
+            save_json_atomic(self.path, {"quarantined": {}, "slow": {}})
+
+    def save(self):
+        """Merges this run's changes into the on-disk list (other workers may have written too)."""
+        if not any(self._touched.values()) and not self._released:
+            return
+        with _STORE_LOCK:
+            disk = load_json(self.path, {})
+            merged = {
+                "quarantined": disk.get("quarantined", {}),
+                "slow": disk.get("slow", {}),
+            }
+            for section in ("quarantined", "slow"):
+                source = getattr(self, section)
+                for path in self._touched[section]:
+                    if path in source:
+                        merged[section][path] = source[path]
+            for path in self._released:
+                merged["quarantined"].pop(path, None)
+
+            slow_sorted = sorted(
+                merged["slow"].items(), key=lambda kv: kv[1].get("elapsed", 0), reverse=True
+            )
+            merged["slow"] = dict(slow_sorted[:self.MAX_SLOW_ENTRIES])
+
+            save_json_atomic(self.path, merged)
+            self.quarantined, self.slow = merged["quarantined"], merged["slow"]
+            self._touched = {"quarantined": set(), "slow": set()}
+            self._released.clear()
+
+
+# ─── Extractor used by the workers ────────────────────────────────────────────
+
+class BudgetedExtractor:
+    """
+    Budget-enforcing front end to extract_chunks(). One instance per worker
+    run; call close() when the run ends to stop the sandbox and persist the
+    quarantine list.
+    """
+
+    def __init__(self, budget: ExtractionBudget | None = None,
+                 quarantine: ExtractionQuarantine | None = None):
+        self.budget = budget or ExtractionBudget.from_settings()
+        self.quarantine = quarantine or ExtractionQuarantine()
+        self.sandbox = ExtractionSandbox()
+
+    def order(self, paths):
+        return self.quarantine.order(paths, self.budget.quarantine_policy)
+
+    def should_skip(self, path) -> bool:
+        return self.budget.quarantine_policy == "skip" and self.quarantine.is_quarantined(path)
+
+    def extract(self, filepath, ext=None, should_cancel=None, **limits) -> list[str]:
+        """
+        Same keyword limits as extract_chunks(). Raises an ExtractionError
+        subclass when the budget is blown or the parser crashes (after
+        quarantining the file), ExtractionError when the parser rejects the
+        file (not recorded: a broken file fails fast), and InterruptedError
+        when `should_cancel` fires.
+        """
+        if ext is None:
+            ext = file_extension(filepath)
+
+        if self.should_skip(filepath):
+            raise FileQuarantined("skipped (quarantined by an earlier run)")
+
+        start = time.perf_counter()
+
+        if ext not in RICH_TEXT_TYPES:
+            # Plain text: a bounded read can't stall, so keep it in-process
+            max_chars = limits.get("max_chars")
+            cap = self.budget.max_file_bytes
+            limits["max_chars"] = cap if max_chars is None else min(max_chars, cap)
+            chunks = extract_chunks(filepath, ext, should_cancel=should_cancel, **limits)
+            self.quarantine.record_timing(
+                filepath, time.perf_counter() - start, self.budget.slow_threshold_seconds
+            )
+            return chunks
+
+        size, _ = _file_fingerprint(filepath)
+        if size is not None and size > self.budget.max_file_bytes:
+            self.quarantine.record_failure(
+                filepath, "too_large", 0.0,
+                f"{size / (1024 * 1024):.0f} MB exceeds the "
+                f"{self.budget.max_file_bytes / (1024 * 1024):.0f} MB budget"
+            )
+            raise FileTooLarge("file exceeds the extraction size budget")
+
+        try:
+            chunks = self.sandbox.run(
+                filepath, ext, limits,
+                timeout=self.budget.time_budget_seconds,
+                should_cancel=should_cancel,
+            )
+        except InterruptedError:
+            raise
+        except ExtractionTimeout as e:
+            self.quarantine.record_failure(filepath, "timeout", time.perf_counter() - start, str(e))
+            raise
+        except ExtractionCrashed as e:
+            self.quarantine.record_failure(filepath, "crash", time.perf_counter() - start, str(e))
+            raise
+
+        self.quarantine.record_timing(
+            filepath, time.perf_counter() - start, self.budget.slow_threshold_seconds
+        )
+        return chunks
+
+    def extract_archive(self, archive_path, should_cancel=None, **limits) -> list[tuple[str, list[str]]]:
+        """
+        Reads a ZIP archive's members in the sandbox: [(member_name, chunks)].
+        Members above the per-file size cap are listed by name only.
+        """
+        if self.should_skip(archive_path):
+            raise FileQuarantined("skipped (quarantined by an earlier run)")
+
+        start = time.perf_counter()
+        limits["max_member_bytes"] = self.budget.max_file_bytes
+        try:
+            members = self.sandbox.run(
+                archive_path, 'zip', limits,
+                timeout=self.budget.time_budget_seconds * ARCHIVE_BUDGET_MULTIPLIER,
+                should_cancel=should_cancel,
+            )
+        except InterruptedError:
+            raise
+        except (ExtractionTimeout, ExtractionCrashed) as e:
+            reason = "timeout" if isinstance(e, ExtractionTimeout) else "crash"
+            self.quarantine.record_failure(archive_path, reason, time.perf_counter() - start, str(e))
+            raise
+
+        self.quarantine.record_timing(
+            archive_path, time.perf_counter() - start,
+            self.budget.slow_threshold_seconds * ARCHIVE_BUDGET_MULTIPLIER
+        )
+        return members
+
+    def close(self):
+        self.sandbox.close()
+        try:
+            self.quarantine.save()
+        except OSError as e:
+            print(f"Could not save extraction quarantine list: {e}")
@@ -0,0 +1,70 @@
+"""
+sandbox_main.py
+---------------
+Entry point of the extraction sandbox process (see budget.py).
+
+The sandbox used to be a multiprocessing "spawn" child. A spawned child
+re-imports the parent's __main__ — main.py, and with it PyQt6, the Flask
+auth server, the torch classifier and every view — so each search or
+organise run, and every restart after a timeout kill, paid seconds of start
+up and hundreds of MB of memory. ExtractionSandbox now starts
+
+    python -m src.extraction.sandbox_main
+
+which imports only the extractors. The child listens on a private local
+socket (a named pipe on Windows), prints its address on stdout and serves
+one connection: one (filepath, ext, limits) request at a time, answered
+with ("ok", chunks) or ("error", message). The connection's auth key comes
+from the KEMASLAH_SANDBOX_AUTHKEY environment variable.
+
+Usage:
+    (started by ExtractionSandbox; not run by hand)
+"""
+
+import os
+import sys
+from multiprocessing.connection import Listener
+
+from src.extraction.budget import MAX_OUTPUT_CHARS, SANDBOX_AUTHKEY_ENV
+from src.extraction.text_extractor import extract_chunks, extract_zip_members
+
+
+def serve(conn):
+    """Parse one file per request, reply with chunks, until the parent hangs up."""
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        filepath, ext, limits = request
+        try:
+            if ext == 'zip':
+                conn.send(("ok", extract_zip_members(filepath, max_output_chars=MAX_OUTPUT_CHARS, **limits)))
+                continue
+            chunks = extract_chunks(filepath, ext, **limits)
+            total = 0
+            for i, chunk in enumerate(chunks):
+                total += len(chunk)
+                if total > MAX_OUTPUT_CHARS:
+                    chunks = chunks[:i]
+                    break
+            conn.send(("ok", chunks))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+def main():
+    authkey = bytes.fromhex(os.environ.pop(SANDBOX_AUTHKEY_ENV))
+    with Listener(authkey=authkey) as listener:
+        print(listener.address, flush=True)
+        # Parsers may print; the parent stops reading stdout after the address
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        with listener.accept() as conn:
+            serve(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+text_extractor.py
+-----------------
+Shared document text extraction used by Deep Search, Smart Search and
+Smart Organise.
+
+Text comes back as a list of chunks in document order — one per PDF page,
+DOCX paragraph, spreadsheet row or slide shape — so callers can weight the
+first page, stop early, or feed chunks to a matcher one at a time.
+
+This module has no Qt dependency: it also runs inside the extraction
+sandbox process (see budget.py).
+
+ZIP archives are read member by member straight from the central directory
+into memory (extract_zip_members) — nothing is ever unpacked to disk.
+"""
+
+import io
+import os
+import zipfile
+
+
+RICH_TEXT_TYPES = {'pdf', 'docx', 'xlsx', 'xls', 'pptx'}
+
+PLAIN_TEXT_TYPES = {
+    'txt', 'md', 'csv', 'py', 'json', 'rtf', 'xml',
+    'html', 'htm', 'yaml', 'yml', 'toml', 'ini', 'log'
+}
+
+SUPPORTED_TEXT_TYPES = RICH_TEXT_TYPES | PLAIN_TEXT_TYPES
+
+UNSUPPORTED_TYPES = {
+    'zip', 'rar', '7z', 'tar', 'gz',
+    'exe', 'dll', 'bin', 'iso', 'dmg',
+    'db', 'sqlite', 'pkl', 'pyc'
+}
+
+
+def file_extension(path: str) -> str:
+    name = os.path.basename(path).lower()
+    return name.split('.')[-1] if '.' in name else ''
+
+
+def extract_chunks(
+    filepath,
+    ext: str | None = None,
+    max_pages: int | None = None,
+    max_paragraphs: int | None = None,
+    max_rows: int | None = None,
+    max_chars: int | None = None,
+    should_cancel=None,
+) -> list[str]:
+    """
+    Reads the text of one document.
+
+    Parameters
+    ----------
+    filepath : a path, or a binary file-like object (e.g. an archive member
+        held in a BytesIO) — `ext` is required for the latter
+    max_pages, max_paragraphs, max_rows : optional caps for PDF pages,
+        DOCX paragraphs and rows per spreadsheet sheet (None = no cap)
+    max_chars : characters read from plain-text formats (None = whole file)
+    should_cancel : optional callable polled between chunks; extraction
+        stops early (returning what was read so far) when it returns True
+
+    Raises whatever the underlying parser raises; callers decide whether a
+    failure means "unsupported" or "quarantine".
+    """
+    if ext is None:
+        ext = file_extension(filepath)
+    in_memory = not isinstance(filepath, (str, os.PathLike))
+
+    def cancelled():
+        return should_cancel is not None and should_cancel()
+
+    chunks: list[str] = []
+
+    if ext == 'pdf':
+        import PyPDF2
+        # PdfReader takes either a path or a binary stream
+        reader = PyPDF2.PdfReader(filepath)
+        n_pages = len(reader.pages)
+        if max_pages is not None:
+            n_pages = min(max_pages, n_pages)
+        for i in range(n_pages):
+            if cancelled():
+                break
+            chunks.append(reader.pages[i].extract_text() or "")
+
+    elif ext == 'docx':
+        import docx
+        doc = docx.Document(filepath)
+        paragraphs = doc.paragraphs if max_paragraphs is None else doc.paragraphs[:max_paragraphs]
+        for para in paragraphs:
+            if cancelled():
+                break
+            chunks.append(para.text)
+
+    elif ext in ('xlsx', 'xls'):
+        import openpyxl
+        wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            for sheet in wb.worksheets:
+                for row in sheet.iter_rows(max_row=max_rows, values_only=True):
+                    if cancelled():
+                        return chunks
+                    chunks.append(" ".join(str(c) for c in row if c is not None))
+        finally:
+            wb.close()
+
+    elif ext == 'pptx':
+        from pptx import Presentation as PptxPresentation
+        prs = PptxPresentation(filepath)
+        for slide in prs.slides:
+            for shape in slide.shapes:
+                if cancelled():
+                    return chunks
+                if hasattr(shape, "text"):
+                    chunks.append(shape.text)
+
+    elif in_memory:
+        raw = filepath.read(max_chars) if max_chars is not None else filepath.read()
+        chunks.append(raw.decode('utf-8', errors='ignore'))
+
+    else:
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            chunks.append(f.read(max_chars) if max_chars is not None else f.read())
+
+    return chunks
+
+
+def extract_zip_members(
+    archive_path: str,
+    max_member_bytes: int | None = None,
+    max_output_chars: int | None = None,
+    should_cancel=None,
+    **limits,
+) -> list[tuple[str, list[str]]]:
+    """
+    Reads every member of a ZIP archive without unpacking it to disk.
+
+    Returns [(member_name, chunks)] for each file entry. Members whose type
+    isn't readable, that are larger than `max_member_bytes`, or that fail to
+    parse come back with no chunks so their names are still searchable.
+    Nested archives are not opened.
+    """
+    members = []
+    total_chars = 0
+
+    with zipfile.ZipFile(archive_path) as zf:
+        for info in zf.infolist():
+            if should_cancel is not None and should_cancel():
+                break
+            if info.is_dir():
+                continue
+
+            ext = file_extension(info.filename)
+            chunks: list[str] = []
+            readable = (
+                ext in SUPPORTED_TEXT_TYPES
+                and not info.flag_bits & 0x1      # encrypted
+                and (max_member_bytes is None or info.file_size <= max_member_bytes)
+                and (max_output_chars is None or total_chars < max_output_chars)
+            )
+            if readable:
+                try:
+                    data = zf.read(info)
+                    chunks = extract_chunks(io.BytesIO(data), ext, should_cancel=should_cancel, **limits)
+                except Exception:
+                    chunks = []
+                total_chars += sum(len(c) for c in chunks)
+
+            members.append((info.filename, chunks))
+
+    return members
@@ -0,0 +1,318 @@
+"""
+token_pipeline.py
+-----------------
+Tokenisation for Smart Organise, producing weighted token streams instead
+of padded strings.
+
+read_ultimate_precision_content used to return one big string: the cleaned
+file name repeated 20×, the first PDF page repeated 10×, then the whole
+text after several uncompiled regex passes and a per-word stemming re.sub.
+The vectorizer then re-tokenised all of it. Now a document is a short list
+of (tokens, weight) segments:
+
+    • file name tokens          — weight NAME_WEIGHT (20)
+    • first page (PDF) tokens   — weight FIRST_PAGE_WEIGHT (10)
+    • body tokens               — weight 1
+
+Stemming, academic-noise and stop-word removal happen once, in a single
+compiled-regex pass, and WeightedTfidfVectorizer builds the n-gram term
+counts straight from the segments (n-grams never cross a segment boundary).
+
+For pools too large to keep every document in memory (hundreds of
+thousands of files), StreamingTfidfVectorizer is fed documents in chunks and
+keeps only a hashed, per-document-capped float32 count matrix; the
+vocabulary rules and TF-IDF weighting are applied once at the end.
+
+Usage:
+    from src.extraction.token_pipeline import OrganiseDocument, WeightedTfidfVectorizer
+    doc = OrganiseDocument()
+    doc.add_name("Invoice_March-2024.pdf", weight=20)
+    doc.add_text(page_text, weight=1)
+    X = WeightedTfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True).fit_transform([doc, ...])
+
+    streaming = StreamingTfidfVectorizer(ngram_range=(1, 2), max_features=3000)
+    for chunk in chunks_of_documents:
+        streaming.partial_fit(chunk)
+    X = streaming.finish()
+"""
+
+import re
+import heapq
+
+import numpy as np
+from scipy import sparse
+
+
+NAME_WEIGHT = 20
+FIRST_PAGE_WEIGHT = 10
+FIRST_PAGE_CHARS = 2000
+
+# Folder profiles stop growing past this many tokens (was an 80,000-char cap)
+MAX_PROFILE_TOKENS = 12000
+
+WORD_RE = re.compile(r'\b[a-z]{3,15}\b')
+NAME_SPLIT_RE = re.compile(r'[^a-z]+')
+STEM_SUFFIX_RE = re.compile(r'(ing|tion|ment|ies|s)$')
+
+ACADEMIC_NOISE = frozenset({
+    'chapter', 'page', 'university', 'note', 'lecture', 'assignment', 'pdf',
+    'introduction', 'case', 'study', 'faculty', 'tarc', 'student', 'course',
+    'module', 'www', 'http', 'com', 'appendix', 'reference', 'conclusion',
+    'objective', 'assessment', 'rubric', 'tutorial', 'practical', 'guideline',
+    'data', 'result', 'table',
+})
+
+_STOP_WORDS = None
+
+
+def stop_words() -> frozenset:
+    """sklearn's English stop list (imported lazily, like the rest of sklearn here)."""
+    global _STOP_WORDS
+    if _STOP_WORDS is None:
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        _STOP_WORDS = frozenset(ENGLISH_STOP_WORDS)
+    return _STOP_WORDS
+
+
+def name_tokens(file_name: str) -> list[str]:
+    """Letters-only words of a file or folder name (no stemming, as before)."""
+    stops = stop_words()
+    return [w for w in NAME_SPLIT_RE.split(file_name.lower()) if len(w) >= 2 and w not in stops]
+
+
+def content_tokens(text: str):
+    """Yields stemmed content words, with academic noise and stop words removed."""
+    stops = stop_words()
+    strip_suffix = STEM_SUFFIX_RE.sub
+    for match in WORD_RE.finditer(text.lower()):
+        word = strip_suffix('', match.group())
+        if len(word) >= 2 and word not in ACADEMIC_NOISE and word not in stops:
+            yield word
+
+
+class OrganiseDocument:
+    """A file (or folder profile) as weighted token segments."""
+
+    __slots__ = ("segments", "token_count")
+
+    def __init__(self):
+        self.segments: list[tuple[tuple, int]] = []
+        self.token_count = 0
+
+    def __bool__(self):
+        return self.token_count > 0
+
+    def add_tokens(self, tokens, weight: int = 1):
+        tokens = tuple(tokens)
+        if tokens and weight > 0:
+            self.segments.append((tokens, weight))
+            self.token_count += len(tokens)
+        return self
+
+    def add_name(self, name: str, weight: int = NAME_WEIGHT):
+        return self.add_tokens(name_tokens(name), weight)
+
+    def add_text(self, text: str, weight: int = 1):
+        return self.add_tokens(content_tokens(text), weight)
+
+    def extend(self, other: "OrganiseDocument"):
+        """Appends another document's segments (folder profiles)."""
+        self.segments.extend(other.segments)
+        self.token_count += other.token_count
+        return self
+
+    def to_record(self) -> list:
+        """JSON-friendly [[space-joined tokens, weight], ...] (folder profile store)."""
+        return [[" ".join(tokens), weight] for tokens, weight in self.segments]
+
+    @classmethod
+    def from_record(cls, record) -> "OrganiseDocument":
+        doc = cls()
+        for text, weight in record:
+            doc.add_tokens(text.split(), weight)
+        return doc
+
+    def term_counts(self, ngram_range=(1, 1)) -> dict:
+        """{n-gram: weighted count}, n-grams built within each segment."""
+        lo, hi = ngram_range
+        counts: dict[str, int] = {}
+        get = counts.get
+        for tokens, weight in self.segments:
+            for n in range(lo, hi + 1):
+                if n == 1:
+                    for t in tokens:
+                        counts[t] = get(t, 0) + weight
+                    continue
+                for i in range(len(tokens) - n + 1):
+                    gram = " ".join(tokens[i:i + n])
+                    counts[gram] = get(gram, 0) + weight
+        return counts
+
+
+class WeightedTfidfVectorizer:
+    """
+    TfidfVectorizer's vocabulary rules (min_df, max_df, max_features, sorted
+    feature names) and weighting (smooth IDF, optional sublinear TF, L2 norm)
+    applied to OrganiseDocument inputs.
+    """
+
+    def __init__(self, ngram_range=(1, 1), max_features=None, min_df=1, max_df=1.0, sublinear_tf=False):
+        self.ngram_range = ngram_range
+        self.max_features = max_features
+        self.min_df = min_df
+        self.max_df = max_df
+        self.sublinear_tf = sublinear_tf
+        self.vocabulary_: dict[str, int] = {}
+        self._transformer = None
+
+    def _count_matrix(self, per_doc_counts, vocabulary):
+        indptr, indices, values = [0], [], []
+        for counts in per_doc_counts:
+            for term, count in counts.items():
+                col = vocabulary.get(term)
+                if col is not None:
+                    indices.append(col)
+                    values.append(count)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(per_doc_counts), len(vocabulary)),
+        )
+
+    def fit_transform(self, docs):
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        n_docs = len(docs)
+        per_doc = [doc.term_counts(self.ngram_range) for doc in docs]
+        df, total = {}, {}
+        for counts in per_doc:
+            for term, count in counts.items():
+                df[term] = df.get(term, 0) + 1
+                total[term] = total.get(term, 0) + count
+
+        max_doc_count = self.max_df if isinstance(self.max_df, int) else self.max_df * n_docs
+        min_doc_count = self.min_df if isinstance(self.min_df, int) else self.min_df * n_docs
+        terms = [t for t, d in df.items() if min_doc_count <= d <= max_doc_count]
+        if not terms:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+        if self.max_features is not None and len(terms) > self.max_features:
+            terms.sort(key=lambda t: total[t], reverse=True)
+            terms = terms[:self.max_features]
+
+        self.vocabulary_ = {t: i for i, t in enumerate(sorted(terms))}
+        X = self._count_matrix(per_doc, self.vocabulary_)
+
+        self._transformer = TfidfTransformer(sublinear_tf=self.sublinear_tf)
+        return self._transformer.fit_transform(X)
+
+    def transform(self, docs):
+        per_doc = [doc.term_counts(self.ngram_range) for doc in docs]
+        return self._transformer.transform(self._count_matrix(per_doc, self.vocabulary_))
+
+    def get_feature_names_out(self):
+        names = np.empty(len(self.vocabulary_), dtype=object)
+        for term, col in self.vocabulary_.items():
+            names[col] = term
+        return names
+
+
+class StreamingTfidfVectorizer:
+    """
+    Out-of-core counterpart of WeightedTfidfVectorizer for very large pools.
+
+    Documents arrive in chunks (partial_fit) and are dropped as soon as their
+    term counts are hashed into n_features buckets; each document keeps only
+    its max_terms_per_doc heaviest terms, so memory grows by a bounded number
+    of float32 entries per file. finish() applies min_df / max_df /
+    max_features to the buckets, then smooth IDF, optional sublinear TF and
+    L2 normalisation, chunk by chunk. Each bucket is named after the first
+    term hashed into it (collisions are rare at 2^18 buckets).
+    """
+
+    def __init__(self, ngram_range=(1, 1), max_features=None, min_df=1, max_df=1.0, sublinear_tf=False,
+                 n_features=2 ** 18, max_terms_per_doc=128):
+        self.ngram_range = ngram_range
+        self.max_features = max_features
+        self.min_df = min_df
+        self.max_df = max_df
+        self.sublinear_tf = sublinear_tf
+        self.n_features = n_features
+        self.max_terms_per_doc = max_terms_per_doc
+        self._blocks = []
+        self._names: dict[int, str] = {}
+        self._feature_names = None
+        self.n_docs = 0
+
+    def partial_fit(self, docs):
+        """Hashes a chunk of OrganiseDocuments into the count matrix."""
+        indptr, indices, values = [0], [], []
+        n_features, cap, names = self.n_features, self.max_terms_per_doc, self._names
+        for doc in docs:
+            counts = doc.term_counts(self.ngram_range)
+            if cap and len(counts) > cap:
+                counts = dict(heapq.nlargest(cap, counts.items(), key=lambda kv: kv[1]))
+            buckets: dict[int, float] = {}
+            for term, count in counts.items():
+                bucket = hash(term) % n_features
+                if bucket not in names:
+                    names[bucket] = term
+                buckets[bucket] = buckets.get(bucket, 0) + count
+            indices.extend(buckets.keys())
+            values.extend(buckets.values())
+            indptr.append(len(indices))
+        self._blocks.append(sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float32), np.asarray(indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, n_features),
+        ))
+        self.n_docs += len(indptr) - 1
+        return self
+
+    def finish(self):
+        """The L2-normalised TF-IDF matrix (float32) of every document seen."""
+        if not self.n_docs:
+            raise ValueError("no documents were added")
+        n_docs = self.n_docs
+        df = np.zeros(self.n_features, dtype=np.int64)
+        total = np.zeros(self.n_features, dtype=np.float64)
+        for block in self._blocks:
+            df += np.bincount(block.indices, minlength=self.n_features)
+            total += np.bincount(block.indices, weights=block.data, minlength=self.n_features)
+
+        max_doc_count = self.max_df if isinstance(self.max_df, int) else self.max_df * n_docs
+        min_doc_count = self.min_df if isinstance(self.min_df, int) else self.min_df * n_docs
+        kept = np.flatnonzero((df >= max(min_doc_count, 1)) & (df <= max_doc_count))
+        if not len(kept):
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+        if self.max_features is not None and len(kept) > self.max_features:
+            kept = kept[np.argsort(total[kept])[::-1][:self.max_features]]
+        # Columns ordered by term, like the exact vectorizer's sorted vocabulary
+        kept = np.asarray(sorted(kept, key=lambda b: self._names[b]), dtype=np.int64)
+
+        column = np.full(self.n_features, -1, dtype=np.int64)
+        column[kept] = np.arange(len(kept))
+        idf = (np.log((1 + n_docs) / (1 + df[kept])) + 1).astype(np.float32)
+
+        from sklearn.preprocessing import normalize
+        rows = []
+        while self._blocks:
+            block = self._blocks.pop(0)
+            cols = column[block.indices]
+            keep = cols >= 0
+            row_of = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))[keep]
+            data = block.data[keep]
+            if self.sublinear_tf:
+                data = np.log(data) + 1
+            cols = cols[keep]
+            weighted = sparse.csr_matrix(
+                (data * idf[cols], (row_of, cols)), shape=(block.shape[0], len(kept)), dtype=np.float32
+            )
+            rows.append(normalize(weighted))
+        self._feature_names = np.array([self._names[b] for b in kept], dtype=object)
+        self._names = {}
+        return sparse.vstack(rows, format="csr")
+
+    def get_feature_names_out(self):
+        return self._feature_names
+
@@ -0,0 +1,577 @@
+"""
+catalogue.py
+------------
+Persistent SQLite catalogue of file metadata under the home folder, shared
+by the Statistics, Smart Archive, Home and file browser views.
+
+Each view used to rediscover the disk on its own — the Statistics scans,
+ArchiveScannerWorker's walk of every safe folder, HomeView's Recent/Favorites
+listings and FileTableWidget.load_files. They now share one table, filled by
+a single background crawler (CatalogueWorker):
+
+    files(path, parent, name, is_dir, size, mtime, atime, ext, category)
+    dirs(path, mtime)                 — directory mtime at its last listing
+    dir_summary(path, parent, min_mtime, max_mtime, size, files)
+                                      — every file below a directory, rolled up
+
+with indexes on mtime, ext and parent, so the views ask SQL aggregates
+("bytes older than 180 days", "files per category under Documents") and
+never walk.
+
+dir_summary is aggregated bottom-up: a directory's row combines its own
+files with its subdirectories' rows. Whether a folder holds a file modified
+in a date range is then read off its row — no file in it when the range
+misses [min_mtime, max_mtime], certainly one when either bound falls inside
+the range — and only the remaining case descends, through child summaries.
+
+refresh() is incremental. A quick refresh re-lists only directories whose
+mtime moved (entries added, removed or renamed) and descends into known
+subfolders otherwise; a full refresh (once per session) re-stats every
+directory's entries to pick up files edited in place, listing directories
+in parallel with the shared crawler. Only rows that actually changed are
+written. The file browser keeps listing folders live
+(it must show them as they are now) and hands each listing to
+queue_listing(); a background writer thread feeds it to record_listing(),
+which keeps the catalogue fresh between crawls without the UI thread ever
+stat'ing entries or writing to SQLite.
+`generation` is bumped whenever a refresh finds entries added, removed or
+modified, so a cached aggregate can tell whether it is still current.
+After each write only the directories whose listing changed, and their
+ancestors, have their summary rows recomputed.
+
+The database lives in ~/.kemaslah/catalogue.sqlite3 (WAL mode, one
+connection per thread, so the views can read while the crawler writes).
+
+Usage:
+    from src.filesystem.catalogue import MetadataCatalogue
+    catalogue = MetadataCatalogue.shared()
+    catalogue.refresh(full=True)                        # background thread
+    if catalogue.ready:
+        stats = catalogue.home_stats()                  # same shape as scan_home()
+        rows = catalogue.list_dir("C:/Users/me/Documents")  # None when stale
+        catalogue.has_modified_between("C:/Users/me/Documents/Taxes", start_ts, end_ts)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from src.utils.app_data import app_data_path
+from src.filesystem.crawler import skip_dir, walk_entries
+from src.filesystem.home_scan import (
+    HomeStats, CATEGORY_BY_EXT, LOCATION_FOLDERS, ARCHIVE_AGE_DAYS, library_roots
+)
+
+
+DB_NAME = "catalogue.sqlite3"
+
+# Directories listed per transaction while crawling
+COMMIT_EVERY = 200
+
+# Sorts after every character, so [prefix, prefix + _MAX_CHAR) is "under prefix"
+_MAX_CHAR = "\U0010ffff"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    parent   TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    is_dir   INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime    REAL NOT NULL,
+    atime    REAL NOT NULL,
+    ext      TEXT NOT NULL,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files(parent);
+CREATE INDEX IF NOT EXISTS files_mtime ON files(mtime);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+CREATE INDEX IF NOT EXISTS files_size ON files(size);
+CREATE TABLE IF NOT EXISTS dirs (
+    path  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dir_summary (
+    path      TEXT PRIMARY KEY,
+    parent    TEXT NOT NULL,
+    min_mtime REAL,
+    max_mtime REAL,
+    size      INTEGER NOT NULL,
+    files     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dir_summary_parent ON dir_summary(parent);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _under(column, folders):
+    """SQL clause + params selecting rows whose `column` lies below any of `folders`."""
+    clauses, params = [], []
+    for folder in folders:
+        prefix = os.path.join(folder, "")
+        clauses.append(f"({column} >= ? AND {column} < ?)")
+        params.extend((prefix, prefix + _MAX_CHAR))
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def _row(entry, parent, is_dir, st):
+    name = entry.name
+    ext = "" if is_dir else os.path.splitext(name)[1].lower()
+    size = 0 if is_dir else st.st_size
+    return (entry.path, parent, name, int(is_dir), size, st.st_mtime, st.st_atime, ext,
+            None if is_dir else CATEGORY_BY_EXT.get(ext))
+
+
+class MetadataCatalogue:
+    """SQLite-backed metadata for every file under the home folder."""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "MetadataCatalogue":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self, home=None, path=None):
+        self.home = os.path.normpath(home or os.path.expanduser("~"))
+        self.path = path or app_data_path(DB_NAME)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.refreshed = False          # True after one full refresh this session
+        self._content_changed = False
+        self._dirty = set()             # directories whose summary must be recomputed
+        self._queued = {}               # folder → newest listing waiting for the writer
+        self._queue_lock = threading.Lock()
+        self._writer = None
+
+        conn = self._conn()
+        with conn:
+            conn.executescript(SCHEMA)
+            stored_home = self._meta(conn, "home")
+            if stored_home is not None and os.path.normcase(stored_home) != os.path.normcase(self.home):
+                conn.execute("DELETE FROM files")
+                conn.execute("DELETE FROM dirs")
+                conn.execute("DELETE FROM dir_summary")
+                conn.execute("DELETE FROM meta")
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('home', ?)", (self.home,))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _meta(conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def ready(self) -> bool:
+        """Usable for queries: a crawl has completed at least once (this or an earlier session)."""
+        return self._meta(self._conn(), "crawled_at") is not None
+
+    @property
+    def crawled_at(self) -> float | None:
+        value = self._meta(self._conn(), "crawled_at")
+        return float(value) if value is not None else None
+
+    @property
+    def full_refresh_started(self) -> float | None:
+        """Start of the last completed full refresh: files edited in place before it are accounted for."""
+        value = self._meta(self._conn(), "full_refresh_started")
+        return float(value) if value is not None else None
+
+    @property
+    def summarised(self) -> bool:
+        """dir_summary has been built (by a refresh) and is kept current."""
+        return self._meta(self._conn(), "summarised") is not None
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    # ── crawling ─────────────────────────────────────────────────────────────
+
+    def _refresh_dir(self, conn, folder, full):
+        """Brings one directory's rows up to date; returns its subdirectories."""
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            return []
+
+        known = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                "SELECT path, is_dir, size, mtime, atime FROM files WHERE parent = ?", (folder,)
+            )
+        }
+        stored = conn.execute("SELECT mtime FROM dirs WHERE path = ?", (folder,)).fetchone()
+        if not full and stored is not None and stored[0] == mtime:
+            return [path for path, (is_dir, *_) in known.items() if is_dir]
+
+        try:
+            with os.scandir(folder) as it:
+                current = self._rows(folder, it)
+        except OSError:
+            return []
+        self._apply_listing(conn, folder, mtime, current, known)
+        return [path for path, row in current.items() if row[3]]
+
+    @staticmethod
+    def _rows(folder, entries) -> dict:
+        current = {}
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+                if is_dir and (entry.is_symlink() or skip_dir(entry.name)):
+                    continue
+                # DirEntry.stat() is served from the listing on Windows
+                current[entry.path] = _row(entry, folder, is_dir, entry.stat())
+            except OSError:
+                continue
+        return current
+
+    def _apply_listing(self, conn, folder, mtime, current, known):
+        """Writes the rows of one directory listing that differ from the catalogue."""
+        gone = [path for path in known if path not in current]
+        for path in gone:
+            self._drop(conn, path, known[path][0])
+
+        changed = [
+            row for path, row in current.items()
+            if known.get(path) != (row[3], row[4], row[5], row[6])
+        ]
+        if changed:
+            conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", changed)
+        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (folder, mtime))
+        # Access times alone don't change any aggregate, so they don't bump the generation
+        if gone or any(known.get(row[0], (None,) * 3)[:3] != (row[3], row[4], row[5]) for row in changed):
+            self._content_changed = True
+            self._dirty.add(folder)
+
+    def _begin_write(self, conn, backfill=True):
+        self._content_changed = False
+        self._dirty = set()
+        # Catalogues crawled before dir_summary existed get every summary built once, by a refresh
+        if backfill and self._meta(conn, "summarised") is None:
+            self._dirty.update(row[0] for row in conn.execute("SELECT path FROM dirs"))
+
+    def _end_write(self, conn, summaries=True):
+        if summaries:
+            self._update_summaries(conn)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('summarised', '1')")
+        else:
+            self._dirty = set()
+        self._bump_generation(conn)
+
+    def _update_summaries(self, conn):
+        """Recomputes the dirty directories' summary rows and their ancestors', deepest first."""
+        home_prefix = os.path.join(self.home, "")
+        pending = set()
+        for folder in self._dirty:
+            while folder not in pending and (folder == self.home or folder.startswith(home_prefix)):
+                pending.add(folder)
+                folder = os.path.dirname(folder)
+        self._dirty = set()
+
+        for folder in sorted(pending, key=lambda path: path.count(os.sep), reverse=True):
+            if conn.execute("SELECT 1 FROM dirs WHERE path = ?", (folder,)).fetchone() is None:
+                continue        # dropped since, or never listed
+            own = conn.execute(
+                "SELECT MIN(mtime), MAX(mtime), COALESCE(SUM(size), 0), COUNT(*) "
+                "FROM files WHERE parent = ? AND is_dir = 0", (folder,)
+            ).fetchone()
+            sub = conn.execute(
+                "SELECT MIN(min_mtime), MAX(max_mtime), COALESCE(SUM(size), 0), COALESCE(SUM(files), 0) "
+                "FROM dir_summary WHERE parent = ?", (folder,)
+            ).fetchone()
+            lows = [m for m in (own[0], sub[0]) if m is not None]
+            highs = [m for m in (own[1], sub[1]) if m is not None]
+            conn.execute(
+                "INSERT OR REPLACE INTO dir_summary VALUES (?, ?, ?, ?, ?, ?)",
+                (folder, os.path.dirname(folder), min(lows, default=None), max(highs, default=None),
+                 own[2] + sub[2], own[3] + sub[3]),
+            )
+
+    def _bump_generation(self, conn):
+        if self._content_changed:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (str(self._generation(conn) + 1),)
+            )
+            self._content_changed = False
+
+    @classmethod
+    def _generation(cls, conn) -> int:
+        value = cls._meta(conn, "generation")
+        return int(value) if value is not None else 0
+
+    @property
+    def generation(self) -> int:
+        """Bumped whenever a refresh finds added, removed, resized or modified entries."""
+        return self._generation(self._conn())
+
+    def _drop(self, conn, path, is_dir):
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        if is_dir:
+            clause, params = _under("path", [path])
+            conn.execute(f"DELETE FROM files WHERE {clause}", params)
+            conn.execute(f"DELETE FROM dirs WHERE path = ? OR {clause}", [path] + params)
+            conn.execute(f"DELETE FROM dir_summary WHERE path = ? OR {clause}", [path] + params)
+
+    def refresh(self, full=False, should_cancel=None, blocking=True) -> int | None:
+        """
+        Re-syncs the catalogue with the disk; returns the number of directories
+        visited. A cancelled crawl keeps what it wrote but is not marked complete.
+        With blocking=False, returns None at once if another refresh is running.
+        """
+        conn = self._conn()
+        visited = 0
+        started = time.time()
+        if not self._write_lock.acquire(blocking=blocking):
+            return None
+        try:
+            self._begin_write(conn)
+            try:
+                if full:
+                    # Every directory is re-listed: the parallel crawler lists, this thread writes
+                    for dirpath, dirs, files in walk_entries([self.home], should_cancel=should_cancel):
+                        self._refresh_listing(conn, dirpath, dirs + files)
+                        visited += 1
+                        if visited % COMMIT_EVERY == 0:
+                            conn.commit()
+                    if should_cancel is not None and should_cancel():
+                        return visited
+                else:
+                    stack = [self.home]
+                    while stack:
+                        if should_cancel is not None and should_cancel():
+                            return visited
+                        stack.extend(self._refresh_dir(conn, stack.pop(), full))
+                        visited += 1
+                        if visited % COMMIT_EVERY == 0:
+                            conn.commit()
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('crawled_at', ?)", (str(time.time()),))
+                if full:
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('full_refresh_started', ?)", (str(started),))
+            finally:
+                self._end_write(conn)
+                conn.commit()
+        finally:
+            self._write_lock.release()
+        if full:
+            self.refreshed = True
+        return visited
+
+    def _refresh_listing(self, conn, folder, entries):
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            return
+        known = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                "SELECT path, is_dir, size, mtime, atime FROM files WHERE parent = ?", (folder,)
+            )
+        }
+        self._apply_listing(conn, folder, mtime, self._rows(folder, entries), known)
+
+    def queue_listing(self, folder, entries):
+        """
+        record_listing() on a background writer thread, for listings made on
+        the UI thread. While the writer is busy only the newest listing of
+        each folder is kept.
+        """
+        with self._queue_lock:
+            self._queued[os.path.normpath(folder)] = entries
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._drain_listings, daemon=True, name="catalogue-writer")
+                self._writer.start()
+
+    def _drain_listings(self):
+        while True:
+            with self._queue_lock:
+                if not self._queued:
+                    self._writer = None
+                    return
+                folder = next(iter(self._queued))
+                entries = self._queued.pop(folder)
+            self.record_listing(folder, entries)
+
+    def record_listing(self, folder, entries) -> bool:
+        """
+        Feeds a directory listing a view has just made (DirEntry objects) into
+        the catalogue. Skipped while the crawler is writing (it re-lists
+        everything anyway). Summaries are only maintained here once a refresh
+        has built them.
+        """
+        folder = os.path.normpath(folder)
+        if folder != self.home and not folder.startswith(os.path.join(self.home, "")):
+            return False
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        try:
+            conn = self._conn()
+            with conn:
+                self._begin_write(conn, backfill=False)
+                self._refresh_listing(conn, folder, entries)
+                self._end_write(conn, summaries=self.summarised)
+            return True
+        except (OSError, sqlite3.Error) as e:
+            print(f"Could not update file catalogue: {e}")
+            return False
+        finally:
+            self._write_lock.release()
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def home_stats(self, roots=None, cutoff=None) -> HomeStats:
+        """The Statistics dashboard numbers (see home_scan.scan_home) from SQL aggregates."""
+        conn = self._conn()
+        if roots is None:
+            roots = library_roots(self.home) or [self.home]
+        if cutoff is None:
+            cutoff = time.time() - ARCHIVE_AGE_DAYS * 86400
+        stats = HomeStats()
+
+        clause, params = _under("path", roots)
+        for category, count, size in conn.execute(
+            f"SELECT category, COUNT(*), SUM(size) FROM files WHERE is_dir = 0 AND {clause} GROUP BY category",
+            params,
+        ):
+            stats.total_size += size or 0
+            if category is not None:
+                stats.type_counts[category] = count
+
+        for label, folder in LOCATION_FOLDERS.items():
+            clause, params = _under("path", [os.path.join(self.home, folder)])
+            stats.location_counts[label] = conn.execute(
+                f"SELECT COUNT(*) FROM files WHERE is_dir = 0 AND {clause}", params
+            ).fetchone()[0]
+
+        stats.files_scanned, stats.archivable_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(CASE WHEN mtime < ? THEN size END), 0) FROM files WHERE is_dir = 0",
+            (cutoff,),
+        ).fetchone()
+        return stats
+
+    def modified_between(self, start_ts, end_ts, under):
+        """Paths of files below any of `under` last modified within [start_ts, end_ts]."""
+        clause, params = _under("path", under)
+        return [
+            row[0] for row in self._conn().execute(
+                f"SELECT path FROM files WHERE is_dir = 0 AND mtime BETWEEN ? AND ? AND {clause}",
+                [start_ts, end_ts] + params,
+            )
+        ]
+
+    def same_size_files(self, roots, min_size=1):
+        """
+        (files below `roots`, paths of those files whose size at least one other
+        file below `roots` shares): the size stage of the duplicate finder.
+        """
+        clause, params = _under("path", roots)
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM files WHERE is_dir = 0 AND {clause}", params).fetchone()[0]
+        paths = [
+            row[0] for row in conn.execute(
+                f"""WITH sized AS (SELECT path, size FROM files WHERE is_dir = 0 AND size >= ? AND {clause})
+                    SELECT path FROM sized WHERE size IN
+                        (SELECT size FROM sized GROUP BY size HAVING COUNT(*) > 1)""",
+                [min_size] + params,
+            )
+        ]
+        return total, paths
+
+    def summary(self, folder):
+        """(min_mtime, max_mtime, size, files) for everything below `folder`, or None if unknown."""
+        row = self._conn().execute(
+            "SELECT min_mtime, max_mtime, size, files FROM dir_summary WHERE path = ?",
+            (os.path.normpath(folder),),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def has_modified_between(self, folder, start_ts, end_ts) -> bool:
+        """True when some file below `folder` was last modified within [start_ts, end_ts]."""
+        conn = self._conn()
+        stack = [os.path.normpath(folder)]
+        while stack:
+            folder = stack.pop()
+            row = conn.execute(
+                "SELECT min_mtime, max_mtime FROM dir_summary WHERE path = ? AND files > 0", (folder,)
+            ).fetchone()
+            if row is None or row[1] < start_ts or row[0] > end_ts:
+                continue
+            if start_ts <= row[0] or row[1] <= end_ts:
+                return True
+            # The range lies strictly between the oldest and newest file: look one level down
+            if conn.execute(
+                "SELECT 1 FROM files WHERE parent = ? AND is_dir = 0 AND mtime BETWEEN ? AND ? LIMIT 1",
+                (folder, start_ts, end_ts),
+            ).fetchone():
+                return True
+            stack.extend(
+                path for (path,) in conn.execute(
+                    "SELECT path FROM dir_summary WHERE parent = ? AND files > 0 "
+                    "AND min_mtime <= ? AND max_mtime >= ?",
+                    (folder, end_ts, start_ts),
+                )
+            )
+        return False
+
+    def children_modified_between(self, folder, start_ts, end_ts):
+        """
+        Paths of the direct children of `folder` that are files modified within
+        [start_ts, end_ts] or directories holding one (decided from dir_summary).
+        """
+        folder = os.path.normpath(folder)
+        conn = self._conn()
+        matched = []
+        for path, is_dir, mtime in conn.execute(
+            "SELECT path, is_dir, mtime FROM files WHERE parent = ?", (folder,)
+        ).fetchall():
+            if is_dir:
+                if self.has_modified_between(path, start_ts, end_ts):
+                    matched.append(path)
+            elif start_ts <= mtime <= end_ts:
+                matched.append(path)
+        return matched
+
+    def is_fresh(self, folder) -> bool:
+        """True when `folder` has not gained, lost or renamed entries since it was last listed."""
+        folder = os.path.normpath(folder)
+        row = self._conn().execute("SELECT mtime FROM dirs WHERE path = ?", (folder,)).fetchone()
+        if row is None:
+            return False
+        try:
+            return os.stat(folder).st_mtime == row[0]
+        except OSError:
+            return False
+
+    def list_dir(self, folder, files_only=False, newest_first=False, limit=None):
+        """
+        [(name, path, is_dir, size, mtime)] for one directory, or None when the
+        catalogue has not listed it or it changed since (callers then scandir).
+        """
+        folder = os.path.normpath(folder)
+        if not self.is_fresh(folder):
+            return None
+        sql = "SELECT name, path, is_dir, size, mtime FROM files WHERE parent = ?"
+        if files_only:
+            sql += " AND is_dir = 0"
+        sql += " ORDER BY mtime DESC" if newest_first else " ORDER BY is_dir DESC, name COLLATE NOCASE"
+        params = [folder]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [(name, path, bool(is_dir), size, mtime)
+                for name, path, is_dir, size, mtime in self._conn().execute(sql, params)]
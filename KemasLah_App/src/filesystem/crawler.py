@@ -0,0 +1,214 @@
+"""
+crawler.py
+----------
+Parallel directory crawler shared by the scanners (Statistics, Smart Search,
+Deep Search, Smart Archive, CNN folder classification).
+
+Every scanner used to walk with os.walk / Path.rglob on one thread. On SMB
+and NFS mounts, and on spinning disks, each scandir is a round trip that
+stalls the whole crawl. Here directories are listed by a bounded pool of
+threads (scandir releases the GIL while it waits on the disk):
+
+    • each worker owns a deque of directories to list; it pushes the
+      subfolders it finds onto its own deque and pops from the same end
+      (depth-first, so a subtree stays on one thread)
+    • an idle worker steals from the opposite end of another worker's
+      deque — the shallowest, largest pending subtrees
+    • listings flow to the caller through a bounded queue, so a slow
+      consumer throttles the crawl instead of buffering the whole tree
+
+Skip rules (by default skip_dir: the Windows system folders in SKIP_DIRS
+and $-prefixed names), a depth limit, a file limit and should_cancel are
+honoured; closing the generator early (break) stops the workers.
+Directories arrive in no particular order. Symlinked folders are reported
+but not descended, as with os.walk.
+
+Usage:
+    from src.filesystem.crawler import walk, iter_files
+    for dirpath, dirnames, filenames in walk(root):         # os.walk-shaped
+        ...
+    for entry in iter_files([root], max_files=10_000):      # os.DirEntry per file
+        entry.stat().st_size
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+
+
+DEFAULT_WORKERS = 8
+
+# Never crawled into (plus any $-prefixed name such as $Recycle.Bin)
+SKIP_DIRS = {
+    'Windows', 'Program Files', 'Program Files (x86)',
+    'ProgramData', 'Recovery', 'System Volume Information'
+}
+
+# Directory listings buffered between the workers and the consumer
+OUTPUT_QUEUE_SIZE = 256
+
+# How often blocked threads re-check for cancellation (seconds)
+POLL_INTERVAL = 0.05
+
+_DONE = object()
+
+
+def skip_dir(name) -> bool:
+    return name.startswith('$') or name in SKIP_DIRS
+
+
+class _ParallelWalk:
+    """Work-stealing pool of scandir workers feeding one output queue."""
+
+    def __init__(self, roots, workers, skip, max_depth):
+        self.workers = max(1, workers)
+        self.skip = skip
+        self.max_depth = max_depth
+        self.deques = [deque() for _ in range(self.workers)]
+        self.out = queue.Queue(maxsize=OUTPUT_QUEUE_SIZE)
+        self.stopped = threading.Event()
+        self.cond = threading.Condition()
+        self.pending = 0            # directories queued or being listed
+        self.running = self.workers
+        for i, root in enumerate(roots):
+            self.deques[i % self.workers].append((root, 0))
+            self.pending += 1
+        self.threads = [
+            threading.Thread(target=self._work, args=(i,), daemon=True, name=f"crawler-{i}")
+            for i in range(self.workers)
+        ]
+
+    def start(self):
+        for t in self.threads:
+            t.start()
+
+    def stop(self):
+        self.stopped.set()
+        with self.cond:
+            self.cond.notify_all()
+
+    def _take(self, me):
+        try:
+            return self.deques[me].pop()
+        except IndexError:
+            pass
+        for k in range(1, self.workers):
+            try:
+                return self.deques[(me + k) % self.workers].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.out.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _list(self, dirpath, depth):
+        dirs, files = [], []
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if self.skip is None or not self.skip(entry.name):
+                                dirs.append(entry)
+                        else:
+                            files.append(entry)
+                    except OSError:
+                        continue
+        except OSError:
+            return None, []
+        subdirs = []
+        if self.max_depth is None or depth < self.max_depth:
+            for d in dirs:
+                try:
+                    if not d.is_symlink():
+                        subdirs.append((d.path, depth + 1))
+                except OSError:
+                    continue
+        return (dirpath, dirs, files), subdirs
+
+    def _work(self, me):
+        try:
+            while not self.stopped.is_set():
+                task = self._take(me)
+                if task is None:
+                    with self.cond:
+                        if self.pending == 0:
+                            return
+                        self.cond.wait(POLL_INTERVAL)
+                    continue
+
+                try:
+                    listing, subdirs = self._list(*task)
+                    if subdirs:
+                        # Counted before they become stealable, so pending never dips to 0 early
+                        with self.cond:
+                            self.pending += len(subdirs)
+                            self.deques[me].extend(subdirs)
+                            self.cond.notify_all()
+                    if listing is not None:
+                        self._put(listing)
+                except Exception as e:
+                    # One bad directory must not stall the crawl
+                    print(f"Crawler skipped {task[0]}: {e}")
+                finally:
+                    with self.cond:
+                        self.pending -= 1
+                        if self.pending == 0:
+                            self.cond.notify_all()
+        finally:
+            with self.cond:
+                self.running -= 1
+                last = self.running == 0
+            if last:
+                self._put(_DONE)
+
+
+def walk_entries(roots, workers=DEFAULT_WORKERS, skip=skip_dir, max_depth=None,
+                 max_files=None, should_cancel=None):
+    """
+    Yields (dirpath, dir_entries, file_entries) for every directory under
+    `roots` (os.DirEntry lists, so stat() results are reused). Stops quietly
+    on should_cancel() or once `max_files` files have been yielded.
+    """
+    if isinstance(roots, (str, os.PathLike)):
+        roots = [roots]
+    walker = _ParallelWalk([os.fspath(r) for r in roots], workers, skip, max_depth)
+    walker.start()
+    seen = 0
+    try:
+        while True:
+            if should_cancel is not None and should_cancel():
+                return
+            try:
+                item = walker.out.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            dirpath, dirs, files = item
+            if max_files is not None and seen + len(files) >= max_files:
+                yield dirpath, dirs, files[:max_files - seen]
+                return
+            seen += len(files)
+            yield item
+    finally:
+        walker.stop()
+
+
+def walk(root, skip=skip_dir, **options):
+    """os.walk-shaped (dirpath, dirnames, filenames) tuples, crawled in parallel."""
+    for dirpath, dirs, files in walk_entries([root], skip=skip, **options):
+        yield dirpath, [d.name for d in dirs], [f.name for f in files]
+
+
+def iter_files(roots, **options):
+    """os.DirEntry for every file under `roots`."""
+    for _, _, files in walk_entries(roots, **options):
+        yield from files
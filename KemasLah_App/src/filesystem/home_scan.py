@@ -0,0 +1,140 @@
+"""
+home_scan.py
+------------
+One-pass filesystem scan behind the Statistics dashboard.
+
+The dashboard used to walk the disk three times per refresh:
+
+    • scan_pc_files        — the library folders, plus an os.path.getsize
+                             stat per file
+    • scan_location_files  — Documents, Pictures and Videos again
+    • get_archivable_size  — the whole home directory, with separate
+                             getmtime and getsize stats per file
+
+scan_home() walks the home directory once (with the parallel crawler in
+crawler.py) and stats each file once through DirEntry.stat() (free on
+Windows, where the directory listing already carries size and times). Each
+directory is tagged with the library root and location folder it belongs
+to, so type counts, location counts, library size and archivable bytes all
+come out of the same pass.
+
+Usage:
+    from src.filesystem.home_scan import scan_home
+    stats = scan_home()
+    stats.type_counts, stats.location_counts, stats.total_size, stats.archivable_bytes
+"""
+
+import os
+import time
+
+from src.filesystem.crawler import walk_entries
+
+
+ARCHIVE_AGE_DAYS = 180
+
+LIBRARY_FOLDERS = ("Desktop", "Documents", "Downloads", "Pictures", "Videos")
+
+LOCATION_FOLDERS = {
+    "Documents Folder": "Documents",
+    "Pictures Folder": "Pictures",
+    "Video Folder": "Videos",
+}
+
+TEXT_EXTS = {
+    '.doc', '.docx', '.odt', '.rtf', '.txt', '.pdf', '.md', '.csv',
+    '.xlsx', '.xls', '.pptx', '.ppt', '.json', '.xml', '.yaml',
+    '.yml', '.log', '.ini', '.toml'
+}
+IMAGE_VIDEO = {
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.svg', '.ico',
+    '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm',
+    '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma'
+}
+DEV_CODE = {
+    '.html', '.htm', '.css', '.js', '.ts', '.py', '.java', '.c', '.cpp',
+    '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.sh', '.bat'
+}
+ARCHIVE_INST = {
+    '.zip', '.rar', '.7z', '.tar', '.gz', '.exe', '.msi', '.dmg', '.iso', '.dll', '.bin'
+}
+
+TYPE_CATEGORIES = (
+    ("Text-Based files", TEXT_EXTS),
+    ("Image & Video files", IMAGE_VIDEO),
+    ("Developer & Code files", DEV_CODE),
+    ("Archives & Installers", ARCHIVE_INST),
+)
+
+# Extension → dashboard category, one dict lookup per file
+CATEGORY_BY_EXT = {ext: label for label, exts in TYPE_CATEGORIES for ext in exts}
+
+
+def library_roots(home=None) -> list[str]:
+    home = home or os.path.expanduser("~")
+    folders = [os.path.join(home, name) for name in LIBRARY_FOLDERS]
+    return [folder for folder in folders if os.path.exists(folder)]
+
+
+class HomeStats:
+    __slots__ = ("type_counts", "location_counts", "total_size", "archivable_bytes", "files_scanned")
+
+    def __init__(self):
+        self.type_counts = {label: 0 for label, _ in TYPE_CATEGORIES}
+        self.location_counts = {label: 0 for label in LOCATION_FOLDERS}
+        self.total_size = 0
+        self.archivable_bytes = 0
+        self.files_scanned = 0
+
+
+def scan_home(home=None, roots=None, cutoff=None, should_cancel=None) -> HomeStats:
+    """
+    Walks `home` once. Type counts and total size cover `roots` (the library
+    folders, or the whole home directory when none exist); location counts
+    cover Documents/Pictures/Videos; archivable bytes cover every file under
+    home last modified before `cutoff` (a timestamp, default 180 days ago).
+    """
+    home = os.path.normpath(home or os.path.expanduser("~"))
+    if roots is None:
+        roots = library_roots(home) or [home]
+    if cutoff is None:
+        cutoff = time.time() - ARCHIVE_AGE_DAYS * 86400
+
+    library = {os.path.normpath(r) for r in roots}
+    locations = {os.path.normpath(os.path.join(home, folder)): label for label, folder in LOCATION_FOLDERS.items()}
+
+    stats = HomeStats()
+    type_counts, location_counts = stats.type_counts, stats.location_counts
+    splitext = os.path.splitext
+
+    # Directories arrive from the crawler in any order, so each is tagged from its own path
+    def tag(dirpath):
+        in_library = any(dirpath == r or dirpath.startswith(os.path.join(r, "")) for r in library)
+        location = next(
+            (label for folder, label in locations.items()
+             if dirpath == folder or dirpath.startswith(os.path.join(folder, ""))),
+            None,
+        )
+        return in_library, location
+
+    for dirpath, _, files in walk_entries([home], should_cancel=should_cancel):
+        in_library, location = tag(dirpath)
+        for entry in files:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+
+            stats.files_scanned += 1
+            if st.st_mtime < cutoff:
+                stats.archivable_bytes += st.st_size
+            if location is not None:
+                location_counts[location] += 1
+            if in_library:
+                stats.total_size += st.st_size
+                label = CATEGORY_BY_EXT.get(splitext(entry.name)[1].lower())
+                if label is not None:
+                    type_counts[label] += 1
+
+    if should_cancel is not None and should_cancel():
+        raise InterruptedError("Statistics scan cancelled.")
+    return stats
@@ -5,10 +5,20 @@ import shutil
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, 
                              QPushButton, QDialog, QLabel, QDateEdit, QComboBox,
                              QMessageBox, QTreeWidget, QTreeWidgetItem, 
-                             QHeaderView, QSizePolicy, QApplication)
+                             QHeaderView, QSizePolicy)
 from PyQt6.QtCore import Qt, QDate, QThread, pyqtSignal, QDir
 from ..widgets.file_table import FileTableWidget
 from ..widgets.loading_overlay import LoadingOverlay # NEW: Import the Loading Overlay
+from src.organise.move_engine import MoveEngine, MoveJournal
+from src.filesystem.catalogue import MetadataCatalogue
+from src.filesystem.crawler import iter_files
+
+
+# Directory summaries are trusted only this soon after a completed crawl (the
+# file manager re-crawls every 10 minutes); older than that, the scan walks
+CATALOGUE_MAX_AGE = 15 * 60
+
+ARCHIVE_BASE = os.path.join(QDir.homePath(), "Documents", "Kemaslah_Archive")
 
 
 # ─── 1. DATE SELECTION DIALOG ──────────────────────────────────────────────
@@ -374,9 +384,62 @@ class ArchiveScannerWorker(QThread):
             os.path.join(home, "Music"), os.path.join(home, "Desktop")
         ]
 
+    def _in_range(self, entry):
+        try:
+            return self.start_ts <= entry.stat().st_mtime <= self.end_ts
+        except OSError:
+            return False
+
+    def _unit_matches(self, path, is_dir):
+        """True when the file, or any file under the folder, was modified in range (checked on disk)"""
+        if not is_dir:
+            try:
+                return self.start_ts <= os.stat(path).st_mtime <= self.end_ts
+            except OSError:
+                return False
+        # Parallel crawl, abandoned at the first file in range
+        for file_entry in iter_files([path], skip=None, should_cancel=lambda: not self.is_running):
+            if self._in_range(file_entry):
+                return True
+        return False
+
+    def _catalogue_usable(self, catalogue):
+        crawled_at = catalogue.crawled_at
+        return (catalogue.summarised and crawled_at is not None
+                and time.time() - crawled_at <= CATALOGUE_MAX_AGE)
+
+    def _units_from_catalogue(self, catalogue):
+        """
+        Top-level items of the safe folders holding a file modified in range.
+        Directory summaries pick the candidates; each candidate is then confirmed
+        on disk, since files edited in place since the last full crawl still carry
+        their old mtime in the catalogue and every candidate is about to be moved.
+        """
+        units = set()
+        for folder in self.safe_folders:
+            if not self.is_running:
+                break
+            if os.path.exists(folder):
+                units.update(catalogue.children_modified_between(folder, self.start_ts, self.end_ts))
+
+        confirmed = set()
+        for unit in units:
+            if not self.is_running:
+                break
+            if "Kemaslah_Archive" in os.path.basename(unit):
+                continue
+            if self._unit_matches(unit, os.path.isdir(unit)):
+                confirmed.add(unit)
+        return confirmed
+
     def run(self):
         matched_units = set() 
         try:
+            catalogue = MetadataCatalogue.shared()
+            if self._catalogue_usable(catalogue):
+                matched_units = self._units_from_catalogue(catalogue)
+                return
+
             for safe_folder in self.safe_folders:
                 if not os.path.exists(safe_folder): continue
 
@@ -387,26 +450,11 @@ class ArchiveScannerWorker(QThread):
                     entry_path = entry.path
 
                     if entry.is_file():
-                        try:
-                            if self.start_ts <= entry.stat().st_mtime <= self.end_ts:
-                                matched_units.add(entry_path)
-                        except: pass
+                        if self._in_range(entry):
+                            matched_units.add(entry_path)
                     
                     elif entry.is_dir():
-                        folder_matches = False
-                        for root, dirs, files in os.walk(entry_path):
-                            if not self.is_running: break
-                            for file in files:
-                                try:
-                                    full_path = os.path.join(root, file)
-                                    stat_info = os.stat(full_path)
-                                    if self.start_ts <= stat_info.st_mtime <= self.end_ts:
-                                        folder_matches = True
-                                        break 
-                                except: pass
-                            if folder_matches: break
-                            
-                        if folder_matches:
+                        if self._unit_matches(entry_path, True):
                             matched_units.add(entry_path)
 
         except Exception as e:
@@ -418,11 +466,65 @@ class ArchiveScannerWorker(QThread):
         self.is_running = False
 
 
+class ArchiveWorker(QThread):
+    """Moves the selected items into a staging folder and zips them, off the UI thread"""
+    progress = pyqtSignal(str)
+    compressing = pyqtSignal(int)       # items moved into the staging folder
+    finished = pyqtSignal(int, str)     # items archived, zip path
+    error = pyqtSignal(str, str)        # title, message
+
+    def __init__(self, selected_items):
+        super().__init__()
+        self.selected_items = selected_items
+
+    def run(self):
+        try:
+            today_str = datetime.date.today().strftime("%Y-%m-%d")
+            temp_archive_dir = os.path.join(ARCHIVE_BASE, f"Temp_Archive_{today_str}")
+            os.makedirs(temp_archive_dir, exist_ok=True)
+
+            final_zip_name = os.path.join(ARCHIVE_BASE, f"Archive_{today_str}")
+            counter = 1
+            while os.path.exists(f"{final_zip_name}.zip"):
+                final_zip_name = os.path.join(ARCHIVE_BASE, f"Archive_{today_str}_{counter}")
+                counter += 1
+
+            # Journaled, so the run shows up in Undo History (and survives a crash)
+            journal = MoveJournal(kind="archive", label=f"{final_zip_name}.zip")
+        except Exception as e:
+            self.error.emit("Archiving Error", f"Could not prepare the archive: {e}")
+            return
+
+        try:
+            try:
+                with MoveEngine(journal, progress=self.progress.emit) as engine:
+                    new_paths = engine.move_files([(path, temp_archive_dir) for path in self.selected_items])
+            except Exception as e:
+                self.error.emit("Archiving Error", f"Failed to move items into the archive: {e}")
+                return
+            moved_count = sum(1 for p in new_paths if p is not None)
+
+            self.compressing.emit(moved_count)
+            try:
+                shutil.make_archive(final_zip_name, 'zip', temp_archive_dir)
+                journal.record("archive", sync=True, zip=f"{final_zip_name}.zip", staging=temp_archive_dir)
+                shutil.rmtree(temp_archive_dir)
+            except Exception as e:
+                self.error.emit("Compression Error", f"Failed to compress archive: {e}")
+                return
+            self.finished.emit(moved_count, f"{final_zip_name}.zip")
+        finally:
+            journal.close()
+
+
 # ─── 4. MAIN ARCHIVE VIEW ──────────────────────────────────────────────────
 class ArchiveView(QWidget):
-    def __init__(self):
+    def __init__(self, moves_busy=None):
         super().__init__()
         self.scanner_worker = None
+        self.archive_worker = None
+        # Returns True while another run (organise apply, undo, archive) is moving files
+        self.moves_busy = moves_busy
         self.init_ui()
         
     def init_ui(self):
@@ -442,9 +544,8 @@ class ArchiveView(QWidget):
         layout.addWidget(self.file_table)
 
         # Automatically load and display the Kemaslah_Archive folder
-        archive_base = os.path.join(QDir.homePath(), "Documents", "Kemaslah_Archive")
-        os.makedirs(archive_base, exist_ok=True) 
-        self.file_table.load_files(archive_base)
+        os.makedirs(ARCHIVE_BASE, exist_ok=True) 
+        self.file_table.load_files(ARCHIVE_BASE)
 
     def resizeEvent(self, event):
         """Ensure the overlay resizes to cover the view properly."""
@@ -478,8 +579,7 @@ class ArchiveView(QWidget):
         if not matched_units:
             QMessageBox.information(self, "Scan Complete", "No items found in this date range.")
             
-            archive_base = os.path.join(QDir.homePath(), "Documents", "Kemaslah_Archive")
-            self.file_table.load_files(archive_base)
+            self.file_table.load_files(ARCHIVE_BASE)
             self.info_lbl.setText("  Viewing: Kemaslah Archives | Use the '⚙ Smart Archive' button above to archive old files.")
             return
             
@@ -492,62 +592,42 @@ class ArchiveView(QWidget):
         if not selected_items:
             QMessageBox.warning(self, "No Selection", "Please select files or folders to archive.")
             return
-            
-        today_str = datetime.date.today().strftime("%Y-%m-%d")
-        archive_base = os.path.join(QDir.homePath(), "Documents", "Kemaslah_Archive")
-        
-        temp_archive_dir = os.path.join(archive_base, f"Temp_Archive_{today_str}")
-        os.makedirs(temp_archive_dir, exist_ok=True)
-        
-        final_zip_name = os.path.join(archive_base, f"Archive_{today_str}")
-        
-        counter = 1
-        while os.path.exists(f"{final_zip_name}.zip"):
-            final_zip_name = os.path.join(archive_base, f"Archive_{today_str}_{counter}")
-            counter += 1
-        
-        moved_count = 0
-        
+        if self.moves_busy is not None and self.moves_busy():
+            QMessageBox.information(self, "Smart Archive", "Please wait for the organise, undo or archive in progress to finish.")
+            return
+
         # Show custom loading overlay for the gathering/moving process
         self.loading_overlay.show_message("Preparing Archive", "Gathering files for compression...", "📦")
-        QApplication.processEvents() # Force UI to update immediately
-        
-        for i, path in enumerate(selected_items):
-            if os.path.exists(path):
-                try:
-                    item_name = os.path.basename(path)
-                    dest_path = os.path.join(temp_archive_dir, item_name)
-                    
-                    base, ext = os.path.splitext(item_name)
-                    item_counter = 1
-                    while os.path.exists(dest_path):
-                        dest_path = os.path.join(temp_archive_dir, f"{base}_copy{item_counter}{ext}")
-                        item_counter += 1
-                        
-                    shutil.move(path, dest_path) 
-                    moved_count += 1
-                except Exception as e:
-                    print(f"Failed to move {path}: {e}")
-            
-            # Update the overlay message so the user sees progress
-            self.loading_overlay.update_message("Preparing Archive", f"Moved item {i + 1} of {len(selected_items)}...")
-            QApplication.processEvents() 
-            
+
+        self.archive_worker = ArchiveWorker(selected_items)
+        # Update the overlay message so the user sees progress
+        self.archive_worker.progress.connect(lambda message: self.loading_overlay.update_message("Preparing Archive", message))
+        self.archive_worker.compressing.connect(self._on_archive_compressing)
+        self.archive_worker.finished.connect(self._on_archiving_finished)
+        self.archive_worker.error.connect(self._on_archiving_error)
+        self.archive_worker.start()
+
+    def _on_archive_compressing(self, moved_count):
         # Update overlay for the final zipping process
         self.loading_overlay.show_message("Compressing Archive", f"Zipping {moved_count} items into a single file... This may take a minute.", "🗜️")
-        QApplication.processEvents()
-        
-        try:
-            shutil.make_archive(final_zip_name, 'zip', temp_archive_dir)
-            shutil.rmtree(temp_archive_dir)
-            
-            self.loading_overlay.hide() # Hide when totally done
-            
-            QMessageBox.information(self, "Archiving Complete", 
-                                    f"Successfully archived and compressed {moved_count} items into:\n{final_zip_name}.zip")
-        except Exception as e:
-            self.loading_overlay.hide()
-            QMessageBox.critical(self, "Compression Error", f"Failed to compress archive: {e}")
-            
-        self.file_table.load_files(archive_base)
-        self.info_lbl.setText(f"  Viewing: Kemaslah Archives")
\ No newline at end of file
+
+    def _on_archiving_finished(self, moved_count, zip_path):
+        self.loading_overlay.hide() # Hide when totally done
+        QMessageBox.information(self, "Archiving Complete", 
+                                f"Successfully archived and compressed {moved_count} items into:\n{zip_path}")
+        self._show_archives()
+
+    def _on_archiving_error(self, title, message):
+        self.loading_overlay.hide()
+        QMessageBox.critical(self, title, message)
+        self._show_archives()
+
+    def _show_archives(self):
+        self.archive_worker = None
+        self.file_table.load_files(ARCHIVE_BASE)
+        self.info_lbl.setText(f"  Viewing: Kemaslah Archives")
+
+    def wait_for_archiving(self):
+        """Blocks until a running archive job is done (moves are not interrupted halfway)"""
+        if self.archive_worker and self.archive_worker.isRunning():
+            self.archive_worker.wait()
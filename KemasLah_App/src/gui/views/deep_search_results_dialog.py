@@ -0,0 +1,119 @@
+import os
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+    QListWidget, QListWidgetItem, QPushButton
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from src.search.archive_index import split_archive_path, describe_path
+
+
+class DeepSearchResultsDialog(QDialog):
+    """Non-modal results list for recursive Deep Search, filled in as files are ranked"""
+    load_more_requested = pyqtSignal()
+    folder_requested = pyqtSignal(str)
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, query, root_path, page_size=20, parent=None):
+        super().__init__(parent)
+        self.query = query
+        self.page_size = page_size
+        self.visible_count = page_size
+        self.results = []
+        self.is_final = False
+
+        self.setWindowTitle("Deep Search (All Subfolders)")
+        self.resize(700, 520)
+        self.setStyleSheet("""
+            QDialog { background-color: #0F172A; color: #F1F5F9; }
+            QLabel { color: #F1F5F9; }
+            QListWidget {
+                background-color: #1E293B; color: #E2E8F0;
+                border: 1px solid #273549; border-radius: 8px; font-size: 12px;
+            }
+            QListWidget::item { padding: 8px; border-bottom: 1px solid #273549; }
+            QListWidget::item:selected { background-color: #2563EB; color: white; }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        title = QLabel(f"<b>Best matches for '{query}'</b> in {os.path.basename(root_path) or root_path} "
+                       "and all subfolders (ranked by BM25)")
+        title.setWordWrap(True)
+        layout.addWidget(title)
+
+        self.status_lbl = QLabel("Searching...")
+        self.status_lbl.setStyleSheet("color: #94A3B8; font-size: 11px;")
+        layout.addWidget(self.status_lbl)
+
+        self.list_widget = QListWidget()
+        self.list_widget.itemDoubleClicked.connect(self._on_item_double_clicked)
+        layout.addWidget(self.list_widget, 1)
+
+        btn_row = QHBoxLayout()
+        hint = QLabel("Double-click a result to open its folder.")
+        hint.setStyleSheet("color: #64748B; font-size: 11px;")
+        btn_row.addWidget(hint)
+        btn_row.addStretch()
+
+        self.stop_btn = QPushButton("Stop")
+        self.stop_btn.clicked.connect(self.cancel_requested.emit)
+        btn_row.addWidget(self.stop_btn)
+
+        self.more_btn = QPushButton("Load More")
+        self.more_btn.setEnabled(False)
+        self.more_btn.clicked.connect(self._on_load_more)
+        btn_row.addWidget(self.more_btn)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        btn_row.addWidget(close_btn)
+        layout.addLayout(btn_row)
+
+    def set_status(self, message):
+        self.status_lbl.setText(message)
+
+    def update_results(self, results, is_final):
+        """results: ranked [(path, score)], best first"""
+        self.results = results
+        self.is_final = is_final
+        self._render()
+
+        if is_final:
+            self.stop_btn.setEnabled(False)
+            self.set_status(f"Done — {len(results)} matching file(s).")
+
+    def mark_cancelled(self):
+        self.stop_btn.setEnabled(False)
+        self.set_status("Search stopped.")
+
+    def _render(self):
+        self.list_widget.clear()
+        shown = self.results[:self.visible_count]
+        best = shown[0][1] if shown and shown[0][1] > 0 else 1.0
+
+        for rank, (path, score) in enumerate(shown, start=1):
+            text = (
+                f"{rank}. 📄 {describe_path(path)}    •  Relevance: {score / best:.0%}\n"
+                f"     {os.path.dirname(path)}"
+            )
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            item.setToolTip(path)
+            self.list_widget.addItem(item)
+
+        has_more = len(self.results) > self.visible_count or not self.is_final
+        self.more_btn.setEnabled(has_more and bool(self.results))
+
+    def _on_load_more(self):
+        self.visible_count += self.page_size
+        if self.is_final:
+            self._render()
+        else:
+            self.load_more_requested.emit()
+
+    def _on_item_double_clicked(self, item):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        if path:
+            archive, _ = split_archive_path(path) if not os.path.exists(path) else (None, None)
+            self.folder_requested.emit(os.path.dirname(archive or path))
@@ -7,6 +7,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt6.QtGui import QColor
 from PyQt6.QtCore import Qt, pyqtSignal
 from auth.authentication_page import translate_text # NEW: Import translation
+from src.filesystem.catalogue import MetadataCatalogue
 
 # Import your custom widgets
 from ..widgets.stat_card import StatCard
@@ -181,19 +182,21 @@ class HomeView(QWidget):
             return []
 
         try:
-            with os.scandir(folder_path) as entries:
-                # Sort by Date Modified (Newest first)
-                sorted_entries = sorted(
-                    [e for e in entries if e.is_file()],
-                    key=lambda e: e.stat().st_mtime,
-                    reverse=True
-                )
-                
-            if limit:
-                sorted_entries = sorted_entries[:limit]
+            # Newest first: straight from the metadata catalogue while the folder is unchanged
+            rows = MetadataCatalogue.shared().list_dir(folder_path, files_only=True, newest_first=True, limit=limit)
+            if rows is not None:
+                sorted_entries = [(name, path, mtime) for name, path, _, _, mtime in rows]
+            else:
+                with os.scandir(folder_path) as entries:
+                    sorted_entries = sorted(
+                        [(e.name, e.path, e.stat().st_mtime) for e in entries if e.is_file()],
+                        key=lambda e: e[2],
+                        reverse=True
+                    )
+                if limit:
+                    sorted_entries = sorted_entries[:limit]
 
-            for entry in sorted_entries:
-                name = entry.name
+            for name, path, mtime in sorted_entries:
                 # Remove .lnk extension for display
                 if name.lower().endswith('.lnk'):
                     name = name[:-4]
@@ -201,14 +204,14 @@ class HomeView(QWidget):
                 # Filter out system files
                 if name.lower() in ["desktop.ini", "thumbs.db"]: continue
 
-                dt = datetime.datetime.fromtimestamp(entry.stat().st_mtime)
+                dt = datetime.datetime.fromtimestamp(mtime)
                 date_str = dt.strftime("%d/%m %H:%M")
                 
                 ext = "File"
                 if '.' in name:
                     ext = name.split('.')[-1].upper()
                 
-                files_data.append((name, date_str, ext, entry.path))
+                files_data.append((name, date_str, ext, path))
                 
         except Exception as e:
             print(f"Error scanning {folder_path}: {e}")
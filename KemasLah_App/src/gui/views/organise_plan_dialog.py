@@ -0,0 +1,118 @@
+import os
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+    QListWidget, QListWidgetItem, QPushButton, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt
+
+from src.organise.plan import OrganisePlan
+
+
+class OrganisePlanDialog(QDialog):
+    """Preview of a Smart Organise plan; unticked steps are left out when it is applied"""
+
+    def __init__(self, plan: OrganisePlan, cached=False, parent=None):
+        super().__init__(parent)
+        self.plan = plan
+
+        self.setWindowTitle("Smart Organise — Preview")
+        self.resize(760, 560)
+        self.setStyleSheet("""
+            QDialog { background-color: #0F172A; color: #F1F5F9; }
+            QLabel { color: #F1F5F9; }
+            QListWidget {
+                background-color: #1E293B; color: #E2E8F0;
+                border: 1px solid #273549; border-radius: 8px; font-size: 12px;
+            }
+            QListWidget::item { padding: 8px; border-bottom: 1px solid #273549; }
+            QListWidget::item:selected { background-color: #1D4ED8; color: white; }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        title = QLabel(f"<b>{len(plan.steps)} planned move(s)</b> — nothing has been moved yet")
+        layout.addWidget(title)
+
+        status = "Reusing the plan from your last run on this selection (nothing changed since)." if cached \
+            else "Untick anything you want to leave where it is, then apply."
+        self.status_lbl = QLabel(status)
+        self.status_lbl.setStyleSheet("color: #94A3B8; font-size: 11px;")
+        layout.addWidget(self.status_lbl)
+
+        self.list_widget = QListWidget()
+        for index, step in enumerate(plan.steps):
+            icon = "📁" if step.kind == "folder" else "📄"
+            conf = f"  •  {step.confidence:.0%}" if step.confidence is not None else ""
+            item = QListWidgetItem(
+                f"{icon} {os.path.basename(step.source)}  ➡️  "
+                f"[{os.path.basename(step.destination)}]    ({step.reason.replace('_', ' ')}{conf})"
+            )
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            item.setData(Qt.ItemDataRole.UserRole, index)
+            item.setToolTip(f"{step.source}\n→ {step.destination}")
+            self.list_widget.addItem(item)
+        self.list_widget.itemChanged.connect(self._update_apply_label)
+        layout.addWidget(self.list_widget, 1)
+
+        for line in plan.notes:
+            note = QLabel(line.strip())
+            note.setStyleSheet("color: #F59E0B; font-size: 11px;")
+            note.setWordWrap(True)
+            layout.addWidget(note)
+
+        btn_row = QHBoxLayout()
+        save_btn = QPushButton("Save Plan…")
+        save_btn.clicked.connect(self._save_plan)
+        btn_row.addWidget(save_btn)
+        btn_row.addStretch()
+
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        btn_row.addWidget(cancel_btn)
+
+        self.apply_btn = QPushButton()
+        self.apply_btn.setStyleSheet(
+            "QPushButton { background-color: #2563EB; color: white; border: none;"
+            " border-radius: 6px; padding: 6px 14px; font-weight: bold; }"
+            "QPushButton:disabled { background-color: #334155; color: #64748B; }")
+        self.apply_btn.clicked.connect(self.accept)
+        btn_row.addWidget(self.apply_btn)
+        layout.addLayout(btn_row)
+
+        self._update_apply_label()
+
+    def selected_steps(self):
+        steps = []
+        for row in range(self.list_widget.count()):
+            item = self.list_widget.item(row)
+            if item.checkState() == Qt.CheckState.Checked:
+                steps.append(self.plan.steps[item.data(Qt.ItemDataRole.UserRole)])
+        return steps
+
+    def _update_apply_label(self, *_):
+        count = len(self.selected_steps())
+        self.apply_btn.setText(f"Apply {count} Move(s)")
+        self.apply_btn.setEnabled(count > 0)
+
+    def _save_plan(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Organise Plan", "organise_plan.json", "Organise plan (*.json)"
+        )
+        if not path:
+            return
+        tweaked = OrganisePlan(
+            self.plan.current_view_path,
+            steps=self.selected_steps(),
+            notes=self.plan.notes,
+            metrics_message=self.plan.metrics_message,
+            unsupported_files=self.plan.unsupported_files,
+        )
+        try:
+            tweaked.save(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Plan", f"Could not save the plan:\n{e}")
+            return
+        self.status_lbl.setText(
+            f"Saved to {path} — apply it later with: python -m src.organise.plan apply \"{path}\""
+        )
@@ -2,7 +2,7 @@ import requests
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QFrame, QLineEdit, QScrollArea,
                              QCheckBox, QButtonGroup, QStackedWidget, QMessageBox)
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread, QSettings
 from PyQt6.QtGui import QFont, QPainter, QColor, QBrush
 from auth.authentication_page import translate_text
 
@@ -567,6 +567,63 @@ class LanguagePanel(QWidget):
             QMessageBox.critical(self, "Error", f"Server error: {e}")
 
 
+# ── Smart Organise Panel ──────────────────────────────────────────────────────
+class SmartOrganisePanel(QWidget):
+    def __init__(self):
+        super().__init__()
+        from src.organise.fast_models import SETTINGS_KEY, fast_mode_enabled
+        from src.organise.topic_model import SETTINGS_KEY as TOPIC_SETTINGS_KEY, topic_mode_enabled
+        self._settings_key = SETTINGS_KEY
+        self._topic_settings_key = TOPIC_SETTINGS_KEY
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(30, 20, 30, 20)
+        layout.setSpacing(10)
+
+        title = QLabel("Smart Organise")
+        title.setStyleSheet("color: white; font-size: 16px; font-weight: bold;"
+                            "border-bottom: 1px solid #4A5568; padding-bottom: 8px;")
+        layout.addWidget(title)
+
+        self.fast_mode_cb = QCheckBox("Fast mode")
+        self.fast_mode_cb.setChecked(fast_mode_enabled())
+        self.fast_mode_cb.setStyleSheet("""
+            QCheckBox { color: white; font-size: 13px; padding: 10px 0px; border-bottom: 1px solid #2D3748; }
+            QCheckBox::indicator { width: 16px; height: 16px; border: 1px solid #4A5568; border-radius: 3px; }
+            QCheckBox::indicator:checked { background-color: #3182CE; border-color: #3182CE; }
+        """)
+        self.fast_mode_cb.toggled.connect(self._save_fast_mode)
+        layout.addWidget(self.fast_mode_cb)
+
+        hint = QLabel("Trains linear models (SGD + nearest centroid) instead of the "
+                      "Random Forest + SVM ensemble. Much faster on large folders, "
+                      "with a small accuracy trade-off.")
+        hint.setStyleSheet("color: #A0AEC0; font-size: 12px;")
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+
+        self.topic_mode_cb = QCheckBox("Categorise by topic")
+        self.topic_mode_cb.setChecked(topic_mode_enabled())
+        self.topic_mode_cb.setStyleSheet(self.fast_mode_cb.styleSheet())
+        self.topic_mode_cb.toggled.connect(self._save_topic_mode)
+        layout.addWidget(self.topic_mode_cb)
+
+        topic_hint = QLabel("Sorts loose documents into Business & Finance, Technology & IT, "
+                            "Politics & Government, Sports and Entertainment & Media folders "
+                            "with the pretrained BBC News models — no training per run.")
+        topic_hint.setStyleSheet("color: #A0AEC0; font-size: 12px;")
+        topic_hint.setWordWrap(True)
+        layout.addWidget(topic_hint)
+
+        layout.addStretch()
+
+    def _save_fast_mode(self, checked):
+        QSettings("Kemaslah", "SmartFileManager").setValue(self._settings_key, checked)
+
+    def _save_topic_mode(self, checked):
+        QSettings("Kemaslah", "SmartFileManager").setValue(self._topic_settings_key, checked)
+
+
 # ── What's New Panel ──────────────────────────────────────────────────────────
 class WhatsNewPanel(QWidget):
     def __init__(self, updates=None):
@@ -644,7 +701,7 @@ class SettingsView(QWidget):
         sidebar_layout.setSpacing(0)
 
         self._sidebar_buttons = {}
-        for label in ["User Profile", "Change Password", "Language", "What's new"]:
+        for label in ["User Profile", "Change Password", "Language", "Smart Organise", "What's new"]:
             btn = QPushButton(label)
             btn.setCursor(Qt.CursorShape.PointingHandCursor)
             btn.setCheckable(True)
@@ -692,6 +749,7 @@ class SettingsView(QWidget):
             "User Profile":    UserProfilePanel(self.user_data),
             "Change Password": ChangePasswordPanel(self.user_data),
             "Language":        LanguagePanel(self.user_data),
+            "Smart Organise":  SmartOrganisePanel(),
             "What's new":      WhatsNewPanel(),
         }
 
@@ -1,109 +1,29 @@
 import os
 import json
+import time
 import shutil
-from datetime import datetime, timedelta
+from datetime import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QHBoxLayout,
     QScrollArea, QFrame, QProgressBar,
-    QTableWidget, QTableWidgetItem, QHeaderView
+    QTableWidget, QTableWidgetItem, QHeaderView, QPushButton
 )
 from PyQt6.QtCore import Qt, QSettings, QThread, pyqtSignal
 from PyQt6.QtCharts import QChart, QChartView, QPieSeries, QPieSlice
 from PyQt6.QtGui import QColor, QPainter
 
 from src.gui.widgets.loading_overlay import LoadingOverlay
+from src.extraction.budget import ExtractionQuarantine
+from src.organise.duplicates import find_duplicates, load_summary
+from src.filesystem.home_scan import scan_home, library_roots
+from src.filesystem.catalogue import MetadataCatalogue
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
 
 
 # ─── File Scanning Helpers ────────────────────────────────────────────────────
 
 def get_user_scan_roots():
-    home = os.path.expanduser("~")
-    folders = [
-        os.path.join(home, "Desktop"),
-        os.path.join(home, "Documents"),
-        os.path.join(home, "Downloads"),
-        os.path.join(home, "Pictures"),
-        os.path.join(home, "Videos"),
-    ]
-    return [folder for folder in folders if os.path.exists(folder)]
-
-
-def scan_pc_files():
-    TEXT_EXTS = {
-        '.doc', '.docx', '.odt', '.rtf', '.txt', '.pdf', '.md', '.csv',
-        '.xlsx', '.xls', '.pptx', '.ppt', '.json', '.xml', '.yaml',
-        '.yml', '.log', '.ini', '.toml'
-    }
-    IMAGE_VIDEO = {
-        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.svg', '.ico',
-        '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm',
-        '.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma'
-    }
-    DEV_CODE = {
-        '.html', '.htm', '.css', '.js', '.ts', '.py', '.java', '.c', '.cpp',
-        '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.sh', '.bat'
-    }
-    ARCHIVE_INST = {
-        '.zip', '.rar', '.7z', '.tar', '.gz', '.exe', '.msi', '.dmg', '.iso', '.dll', '.bin'
-    }
-
-    counts = {
-        "Text-Based files": 0,
-        "Image & Video files": 0,
-        "Developer & Code files": 0,
-        "Archives & Installers": 0
-    }
-    total_size = 0
-
-    SKIP_DIRS = {
-        'Windows', 'Program Files', 'Program Files (x86)',
-        'ProgramData', 'Recovery', 'System Volume Information'
-    }
-
-    roots = get_user_scan_roots()
-    if not roots:
-        roots = [os.path.expanduser("~")]
-
-    for root in roots:
-        for dirpath, dirnames, filenames in os.walk(root, topdown=True):
-            dirnames[:] = [d for d in dirnames if not d.startswith('$') and d not in SKIP_DIRS]
-            for fname in filenames:
-                ext = os.path.splitext(fname)[1].lower()
-                full_path = os.path.join(dirpath, fname)
-
-                try:
-                    total_size += os.path.getsize(full_path)
-                except OSError:
-                    pass
-
-                if ext in TEXT_EXTS:
-                    counts["Text-Based files"] += 1
-                elif ext in IMAGE_VIDEO:
-                    counts["Image & Video files"] += 1
-                elif ext in DEV_CODE:
-                    counts["Developer & Code files"] += 1
-                elif ext in ARCHIVE_INST:
-                    counts["Archives & Installers"] += 1
-
-    return counts, total_size
-
-
-def scan_location_files():
-    locs = {
-        "Documents Folder": os.path.expanduser("~/Documents"),
-        "Pictures Folder": os.path.expanduser("~/Pictures"),
-        "Video Folder": os.path.expanduser("~/Videos"),
-    }
-    counts = {}
-
-    for label, path in locs.items():
-        total = 0
-        if os.path.exists(path):
-            for _, _, files in os.walk(path):
-                total += len(files)
-        counts[label] = max(total, 0)
-
-    return counts
+    return library_roots()
 
 
 def get_total_disk_info():
@@ -118,31 +38,6 @@ def get_total_disk_info():
             return 20 * (1024**3), 125 * (1024**3)
 
 
-def get_archivable_size():
-    total = 0
-    cutoff = datetime.now() - timedelta(days=180)
-
-    SKIP_DIRS = {
-        'Windows', 'Program Files', 'Program Files (x86)',
-        'ProgramData', 'Recovery', 'System Volume Information'
-    }
-
-    roots = [os.path.expanduser("~")]
-
-    for root in roots:
-        for dirpath, dirnames, filenames in os.walk(root, topdown=True):
-            dirnames[:] = [d for d in dirnames if not d.startswith('$') and d not in SKIP_DIRS]
-            for fname in filenames:
-                fp = os.path.join(dirpath, fname)
-                try:
-                    if datetime.fromtimestamp(os.path.getmtime(fp)) < cutoff:
-                        total += os.path.getsize(fp)
-                except OSError:
-                    pass
-
-    return total
-
-
 # ─── Feature Usage Tracking ───────────────────────────────────────────────────
 
 def record_feature_use(feature: str):
@@ -181,16 +76,82 @@ def get_feature_stats():
     }
 
 
+# ─── Cached Dashboard Results ─────────────────────────────────────────────────
+# The last computed dashboard is shown instantly whenever the page opens; a
+# background refresh then revalidates it (stale-while-revalidate).
+
+STATS_CACHE_NAME = "statistics_cache.json"
+
+# Shown results younger than this are not revalidated when the page reopens
+REVALIDATE_AFTER = 60
+
+# File aggregates are reused while the catalogue is unchanged, up to this age
+# (the 180-day archivable cutoff moves with the clock). "Unchanged" needs a
+# full refresh after the cached result: quick refreshes only notice folders
+# whose entries were added, removed or renamed, not files edited in place.
+MAX_REUSE_AGE = 24 * 3600
+
+# The duplicate scan hashes file contents, so it runs on its own worker and
+# only when its saved summary is older than this (or on a manual refresh)
+DEDUP_RESCAN_AFTER = 24 * 3600
+
+
+def load_cached_statistics():
+    """The last dashboard result with its "computed_at" timestamp, or None."""
+    cached = load_json(app_data_path(STATS_CACHE_NAME), None)
+    if not isinstance(cached, dict) or "computed_at" not in cached:
+        return None
+    return cached
+
+
+def save_cached_statistics(result):
+    try:
+        save_json_atomic(app_data_path(STATS_CACHE_NAME), result)
+    except OSError as e:
+        print(f"Could not save statistics cache: {e}")
+
+
 class StatisticsWorker(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
 
+    def __init__(self, cached=None):
+        super().__init__()
+        self.cached = cached
+
+    def _reusable(self, catalogue, generation):
+        """True when the cached file aggregates still describe the disk."""
+        cached = self.cached
+        if cached is None or generation is None or cached.get("generation") != generation:
+            return False
+        full_refresh = catalogue.full_refresh_started
+        return (
+            full_refresh is not None and full_refresh > cached["computed_at"]
+            and time.time() - cached["computed_at"] < MAX_REUSE_AGE
+        )
+
     def run(self):
         try:
-            type_counts, _ = scan_pc_files()
-            loc_counts = scan_location_files()
+            catalogue = MetadataCatalogue.shared()
+            generation = None
+            if catalogue.ready:
+                # Re-lists only directories whose mtime moved since the last crawl;
+                # skipped while a background crawl holds the catalogue (it is current enough)
+                catalogue.refresh(blocking=False)
+                generation = catalogue.generation
+
+            if self._reusable(catalogue, generation):
+                type_counts = self.cached["type_counts"]
+                loc_counts = self.cached["loc_counts"]
+                arch_bytes = self.cached["arch_bytes"]
+            else:
+                # SQL aggregates over the metadata catalogue; one walk of home until its first crawl finishes
+                home = catalogue.home_stats() if generation is not None else scan_home()
+                type_counts, loc_counts, arch_bytes = home.type_counts, home.location_counts, home.archivable_bytes
+            # Written by DuplicateScanWorker
+            dedup = load_summary()
+
             used, total = get_total_disk_info()
-            arch_bytes = get_archivable_size()
             feature_stats = get_feature_stats()
 
             result = {
@@ -199,14 +160,46 @@ class StatisticsWorker(QThread):
                 "used": used,
                 "total": total,
                 "arch_bytes": arch_bytes,
+                "dedup": dedup,
                 "feature_stats": feature_stats,
+                "generation": generation,
+                "computed_at": time.time(),
             }
+            save_cached_statistics(result)
             self.finished.emit(result)
 
         except Exception as e:
             self.error.emit(str(e))
 
 
+class DuplicateScanWorker(QThread):
+    """Library duplicate scan; find_duplicates saves the summary the dashboard shows"""
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.is_running = True
+
+    def run(self):
+        try:
+            catalogue = MetadataCatalogue.shared()
+            # Size → partial hash → full hash, with hashes cached between scans
+            report = find_duplicates(
+                get_user_scan_roots() or [os.path.expanduser("~")],
+                should_cancel=lambda: not self.is_running,
+                catalogue=catalogue if catalogue.ready else None,
+            )
+            self.finished.emit(report.summary())
+        except InterruptedError:
+            pass
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def stop(self):
+        self.is_running = False
+
+
 # ─── Reusable Widgets ─────────────────────────────────────────────────────────
 
 class StorageBar(QWidget):
@@ -306,7 +299,10 @@ class StatisticsView(QWidget):
         super().__init__(parent)
         self._built = False
         self.worker = None
+        self.dedup_worker = None
         self.overlay = None
+        self._computed_at = None
+        self._disk_total = 0
         self.setStyleSheet("background-color: #111827;")
 
     def showEvent(self, event):
@@ -314,6 +310,8 @@ class StatisticsView(QWidget):
         if not self._built:
             self._built = True
             self._build_ui()
+        elif self._computed_at is not None and time.time() - self._computed_at > REVALIDATE_AFTER:
+            self._start_statistics_loading(quiet=True)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -337,6 +335,12 @@ class StatisticsView(QWidget):
         root.setContentsMargins(28, 28, 28, 28)
         root.setSpacing(28)
 
+        self.updated_lbl = QLabel("")
+        self.updated_lbl.setFont(self._font(9))
+        self.updated_lbl.setStyleSheet("color: #6B7280;")
+        self.updated_lbl.setAlignment(Qt.AlignmentFlag.AlignRight)
+        root.addWidget(self.updated_lbl)
+
         top_layout = QHBoxLayout()
         top_layout.setSpacing(28)
 
@@ -434,6 +438,26 @@ class StatisticsView(QWidget):
         aw.setStyleSheet("background: transparent;")
         right.addWidget(aw)
 
+        dedup_title = QLabel("Reclaimable by Dedup")
+        dedup_title.setStyleSheet("font-size: 22px; font-weight: bold; color: white; margin-top: 14px;")
+        right.addWidget(dedup_title)
+
+        self.dedup_bar_container = QVBoxLayout()
+        self.dedup_bar_container.setContentsMargins(0, 0, 0, 0)
+
+        self.dedup_bar = StorageBar(0, total / (1024**3), "Duplicate Copies", "#8B5CF6")
+        self.dedup_bar_container.addWidget(self.dedup_bar)
+
+        dw = QWidget()
+        dw.setLayout(self.dedup_bar_container)
+        dw.setStyleSheet("background: transparent;")
+        right.addWidget(dw)
+
+        self.dedup_detail_lbl = QLabel("Scanning for identical files...")
+        self.dedup_detail_lbl.setStyleSheet("color: #9CA3AF; font-size: 11px;")
+        self.dedup_detail_lbl.setWordWrap(True)
+        right.addWidget(self.dedup_detail_lbl)
+
         self.feature_block = FeatureUsageBlock()
         right.addWidget(self.feature_block)
         right.addStretch()
@@ -450,13 +474,16 @@ class StatisticsView(QWidget):
         ai_widget = self._build_ai_stats()
         root.addWidget(ai_widget)
 
+        diagnostics_widget = self._build_extraction_diagnostics()
+        root.addWidget(diagnostics_widget)
+
         scroll.setWidget(root_widget)
         outer.addWidget(scroll)
 
         self.overlay = LoadingOverlay(self)
         self.overlay.resize(self.size())
 
-        self._start_statistics_loading()
+        self._load_statistics()
 
     def _build_ai_stats(self):
         ai_container = QFrame()
@@ -539,27 +566,157 @@ class StatisticsView(QWidget):
         else:
             self.ai_info.setText("Status: No trained model found. Please run 'train_ai.py' to generate metrics.")
 
-    # ── Data Refresh ──────────────────────────────────────────────────────────
+    def _build_extraction_diagnostics(self):
+        container = QFrame()
+        container.setObjectName("DiagnosticsContainer")
+        container.setStyleSheet("""
+            QFrame#DiagnosticsContainer {
+                background-color: #2D3748;
+                border-radius: 12px;
+                padding: 15px;
+            }
+        """)
+        layout = QVBoxLayout(container)
+
+        header = QHBoxLayout()
+        title = QLabel("🐢 Slowest Files to Read (Search & Organise)")
+        title.setStyleSheet("font-size: 18px; font-weight: bold; color: #63B3ED; margin-bottom: 10px;")
+        header.addWidget(title)
+        header.addStretch()
+
+        clear_btn = QPushButton("Clear Quarantine")
+        clear_btn.setStyleSheet("""
+            QPushButton { background-color: #4A5568; color: white; padding: 6px 12px; border-radius: 4px; font-weight: bold; }
+            QPushButton:hover { background-color: #1A202C; }
+        """)
+        clear_btn.clicked.connect(self._clear_quarantine)
+        header.addWidget(clear_btn)
+        layout.addLayout(header)
 
-    def _start_statistics_loading(self):
-        self.pie_type_loading.show()
-        self.pie_loc_loading.show()
+        self.diagnostics_info = QLabel(
+            "Files that blew the time/size budget are quarantined and searched last (or skipped)."
+        )
+        self.diagnostics_info.setStyleSheet("color: #A0AEC0; font-size: 12px; margin-bottom: 10px;")
+        layout.addWidget(self.diagnostics_info)
+
+        self.diagnostics_table = QTableWidget()
+        self.diagnostics_table.setColumnCount(5)
+        self.diagnostics_table.setHorizontalHeaderLabels(["File", "Status", "Read Time", "Size", "Last Seen"])
+        self.diagnostics_table.setStyleSheet(self.metrics_table.styleSheet())
+        self.diagnostics_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.diagnostics_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.diagnostics_table.verticalHeader().setVisible(False)
+        self.diagnostics_table.setFixedHeight(250)
+        layout.addWidget(self.diagnostics_table)
+
+        self.load_extraction_diagnostics()
+
+        return container
+
+    def load_extraction_diagnostics(self):
+        rows = ExtractionQuarantine().slowest(20)
+        self.diagnostics_table.setRowCount(len(rows))
+
+        for i, row in enumerate(rows):
+            status = row["status"]
+            if status == "Quarantined":
+                status = f"Quarantined ({row.get('reason', '?')})"
+
+            size = row.get("size") or 0
+            values = [
+                os.path.basename(row["path"]),
+                status,
+                f"{row.get('elapsed', 0):.1f}s",
+                f"{size / (1024 * 1024):.1f} MB",
+                row.get("last_seen", ""),
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setToolTip(row["path"] if col == 0 else row.get("detail", ""))
+                self.diagnostics_table.setItem(i, col, item)
+
+        if not rows:
+            self.diagnostics_info.setText("No slow or broken files recorded yet.")
+
+    def _clear_quarantine(self):
+        ExtractionQuarantine().clear()
+        self.load_extraction_diagnostics()
 
-        self.pie_type_view.hide()
-        self.pie_loc_view.hide()
+    # ── Data Refresh ──────────────────────────────────────────────────────────
 
-        if self.overlay:
-            self.overlay.show_message("Loading statistics...")
+    def _load_statistics(self):
+        """
+        Shows the last saved dashboard straight away and revalidates it in
+        the background; the loading overlay is only used when nothing is saved.
+        """
+        cached = load_cached_statistics()
+        if cached is None:
+            self._start_statistics_loading()
+            return
+
+        # Feature usage lives in QSettings and is cheap to read fresh
+        cached["feature_stats"] = get_feature_stats()
+        cached["dedup"] = load_summary()
+        self._apply_statistics(cached)
+        if time.time() - cached["computed_at"] > REVALIDATE_AFTER:
+            self._start_statistics_loading(quiet=True)
 
+    def _start_statistics_loading(self, quiet=False, reuse=True):
         if self.worker and self.worker.isRunning():
             return
 
-        self.worker = StatisticsWorker()
+        if quiet:
+            # Current figures stay on screen while they are revalidated
+            self.updated_lbl.setText("Refreshing…")
+        else:
+            self.pie_type_loading.show()
+            self.pie_loc_loading.show()
+
+            self.pie_type_view.hide()
+            self.pie_loc_view.hide()
+
+            if self.overlay:
+                self.overlay.show_message("Loading statistics...")
+
+        self.worker = StatisticsWorker(load_cached_statistics() if reuse else None)
         self.worker.finished.connect(self._on_statistics_loaded)
         self.worker.error.connect(self._on_statistics_error)
         self.worker.start()
 
     def _on_statistics_loaded(self, result):
+        self._apply_statistics(result)
+
+        if self.overlay:
+            self.overlay.hide_overlay()
+
+        self.worker = None
+        if time.time() - result["dedup"].get("scanned_at", 0) > DEDUP_RESCAN_AFTER:
+            self._start_duplicate_scan()
+
+    def _start_duplicate_scan(self):
+        if self.dedup_worker and self.dedup_worker.isRunning():
+            return
+        self.dedup_detail_lbl.setText("Scanning for identical files...")
+        self.dedup_worker = DuplicateScanWorker()
+        self.dedup_worker.finished.connect(self._on_duplicate_scan_finished)
+        self.dedup_worker.error.connect(self._on_duplicate_scan_error)
+        self.dedup_worker.start()
+
+    def _on_duplicate_scan_finished(self, summary):
+        self._update_dedup(summary, self._disk_total)
+        self.dedup_worker = None
+
+    def _on_duplicate_scan_error(self, message):
+        self.dedup_detail_lbl.setText(f"Duplicate scan failed: {message}")
+        self.dedup_worker = None
+
+    def stop_duplicate_scan(self):
+        """Cancels a running duplicate scan and waits for it (before the view is destroyed)"""
+        if self.dedup_worker and self.dedup_worker.isRunning():
+            self.dedup_worker.stop()
+            self.dedup_worker.wait()
+
+    def _apply_statistics(self, result):
         type_counts = result["type_counts"]
         loc_counts = result["loc_counts"]
         used = result["used"]
@@ -570,6 +727,10 @@ class StatisticsView(QWidget):
         self._update_pie_type(type_counts)
         self._update_pie_loc(loc_counts)
         self._update_storage(used, total, arch_bytes)
+        self._disk_total = total
+        self._update_dedup(result["dedup"], total)
+        if self.dedup_worker is not None:
+            self.dedup_detail_lbl.setText("Scanning for identical files...")
         self.feature_block.update_stats(feature_stats)
 
         self.pie_type_loading.hide()
@@ -578,14 +739,19 @@ class StatisticsView(QWidget):
         self.pie_type_view.show()
         self.pie_loc_view.show()
 
-        if self.overlay:
-            self.overlay.hide_overlay()
+        self._computed_at = result["computed_at"]
+        self.updated_lbl.setText(f"Updated {self._updated_text()}")
 
-        self.worker = None
+    def _updated_text(self):
+        return datetime.fromtimestamp(self._computed_at).strftime("%d %b %Y, %H:%M")
 
     def _on_statistics_error(self, message):
-        self.pie_type_loading.setText(f"Failed to load chart: {message}")
-        self.pie_loc_loading.setText(f"Failed to load chart: {message}")
+        if self._computed_at is not None:
+            # The figures already shown stay; only the revalidation failed
+            self.updated_lbl.setText(f"Updated {self._updated_text()} (refresh failed: {message})")
+        else:
+            self.pie_type_loading.setText(f"Failed to load chart: {message}")
+            self.pie_loc_loading.setText(f"Failed to load chart: {message}")
 
         if self.overlay:
             self.overlay.hide_overlay()
@@ -593,7 +759,10 @@ class StatisticsView(QWidget):
         self.worker = None
 
     def _refresh(self):
-        self._start_statistics_loading()
+        # A manual refresh recomputes everything, even when the catalogue looks unchanged
+        self._start_statistics_loading(quiet=self._computed_at is not None, reuse=False)
+        self._start_duplicate_scan()
+        self.load_extraction_diagnostics()
 
     def _update_pie_type(self, counts):
         labels = list(counts.keys())
@@ -628,6 +797,27 @@ class StatisticsView(QWidget):
             "#3B82F6"
         )
 
+    def _update_dedup(self, dedup, total):
+        reclaimable = dedup.get("reclaimable_bytes", 0)
+        self._swap_bar(
+            self.dedup_bar_container,
+            "dedup_bar",
+            reclaimable / (1024**3),
+            total / (1024**3),
+            "Duplicate Copies",
+            "#8B5CF6"
+        )
+        if not dedup.get("groups"):
+            self.dedup_detail_lbl.setText(
+                f"No identical files found in {dedup.get('files_scanned', 0):,} scanned files."
+            )
+            return
+        self.dedup_detail_lbl.setText(
+            f"{dedup['duplicate_files']:,} duplicate copies in {dedup['groups']:,} sets — "
+            f"{reclaimable / (1024**2):,.1f} MB could be reclaimed "
+            f"({dedup['files_scanned']:,} files scanned)."
+        )
+
     def _swap_bar(self, container_layout, attr, used_gb, total_gb, label, color):
         old = getattr(self, attr, None)
         if old:
@@ -0,0 +1,85 @@
+import os
+import datetime
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+    QListWidget, QListWidgetItem, QPushButton
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from src.organise.undo_journal import list_runs
+
+
+class UndoHistoryDialog(QDialog):
+    """Past Smart Organise / Smart Archive runs, any of which can be undone"""
+    undo_requested = pyqtSignal(str)
+
+    KIND_LABELS = {"organise": "🤖 Smart Organise", "archive": "📦 Smart Archive"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Undo History")
+        self.resize(640, 460)
+        self.setStyleSheet("""
+            QDialog { background-color: #0F172A; color: #F1F5F9; }
+            QLabel { color: #F1F5F9; }
+            QListWidget {
+                background-color: #1E293B; color: #E2E8F0;
+                border: 1px solid #273549; border-radius: 8px; font-size: 12px;
+            }
+            QListWidget::item { padding: 8px; border-bottom: 1px solid #273549; }
+            QListWidget::item:selected { background-color: #2563EB; color: white; }
+        """)
+
+        layout = QVBoxLayout(self)
+
+        title = QLabel("<b>Organise and archive runs</b>")
+        layout.addWidget(title)
+
+        hint = QLabel("Undo puts every file and folder a run moved back where it was, "
+                      "even after the app was closed.")
+        hint.setStyleSheet("color: #94A3B8; font-size: 11px;")
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+
+        self.list_widget = QListWidget()
+        self.list_widget.currentItemChanged.connect(self._update_buttons)
+        layout.addWidget(self.list_widget, 1)
+
+        btn_row = QHBoxLayout()
+        btn_row.addStretch()
+        self.undo_btn = QPushButton("↩  Undo Run")
+        self.undo_btn.clicked.connect(self._on_undo)
+        btn_row.addWidget(self.undo_btn)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        btn_row.addWidget(close_btn)
+        layout.addLayout(btn_row)
+
+        self.refresh()
+
+    def refresh(self):
+        self.list_widget.clear()
+        for run in list_runs():
+            started = datetime.datetime.fromtimestamp(run.started).strftime("%Y-%m-%d %H:%M")
+            kind = self.KIND_LABELS.get(run.kind, run.kind)
+            state = "  •  undone" if run.undone else ""
+            item = QListWidgetItem(
+                f"{kind}  —  {started}  •  {run.moves} item(s){state}\n"
+                f"     {os.path.basename(run.label) or run.label}"
+            )
+            item.setData(Qt.ItemDataRole.UserRole, run.run_id)
+            item.setToolTip(run.label)
+            if run.undone:
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEnabled)
+            self.list_widget.addItem(item)
+        self._update_buttons()
+
+    def _update_buttons(self, *_):
+        item = self.list_widget.currentItem()
+        self.undo_btn.setEnabled(item is not None and bool(item.flags() & Qt.ItemFlag.ItemIsEnabled))
+
+    def _on_undo(self):
+        item = self.list_widget.currentItem()
+        if item is not None:
+            self.undo_requested.emit(item.data(Qt.ItemDataRole.UserRole))
@@ -68,7 +68,8 @@ class ActionBar(QWidget):
             ("📄 Paste", "paste"),
             ("✏ Rename", "rename"),
             ("⤴ Share", "share"),
-            ("🗑 Delete", "delete")
+            ("🗑 Delete", "delete"),
+            ("↩ Undo", "undo_history")
         ]
 
         self.action_buttons = {} # NEW: Store buttons to translate them later
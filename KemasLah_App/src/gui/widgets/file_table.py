@@ -5,45 +5,154 @@ from send2trash import send2trash
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QCheckBox, QTableWidget,
     QTableWidgetItem, QHBoxLayout, QHeaderView,
-    QFileIconProvider, QInputDialog, QMessageBox, QAbstractItemView, QMenu
+    QFileIconProvider, QInputDialog, QMessageBox, QAbstractItemView, QMenu, QLabel
 )
 from PyQt6.QtGui import QIcon, QAction
 from PyQt6.QtCore import Qt, pyqtSignal, QFileInfo, QSize, QThread
 
+from src.search.query_matcher import QueryMatcher
+from src.extraction.budget import BudgetedExtractor
+from src.extraction.text_extractor import RICH_TEXT_TYPES, PLAIN_TEXT_TYPES
+from src.search.archive_index import ArchiveIndex, is_archive
+from src.search.filename_index import FilenameIndex
+from src.search.result_cache import SearchResultCache, CachedSearch, directory_stamp
+from src.filesystem.catalogue import MetadataCatalogue
+from src.filesystem.crawler import walk
+
 
 class SearchWorker(QThread):
     # This signal sends the data back to the main UI safely: (name, full_path, is_dir)
     match_found = pyqtSignal(str, str, bool)
     search_finished = pyqtSignal(int)
+    # Full number of filename matches from the trigram index: (total, is_fuzzy)
+    filename_hits_counted = pyqtSignal(int, bool)
+
+    UNSUPPORTED = {
+        'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp', 'tiff', 'svg', 'ico',
+        'mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm',
+        'mp3', 'wav', 'flac', 'aac', 'ogg', 'wma',
+        'zip', 'rar', '7z', 'tar', 'gz',
+        'exe', 'dll', 'bin', 'iso', 'dmg',
+        'db', 'sqlite', 'pkl', 'pyc'
+    }
 
     def __init__(self, query, start_path, limit=100):
         super().__init__()
         self.query = query.lower()
+        self.matcher = QueryMatcher(query)
         self.start_path = start_path
         self.limit = limit
         self.is_running = True
+        self.extractor = None
+
+    def _content_matches(self, full_path, ext):
+        """Reads the file within the extraction budget and feeds it chunk by chunk to the matcher"""
+        if ext in RICH_TEXT_TYPES:
+            chunks = self.extractor.extract(
+                full_path, ext, max_rows=200, should_cancel=lambda: not self.is_running
+            )
+        elif ext in PLAIN_TEXT_TYPES:
+            chunks = self.extractor.extract(full_path, ext)
+        else:
+            chunks = self.extractor.extract(full_path, ext, max_chars=5000)
+
+        hits = self.matcher.new_hits()
+        for chunk in chunks:
+            if self.matcher.feed(hits, chunk.lower()).is_match:
+                return True
+        return False
+
+    def _archive_matches(self, archive_path, archive_name):
+        """Yields a display name for each ZIP member whose name or text matches"""
+        entries = self.archives.entries(archive_path, should_cancel=lambda: not self.is_running)
+        for member_name, text in entries:
+            if self.matcher.matches(member_name.lower()) or self.matcher.matches(text):
+                yield f"{member_name.split('/')[-1]} (in {archive_name})"
+
+    def _indexed_filename_hits(self, index):
+        """Filename matches from the trigram index: 'rep*' is a prefix query, and a
+        query with no exact hits falls back to fuzzy matching"""
+        query = self.query.strip()
+        if query.endswith('*') and ' ' not in query and len(query) > 1:
+            total, hits = index.find_prefix(query.rstrip('*'), under=self.start_path, limit=self.limit)
+            return total, hits, False
+
+        total, hits = index.find(self.matcher, under=self.start_path, limit=self.limit)
+        if total == 0:
+            total, hits = index.find_fuzzy(query, under=self.start_path, limit=self.limit)
+            return total, hits, True
+        return total, hits, False
+
+    def _report(self, root, name, full_path, is_dir):
+        """Records a hit for `root`'s cache segment and shows it unless already shown"""
+        self._dir_hits[root].append((name, full_path, is_dir))
+        if full_path in self._emitted and name == os.path.basename(full_path):
+            return
+        self.match_found.emit(name, full_path, is_dir)
+        self._matches_found += 1
+
+    def _limit_reached(self):
+        return self._matches_found >= self.limit
 
     def run(self):
         """This runs completely in the background"""
-        matches_found = 0
+        self._matches_found = 0
+        # Paths already reported from the filename index
+        self._emitted = set()
+        # Hits and directory stamps gathered this run, per folder (for the result cache)
+        self._dir_hits = {}
+        stamps = {}
+        incomplete = set()
+
+        index = FilenameIndex.shared()
+        if index.ready and index.covers(self.start_path):
+            total, hits, is_fuzzy = self._indexed_filename_hits(index)
+            self.filename_hits_counted.emit(total, is_fuzzy)
+            for name, full_path, is_dir in hits:
+                self.match_found.emit(name, full_path, is_dir)
+                self._emitted.add(full_path)
+            # Index hits count toward the limit; the walk only adds paths not shown yet
+            self._matches_found = len(self._emitted)
+
+        cache = SearchResultCache.shared()
+        cached = cache.get(self.query, self.start_path, "smart")
+
+        self.extractor = BudgetedExtractor()
+        self.archives = ArchiveIndex(self.extractor)
+        # Files quarantined by earlier runs (slow/broken parsers) are searched last
+        deferred = []
 
         try:
-            for root, dirs, files in os.walk(self.start_path):
-                if not self.is_running:
+            # Directories are listed ahead on a thread pool while this thread reads contents
+            for root, dirs, files in walk(
+                self.start_path, should_cancel=lambda: not self.is_running or self._limit_reached()
+            ):
+                if not self.is_running or self._limit_reached():
                     break
 
+                stamps[root] = directory_stamp(root, files)
+                self._dir_hits[root] = []
+
+                # Unchanged since the last identical search: replay its hits
+                reused = cached.hits_for(root, stamps[root]) if cached else None
+                if reused is not None:
+                    for name, full_path, is_dir in reused:
+                        self._report(root, name, full_path, is_dir)
+                    if self._limit_reached():
+                        break
+                    continue
+
                 # 1. Search Folders
                 for d in dirs:
                     if not self.is_running:
                         break
-                    if self.query in d.lower():
-                        full_path = os.path.join(root, d)
-                        self.match_found.emit(d, full_path, True)
-                        matches_found += 1
-                        if matches_found >= self.limit:
+                    if self.matcher.matches(d.lower()):
+                        self._report(root, d, os.path.join(root, d), True)
+                        if self._limit_reached():
                             break
 
-                if matches_found >= self.limit or not self.is_running:
+                if self._limit_reached() or not self.is_running:
+                    incomplete.add(root)
                     break
 
                 # 2. Search Files (filename + content)
@@ -55,108 +164,123 @@ class SearchWorker(QThread):
                     match = False
 
                     # A. Search filename
-                    if self.query in f.lower():
+                    if self.matcher.matches(f.lower()):
                         match = True
 
-                    # B. Search file content
-                    else:
+                    # ZIP archives: search member names and contents without unpacking
+                    elif is_archive(f):
                         try:
-                            ext = f.split('.')[-1].lower()
-
-                            UNSUPPORTED = {
-                                'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp', 'tiff', 'svg', 'ico',
-                                'mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm',
-                                'mp3', 'wav', 'flac', 'aac', 'ogg', 'wma',
-                                'zip', 'rar', '7z', 'tar', 'gz',
-                                'exe', 'dll', 'bin', 'iso', 'dmg',
-                                'db', 'sqlite', 'pkl', 'pyc'
-                            }
-
-                            if ext in UNSUPPORTED:
-                                pass
-
-                            elif ext in ['txt', 'csv', 'json', 'md', 'py', 'rtf',
-                                         'xml', 'html', 'htm', 'yaml', 'yml',
-                                         'toml', 'ini', 'log']:
-                                with open(full_path, 'r', errors='ignore') as file:
-                                    content = file.read().lower()
-                                    if self.query in content:
-                                        match = True
-
-                            elif ext == 'pdf':
-                                import PyPDF2
-                                with open(full_path, 'rb') as file:
-                                    reader = PyPDF2.PdfReader(file)
-                                    for page in reader.pages:
-                                        text = page.extract_text()
-                                        if text and self.query in text.lower():
-                                            match = True
-                                            break
-
-                            elif ext == 'docx':
-                                import docx
-                                doc = docx.Document(full_path)
-                                for para in doc.paragraphs:
-                                    if self.query in para.text.lower():
-                                        match = True
-                                        break
-
-                            elif ext in ['xlsx', 'xls']:
-                                import openpyxl
-                                wb = openpyxl.load_workbook(full_path, read_only=True, data_only=True)
-                                for sheet in wb.worksheets:
-                                    for row in sheet.iter_rows(max_row=200, values_only=True):
-                                        row_text = " ".join(str(c) for c in row if c is not None).lower()
-                                        if self.query in row_text:
-                                            match = True
-                                            break
-                                    if match:
-                                        break
-                                wb.close()
-
-                            elif ext == 'pptx':
-                                from pptx import Presentation as PptxPresentation
-                                prs = PptxPresentation(full_path)
-                                for slide in prs.slides:
-                                    for shape in slide.shapes:
-                                        if hasattr(shape, "text") and self.query in shape.text.lower():
-                                            match = True
-                                            break
-                                    if match:
-                                        break
-
-                            else:
-                                try:
-                                    with open(full_path, 'r', errors='ignore') as file:
-                                        content = file.read(5000).lower()
-                                        if self.query in content:
-                                            match = True
-                                except Exception:
-                                    pass
-
+                            for member_label in self._archive_matches(full_path, f):
+                                self._report(root, member_label, full_path, False)
+                                if self._limit_reached():
+                                    break
+                        except InterruptedError:
+                            break
                         except Exception:
                             pass
+                        if self._limit_reached():
+                            break
+
+                    # B. Search file content
+                    else:
+                        ext = f.split('.')[-1].lower()
+                        if ext in self.UNSUPPORTED:
+                            pass
+                        elif self.extractor.quarantine.is_quarantined(full_path):
+                            if not self.extractor.should_skip(full_path):
+                                deferred.append((root, f, full_path, ext))
+                        else:
+                            try:
+                                match = self._content_matches(full_path, ext)
+                            except InterruptedError:
+                                break
+                            except Exception:
+                                pass
 
                     if match:
-                        self.match_found.emit(f, full_path, False)
-                        matches_found += 1
-                        if matches_found >= self.limit:
+                        self._report(root, f, full_path, False)
+                        if self._limit_reached():
                             break
 
-                if matches_found >= self.limit or not self.is_running:
+                if self._limit_reached() or not self.is_running:
+                    incomplete.add(root)
                     break
 
+            for i, (root, f, full_path, ext) in enumerate(deferred):
+                if self._limit_reached() or not self.is_running:
+                    incomplete.update(r for r, *_ in deferred[i:])
+                    break
+                try:
+                    if self._content_matches(full_path, ext):
+                        self._report(root, f, full_path, False)
+                except InterruptedError:
+                    incomplete.update(r for r, *_ in deferred[i:])
+                    break
+                except Exception:
+                    pass
+
+            # Cache every folder that was searched to the end (none when the index filled the limit)
+            if self._dir_hits:
+                cache.put(self.query, self.start_path, "smart", CachedSearch({
+                    root: (stamps[root], hits)
+                    for root, hits in self._dir_hits.items()
+                    if root not in incomplete and stamps.get(root) is not None
+                }))
+
         except Exception as e:
             print(f"Background search error: {e}")
 
         finally:
-            self.search_finished.emit(matches_found)
+            self.extractor.close()
+            self.search_finished.emit(self._matches_found)
 
     def stop(self):
         """Safely stops the background process"""
         self.is_running = False
 
 
+class FilenameIndexWorker(QThread):
+    """Keeps the shared trigram filename index in sync with the library folders"""
+    index_updated = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.is_running = True
+
+    def run(self):
+        index = FilenameIndex.shared()
+        try:
+            index.refresh(should_cancel=lambda: not self.is_running)
+            index.save()
+        except Exception as e:
+            print(f"Filename index refresh error: {e}")
+        self.index_updated.emit(len(index))
+
+    def stop(self):
+        self.is_running = False
+
+
+class CatalogueWorker(QThread):
+    """Keeps the shared file metadata catalogue in sync with the home folder"""
+    catalogue_updated = pyqtSignal(int)
+
+    def __init__(self, full=False):
+        super().__init__()
+        self.full = full
+        self.is_running = True
+
+    def run(self):
+        catalogue = MetadataCatalogue.shared()
+        try:
+            catalogue.refresh(full=self.full, should_cancel=lambda: not self.is_running)
+        except Exception as e:
+            print(f"File catalogue refresh error: {e}")
+        self.catalogue_updated.emit(len(catalogue))
+
+    def stop(self):
+        self.is_running = False
+
+
 class FileTableWidget(QWidget):
     folder_opened = pyqtSignal(str)
     share_requested = pyqtSignal(str)
@@ -188,7 +312,16 @@ class FileTableWidget(QWidget):
             QCheckBox::indicator:checked { background-color: #2563EB; border-color: #2563EB; }
         """)
         self.select_all_cb.clicked.connect(self.toggle_select_all)
-        layout.addWidget(self.select_all_cb)
+
+        # Search result count (filled in while a search runs)
+        self.search_status_lbl = QLabel("")
+        self.search_status_lbl.setStyleSheet("color: #94A3B8; font-size: 12px;")
+
+        header_row = QHBoxLayout()
+        header_row.addWidget(self.select_all_cb)
+        header_row.addStretch()
+        header_row.addWidget(self.search_status_lbl)
+        layout.addLayout(header_row)
 
         # Table Setup
         self.table = QTableWidget()
@@ -261,6 +394,7 @@ class FileTableWidget(QWidget):
 
     def load_files(self, path):
         self.current_path = path
+        self.search_status_lbl.setText("")
 
         self.table.blockSignals(True)
         self.table.setUpdatesEnabled(False)
@@ -271,7 +405,10 @@ class FileTableWidget(QWidget):
 
         try:
             with os.scandir(path) as entries:
-                items = [entry for entry in entries if not entry.name.startswith('.')]
+                listing = list(entries)
+            # The live listing doubles as an incremental catalogue update (written off the UI thread)
+            MetadataCatalogue.shared().queue_listing(path, listing)
+            items = [entry for entry in listing if not entry.name.startswith('.')]
 
             items.sort(key=lambda e: (not e.is_dir(), e.name.lower()))
 
@@ -592,10 +729,18 @@ class FileTableWidget(QWidget):
         self.search_worker = SearchWorker(query, self.current_path, limit=100)
         self.search_worker.match_found.connect(self._add_search_row)
         self.search_worker.search_finished.connect(self._on_search_finished)
+        self.search_worker.filename_hits_counted.connect(self._on_filename_hits_counted)
+        self.search_status_lbl.setText("Searching...")
         self.search_worker.start()
 
+    def _on_filename_hits_counted(self, total, is_fuzzy):
+        shown = min(total, self.search_worker.limit if self.search_worker else total)
+        label = "similar name(s)" if is_fuzzy else "name match(es)"
+        more = f" — showing {shown}" if total > shown else ""
+        self.search_status_lbl.setText(f"{total} {label}{more} · searching inside files...")
+
     def _on_search_finished(self, count):
-        print(f"Found {count}")
+        self.search_status_lbl.setText(f"Found {count} result(s)")
 
     def _add_search_row(self, name, full_path, is_dir):
         """Helper method to format and insert search results into the table"""
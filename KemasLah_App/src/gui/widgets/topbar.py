@@ -88,6 +88,30 @@ class TopBar(QWidget):
         """)
         
         search_layout.addWidget(self.search_input)
+
+        # SUBFOLDERS TOGGLE: Deep Search the whole tree instead of one folder
+        self.recursive_btn = QPushButton("⤵")
+        self.recursive_btn.setCheckable(True)
+        self.recursive_btn.setFixedSize(36, 36)
+        self.recursive_btn.setToolTip("Deep Search all subfolders")
+        self.recursive_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2D3748;
+                color: #A0AEC0;
+                border: 1px solid #4A5568;
+                border-radius: 6px;
+                font-size: 16px;
+                margin-left: 6px;
+            }
+            QPushButton:hover { border-color: #4A9EFF; color: #4A9EFF; }
+            QPushButton:checked {
+                background-color: #2563EB;
+                color: white;
+                border-color: #4A9EFF;
+            }
+        """)
+        search_layout.addWidget(self.recursive_btn)
+
         layout.addWidget(search_widget)
         self.setLayout(layout)
 
@@ -98,7 +122,8 @@ class TopBar(QWidget):
         # 1. Translate Search Bar Placeholder
         translated_placeholder = translate_text("Name, email, etc...", lang_code)
         self.search_input.setPlaceholderText(translated_placeholder)
-        
+        self.recursive_btn.setToolTip(translate_text("Deep Search all subfolders", lang_code))
+
         # 2. Refresh the breadcrumbs so static pages translate instantly
         if self.current_path:
             self.update_breadcrumbs(self.current_path)
@@ -30,6 +30,7 @@ from PIL import Image
 from src.data.augmentation import get_inference_transforms
 from src.data.category_mapper import IDX_TO_LABEL, NUM_CLASSES, KEMASLAH_CATEGORIES
 from src.models.model_builder import build_model
+from src.filesystem.crawler import iter_files
 
 
 # File extensions this classifier will process
@@ -206,8 +207,8 @@ class ImageClassifier:
         """
         folder = Path(folder_path)
         image_files = [
-            str(f) for f in folder.rglob("*")
-            if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS
+            entry.path for entry in iter_files([folder_path], skip=None)
+            if Path(entry.name).suffix.lower() in SUPPORTED_EXTENSIONS
         ]
 
         print(f"Found {len(image_files)} image files in: {folder}")
@@ -25,12 +25,17 @@ Query words are matched against category words with substring logic:
     "pet"      → Pets_Animals       ✓  (substring of "pets")
     "outdoor"  → Nature_Outdoors    ✓
     "vehicle"  → Vehicles_Transport ✓
+
+Each run records model-load, keyframe and classify timings with a
+PerfRecorder and appends them to the performance log (src/utils/perf.py).
 """
 
 import os
 from pathlib import Path
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from src.utils.perf import PerfRecorder
+
 # Mirrors classifier.py — keep in sync if you add new extensions
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif",
                     ".heic", ".tiff"}
@@ -118,9 +123,11 @@ class CNNSearchWorker(QThread):
     # ── thread entry point ────────────────────────────────────────────────────
 
     def run(self):
+        perf = PerfRecorder("cnn_search")
         try:
             from src.inference.classifier import ImageClassifier
-            classifier = ImageClassifier(self.model_path)
+            with perf.span("model load"):
+                classifier = ImageClassifier(self.model_path)
         except FileNotFoundError as e:
             self.error_occurred.emit(str(e))
             return
@@ -128,7 +135,9 @@ class CNNSearchWorker(QThread):
             self.error_occurred.emit(f"CNN model failed to load:\n{e}")
             return
 
-        all_media = self._collect_media()
+        with perf.span("collect") as span:
+            all_media = self._collect_media()
+            span.add(items=len(all_media))
         if not all_media or not self._running:
             self.search_finished.emit(0, 0)
             return
@@ -142,7 +151,8 @@ class CNNSearchWorker(QThread):
             if not self._running:
                 break
             if Path(path).suffix.lower() in VIDEO_EXTENSIONS:
-                kf = self._extract_keyframe(path)
+                with perf.span("keyframes", items=1):
+                    kf = self._extract_keyframe(path)
                 if kf:
                     classify_list.append(kf)
                     actual_map[kf] = path
@@ -161,7 +171,8 @@ class CNNSearchWorker(QThread):
                 break
             batch = classify_list[i : i + self.batch_size]
             try:
-                results = classifier.classify_batch(batch)
+                with perf.span("classify", items=len(batch)):
+                    results = classifier.classify_batch(batch)
             except Exception as e:
                 print(f"[CNNSearch] Batch error: {e}")
                 continue
@@ -184,4 +195,5 @@ class CNNSearchWorker(QThread):
             except Exception:
                 pass
 
+        perf.log(scanned=scanned, matched=matched)
         self.search_finished.emit(scanned, matched)
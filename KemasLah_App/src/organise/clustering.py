@@ -0,0 +1,167 @@
+"""
+clustering.py
+-------------
+Scalable topic clustering for Smart Organise's loose-files mode.
+
+The clustering branch used to run KMeans(n_init=30, max_iter=1000) with
+n_clusters = len(files) // 3 on the full TF-IDF matrix, then train two
+supervised models on the cluster labels just to re-assign the same files.
+Past a few thousand files that grows superlinearly in time and memory.
+The pipeline here is:
+
+    1. LSA      — TruncatedSVD to at most 100 dimensions, rows re-normalised
+                  (k-means on unit vectors ≈ spherical k-means / cosine)
+    2. select k — MiniBatchKMeans for a handful of candidate k, scored by
+                  silhouette on a bounded sample of rows
+    3. cluster  — the best k's labels are used directly (no supervised models)
+    4. name     — each centroid is projected back to term space and the
+                  folder is named after its strongest term not already taken
+
+Memory is bounded by the sparse matrix plus an n × 100 dense projection, so
+50k documents fit comfortably. Past MAX_FIT_ROWS documents, stages 1–2 are
+fitted on a random sample and every row is then projected and assigned to
+its nearest centroid in chunks, so the dense projection never exceeds
+MAX_FIT_ROWS × 100 (million-file pools). Every stage's wall time is reported.
+
+Usage:
+    from src.organise.clustering import cluster_documents
+    result = cluster_documents(X, vectorizer.get_feature_names_out())
+    result.labels      # cluster id per row
+    result.names       # folder name per cluster id
+    result.timings     # {"reduce": s, "select_k": s, "assign": s, "name": s}
+"""
+
+import time
+
+import numpy as np
+
+
+MAX_COMPONENTS = 100
+MAX_CLUSTERS = 40
+MAX_K_CANDIDATES = 6
+SILHOUETTE_SAMPLE = 3000
+BATCH_SIZE = 1024
+
+# Larger inputs are fitted on a sample of this many rows, then assigned in chunks
+MAX_FIT_ROWS = 50_000
+ASSIGN_CHUNK = 20_000
+
+
+class ClusteringResult:
+    __slots__ = ("labels", "names", "k", "silhouette", "timings")
+
+    def __init__(self, labels, names, k, silhouette, timings):
+        self.labels = labels
+        self.names = names
+        self.k = k
+        self.silhouette = silhouette
+        self.timings = timings
+
+
+def candidate_ks(n_docs: int, max_clusters: int = MAX_CLUSTERS) -> list[int]:
+    """A few geometrically spaced k values between 2 and min(n/3, max_clusters)."""
+    k_max = min(max_clusters, max(2, n_docs // 3), max(2, n_docs - 1))
+    if k_max <= 2:
+        return [2]
+    ks = np.unique(np.round(np.geomspace(2, k_max, MAX_K_CANDIDATES)).astype(int))
+    return [int(k) for k in ks]
+
+
+def _reduce(X):
+    """(unit-length LSA rows, svd or None)."""
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.preprocessing import normalize
+
+    n_docs, n_features = X.shape
+    n_components = min(MAX_COMPONENTS, n_docs - 1, n_features - 1)
+    if n_components < 2:
+        return normalize(X).toarray(), None
+    svd = TruncatedSVD(n_components=n_components, random_state=42)
+    return normalize(svd.fit_transform(X)), svd
+
+
+def _assign(X, svd, model, should_cancel=None):
+    """Nearest-centroid labels for every row of X, projected chunk by chunk."""
+    from sklearn.preprocessing import normalize
+
+    labels = np.empty(X.shape[0], dtype=np.int32)
+    for start in range(0, X.shape[0], ASSIGN_CHUNK):
+        if should_cancel is not None and should_cancel():
+            raise InterruptedError("Clustering cancelled.")
+        chunk = X[start:start + ASSIGN_CHUNK]
+        Z = normalize(svd.transform(chunk)) if svd is not None else normalize(chunk).toarray()
+        labels[start:start + len(Z)] = model.predict(Z.astype(model.cluster_centers_.dtype, copy=False))
+    return labels
+
+
+def _fit(Z, k):
+    from sklearn.cluster import MiniBatchKMeans
+    model = MiniBatchKMeans(
+        n_clusters=k,
+        batch_size=min(BATCH_SIZE, len(Z)),
+        n_init=3,
+        random_state=42
+    )
+    return model.fit(Z)
+
+
+def _name_clusters(centers, svd, feature_names, sizes):
+    """Strongest centroid term per cluster, larger clusters choosing first."""
+    term_weights = svd.inverse_transform(centers) if svd is not None else centers
+    names = [None] * len(centers)
+    taken = set()
+    for c in np.argsort(sizes)[::-1]:
+        for idx in np.argsort(term_weights[c])[::-1][:20]:
+            word = str(feature_names[idx]).title()
+            if len(word) >= 3 and word not in taken:
+                names[c] = word
+                break
+        if names[c] is None:
+            names[c] = f"Subject_Area_{c + 1}"
+        taken.add(names[c])
+    return names
+
+
+def cluster_documents(X, feature_names, max_clusters: int = MAX_CLUSTERS, should_cancel=None) -> ClusteringResult:
+    """Clusters the rows of the TF-IDF matrix `X` (at least two rows)."""
+    from sklearn.metrics import silhouette_score
+
+    timings = {}
+    n_docs = X.shape[0]
+    sampled = n_docs > MAX_FIT_ROWS
+    X_fit = X
+    if sampled:
+        rows = np.sort(np.random.default_rng(42).choice(n_docs, MAX_FIT_ROWS, replace=False))
+        X_fit = X[rows]
+
+    start = time.perf_counter()
+    Z, svd = _reduce(X_fit)
+    timings["reduce"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sample_size = min(SILHOUETTE_SAMPLE, len(Z))
+    best_model, best_score = None, -2.0
+    for k in candidate_ks(len(Z), max_clusters):
+        if should_cancel is not None and should_cancel():
+            raise InterruptedError("Clustering cancelled.")
+        model = _fit(Z, k)
+        n_labels = len(np.unique(model.labels_))
+        if 2 <= n_labels < len(Z):
+            score = silhouette_score(Z, model.labels_, sample_size=sample_size, random_state=42)
+        else:
+            score = -1.0
+        if best_model is None or score > best_score:
+            best_model, best_score = model, score
+    timings["select_k"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = _assign(X, svd, best_model, should_cancel) if sampled else best_model.labels_
+    del Z
+    timings["assign"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sizes = np.bincount(labels, minlength=best_model.n_clusters)
+    names = _name_clusters(best_model.cluster_centers_, svd, feature_names, sizes)
+    timings["name"] = time.perf_counter() - start
+
+    return ClusteringResult(labels, names, best_model.n_clusters, float(best_score), timings)
@@ -0,0 +1,345 @@
+"""
+duplicates.py
+-------------
+Content-hash duplicate finder for the library roots (Desktop, Documents,
+Downloads, Pictures, Videos) and for Smart Organise selections.
+
+Hashing every file would read the whole library, so candidates are narrowed
+in three stages and each stage only sees what survived the previous one:
+
+    1. size        — files with a unique size cannot have a duplicate
+                     (hard links to the same inode are counted once); the
+                     library scan takes its size buckets from the metadata
+                     catalogue when it has been crawled
+    2. partial     — hash of the first and last 64 KB; settles files up to
+                     128 KB outright and splits most same-size lookalikes
+                     (media with a shared header, exports with equal sizes)
+    3. full        — whole-file hash, only for (size, partial) collisions
+
+Stages 2 and 3 run in a thread pool (hashing releases the GIL). The hash is
+xxHash3-128 when the optional `xxhash` package is installed, BLAKE3 when
+`blake3` is, and BLAKE2b otherwise. Hashes are cached in
+~/.kemaslah/hash_cache.json by path with the (size, mtime) they were taken
+at, so a rescan only re-reads files that changed.
+
+The last library scan is summarised in ~/.kemaslah/duplicates_summary.json
+for the Statistics view ("reclaimable by dedup"). Smart Organise uses
+collapse_duplicates() to classify one copy of each duplicate set and plan
+the other copies next to it.
+
+Usage:
+    from src.organise.duplicates import find_duplicates, collapse_duplicates
+    report = find_duplicates(get_user_scan_roots(), progress=print)
+    print(report.reclaimable_bytes, len(report.groups))
+    unique_paths, twins = collapse_duplicates(selected_files)
+"""
+
+import os
+import stat
+import time
+import hashlib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
+from src.filesystem.crawler import walk_entries
+
+
+CACHE_VERSION = 1
+PARTIAL_BYTES = 64 * 1024
+READ_CHUNK = 1024 * 1024
+DEFAULT_WORKERS = 8
+
+# Cached hashes kept (least recently seen dropped first)
+MAX_CACHED_HASHES = 200_000
+
+def _hasher_factory():
+    """(name, constructor) of the fastest available 128-bit-or-better hash."""
+    try:
+        import xxhash
+        return "xxh3_128", xxhash.xxh3_128
+    except ImportError:
+        pass
+    try:
+        import blake3
+        return "blake3", blake3.blake3
+    except ImportError:
+        pass
+    return "blake2b", lambda: hashlib.blake2b(digest_size=16)
+
+
+HASH_NAME, _new_hash = _hasher_factory()
+
+
+def partial_hash(path, size) -> str:
+    """Hash of the first and last PARTIAL_BYTES (the whole file when it is small)."""
+    h = _new_hash()
+    with open(path, 'rb') as f:
+        if size <= 2 * PARTIAL_BYTES:
+            h.update(f.read())
+        else:
+            h.update(f.read(PARTIAL_BYTES))
+            f.seek(size - PARTIAL_BYTES)
+            h.update(f.read(PARTIAL_BYTES))
+    return h.hexdigest()
+
+
+def full_hash(path, should_cancel=None) -> str:
+    h = _new_hash()
+    with open(path, 'rb') as f:
+        while True:
+            if should_cancel is not None and should_cancel():
+                raise InterruptedError("Duplicate scan cancelled.")
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class HashCache:
+    """path → [size, mtime_ns, partial, full, last seen], valid while size and mtime match."""
+
+    FILE_NAME = "hash_cache.json"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        data = load_json(app_data_path(self.FILE_NAME), {})
+        if data.get("version") != CACHE_VERSION or data.get("hash") != HASH_NAME:
+            data = {}
+        self._entries = data.get("entries", {})
+        self._dirty = False
+
+    def get(self, path, size, mtime_ns, stage):
+        """Cached "partial" or "full" hash, or None."""
+        entry = self._entries.get(path)
+        if not entry or entry[0] != size or entry[1] != mtime_ns:
+            return None
+        entry[4] = time.time()
+        return entry[2] if stage == "partial" else entry[3]
+
+    def put(self, path, size, mtime_ns, stage, digest):
+        with self._lock:
+            entry = self._entries.get(path)
+            if not entry or entry[0] != size or entry[1] != mtime_ns:
+                entry = [size, mtime_ns, None, None, 0]
+                self._entries[path] = entry
+            entry[2 if stage == "partial" else 3] = digest
+            entry[4] = time.time()
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        with self._lock:
+            entries = self._entries
+            if len(entries) > MAX_CACHED_HASHES:
+                keep = sorted(entries.items(), key=lambda kv: kv[1][4], reverse=True)[:MAX_CACHED_HASHES]
+                entries = self._entries = dict(keep)
+            try:
+                save_json_atomic(app_data_path(self.FILE_NAME),
+                                 {"version": CACHE_VERSION, "hash": HASH_NAME, "entries": entries})
+            except OSError as e:
+                print(f"Could not save hash cache: {e}")
+                return
+            self._dirty = False
+
+
+class DuplicateGroup:
+    __slots__ = ("size", "digest", "paths")
+
+    def __init__(self, size, digest, paths):
+        self.size = size
+        self.digest = digest
+        self.paths = paths
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+
+class DuplicateReport:
+    """Duplicate sets (largest reclaimable first) plus what each stage had to do."""
+
+    def __init__(self, groups, files_scanned, stats, timings):
+        self.groups = sorted(groups, key=lambda g: g.reclaimable_bytes, reverse=True)
+        self.files_scanned = files_scanned
+        self.stats = stats          # {"size_candidates", "partial_hashed", "full_hashed", "cache_hits"}
+        self.timings = timings      # {"walk", "partial", "full"} in seconds
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        return sum(g.reclaimable_bytes for g in self.groups)
+
+    @property
+    def duplicate_files(self) -> int:
+        return sum(len(g.paths) - 1 for g in self.groups)
+
+    def summary(self) -> dict:
+        return {
+            "scanned_at": time.time(),
+            "files_scanned": self.files_scanned,
+            "groups": len(self.groups),
+            "duplicate_files": self.duplicate_files,
+            "reclaimable_bytes": self.reclaimable_bytes,
+            "stats": self.stats,
+            "timings": self.timings,
+        }
+
+
+def _walk(roots, should_cancel=None):
+    """Yields (path, stat) for every regular file under `roots` (parallel crawl), symlinks not followed."""
+    for _, _, files in walk_entries(roots, should_cancel=should_cancel):
+        for entry in files:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+    if should_cancel is not None and should_cancel():
+        raise InterruptedError("Duplicate scan cancelled.")
+
+
+def _stat_files(paths):
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            yield path, st
+
+
+def _group_duplicates(files, min_size, max_workers, should_cancel, progress, cache):
+    started = time.perf_counter()
+    by_size = defaultdict(list)
+    seen_inodes = set()
+    scanned = 0
+    for path, st in files:
+        scanned += 1
+        if st.st_size < min_size:
+            continue
+        inode = (st.st_dev, st.st_ino)
+        if st.st_ino and inode in seen_inodes:
+            continue                        # another hard link to a file already counted
+        seen_inodes.add(inode)
+        by_size[st.st_size].append((path, st.st_mtime_ns))
+        if progress is not None and scanned % 5000 == 0:
+            progress(f"Scanned {scanned} files...")
+    candidates = [(size, entries) for size, entries in by_size.items() if len(entries) > 1]
+    walk_seconds = time.perf_counter() - started
+
+    stats = {"size_candidates": sum(len(e) for _, e in candidates),
+             "partial_hashed": 0, "full_hashed": 0, "cache_hits": 0}
+    counter_lock = threading.Lock()
+
+    def hashed(stage, size, path, mtime_ns):
+        if should_cancel is not None and should_cancel():
+            raise InterruptedError("Duplicate scan cancelled.")
+        digest = cache.get(path, size, mtime_ns, stage) if cache is not None else None
+        if digest is not None:
+            with counter_lock:
+                stats["cache_hits"] += 1
+            return digest
+        try:
+            if stage == "partial":
+                digest = partial_hash(path, size)
+            else:
+                digest = full_hash(path, should_cancel)
+        except OSError:
+            return None
+        with counter_lock:
+            stats[f"{stage}_hashed"] += 1
+        if cache is not None:
+            cache.put(path, size, mtime_ns, stage, digest)
+        return digest
+
+    def run_stage(stage, jobs):
+        """jobs: [(size, path, mtime_ns)] → {(size, digest): [(path, mtime_ns)]}"""
+        buckets = defaultdict(list)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            digests = pool.map(lambda job: hashed(stage, *job), jobs)
+            for i, ((size, path, mtime_ns), digest) in enumerate(zip(jobs, digests), start=1):
+                if digest is not None:
+                    buckets[(size, digest)].append((path, mtime_ns))
+                if progress is not None and i % 500 == 0:
+                    progress(f"Comparing {stage} hashes: {i}/{len(jobs)}...")
+        return buckets
+
+    started = time.perf_counter()
+    partial_jobs = [(size, path, mtime_ns) for size, entries in candidates for path, mtime_ns in entries]
+    partial_buckets = run_stage("partial", partial_jobs)
+    partial_seconds = time.perf_counter() - started
+
+    groups, full_jobs = [], []
+    for (size, digest), entries in partial_buckets.items():
+        if len(entries) < 2:
+            continue
+        if size <= 2 * PARTIAL_BYTES:
+            # The partial hash already covered the whole file
+            groups.append(DuplicateGroup(size, digest, sorted(p for p, _ in entries)))
+        else:
+            full_jobs.extend((size, path, mtime_ns) for path, mtime_ns in entries)
+
+    started = time.perf_counter()
+    for (size, digest), entries in run_stage("full", full_jobs).items():
+        if len(entries) > 1:
+            groups.append(DuplicateGroup(size, digest, sorted(p for p, _ in entries)))
+    full_seconds = time.perf_counter() - started
+
+    if cache is not None:
+        cache.save()
+    timings = {"walk": walk_seconds, "partial": partial_seconds, "full": full_seconds}
+    return DuplicateReport(groups, scanned, stats, timings)
+
+
+def find_duplicates(roots, min_size=1, max_workers=DEFAULT_WORKERS, should_cancel=None,
+                    progress=None, save_summary=True, catalogue=None) -> DuplicateReport:
+    """
+    Duplicate sets under `roots`; the summary is saved for the Statistics view.
+    With a crawled `catalogue`, the size stage is a query on it instead of a
+    walk, and only files sharing their size with another file are stat'ed.
+    """
+    if catalogue is not None:
+        files_scanned, paths = catalogue.same_size_files(roots, min_size)
+        files = _stat_files(paths)
+    else:
+        files_scanned, files = None, _walk(roots, should_cancel)
+    report = _group_duplicates(files, min_size, max_workers, should_cancel, progress, HashCache())
+    if files_scanned is not None:
+        report.files_scanned = files_scanned
+    if save_summary:
+        summary = report.summary()
+        summary["roots"] = list(roots)
+        try:
+            save_json_atomic(app_data_path("duplicates_summary.json"), summary)
+        except OSError as e:
+            print(f"Could not save duplicate summary: {e}")
+    return report
+
+
+def find_duplicates_in(paths, min_size=1, max_workers=DEFAULT_WORKERS, should_cancel=None) -> DuplicateReport:
+    """Duplicate sets among an explicit list of files (e.g. a Smart Organise selection)."""
+    return _group_duplicates(_stat_files(paths), min_size, max_workers, should_cancel, None, HashCache())
+
+
+def load_summary() -> dict:
+    """The last library scan's summary ({} when no scan has run yet)."""
+    return load_json(app_data_path("duplicates_summary.json"), {})
+
+
+def collapse_duplicates(paths, should_cancel=None):
+    """
+    Keeps one path per duplicate set. Returns (unique_paths, twins) where
+    twins maps each kept path to the identical copies that were dropped.
+    Order of `paths` is preserved.
+    """
+    report = find_duplicates_in(paths, should_cancel=should_cancel)
+    twins, dropped = {}, set()
+    order = {path: i for i, path in enumerate(paths)}
+    for group in report.groups:
+        members = sorted(group.paths, key=lambda p: order.get(p, len(order)))
+        twins[members[0]] = members[1:]
+        dropped.update(members[1:])
+    return [p for p in paths if p not in dropped], twins
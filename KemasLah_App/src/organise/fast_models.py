@@ -0,0 +1,168 @@
+"""
+fast_models.py
+--------------
+Fast mode for Smart Organise's text classifiers.
+
+The folders-plus-files branch of SmartOrganiseWorker used to train a
+300-tree RandomForest and an SVC(kernel='linear', probability=True) on
+every run. probability=True runs an internal 5-fold
+Platt calibration, so the SVC alone is fitted six times. Fast mode swaps
+that pair for two linear models on the same sparse TF-IDF matrix:
+
+    • SGDClassifier(loss='log_loss')  — logistic regression by SGD; its
+      predict_proba is a calibrated probability without any extra fits,
+      and one-vs-rest classes are fitted in parallel (n_jobs=-1)
+    • NearestCentroidClassifier        — closed-form class centroids,
+      cosine similarity turned into probabilities with a softmax
+
+The pair keeps the ensemble's interface (fit / predict / predict_proba /
+classes_), so the soft-voting and tie-breaking code is unchanged.
+
+compare_with_ensemble() cross-validates both pairs on the same data and
+reports accuracy and fit time (see AI/compare_organise_models.py).
+
+Usage:
+    from src.organise.fast_models import fast_mode_enabled, make_model_pair
+    model_a, model_b, names = make_model_pair(fast=fast_mode_enabled())
+    model_a.fit(X, labels); model_b.fit(X, labels)
+"""
+
+import time
+
+import numpy as np
+
+
+SETTINGS_KEY = "organise/fast_mode"
+DEFAULT_FAST_MODE = True
+
+# Softmax temperature applied to centroid cosine similarities (0..1)
+CENTROID_TEMPERATURE = 10.0
+
+
+def fast_mode_enabled() -> bool:
+    """Reads the Smart Organise fast-mode switch from QSettings (default on)."""
+    try:
+        from PyQt6.QtCore import QSettings
+        s = QSettings("Kemaslah", "SmartFileManager")
+        return s.value(SETTINGS_KEY, DEFAULT_FAST_MODE, bool)
+    except Exception:
+        return DEFAULT_FAST_MODE
+
+
+class NearestCentroidClassifier:
+    """Cosine nearest-centroid classifier with softmax probabilities."""
+
+    def __init__(self, temperature: float = CENTROID_TEMPERATURE):
+        self.temperature = temperature
+        self.classes_ = None
+        self.centroids_ = None
+
+    def fit(self, X, y):
+        from sklearn.preprocessing import normalize
+
+        y = np.asarray(y)
+        self.classes_ = np.unique(y)
+        X = normalize(X)
+        rows = []
+        for label in self.classes_:
+            rows.append(np.asarray(X[y == label].mean(axis=0)).ravel())
+        self.centroids_ = normalize(np.vstack(rows))
+        return self
+
+    def decision_function(self, X):
+        from sklearn.preprocessing import normalize
+        return np.asarray(normalize(X) @ self.centroids_.T)
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X) * self.temperature
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.decision_function(X), axis=1)]
+
+
+def make_sgd_classifier(n_jobs: int = -1):
+    from sklearn.linear_model import SGDClassifier
+    return SGDClassifier(
+        loss='log_loss',
+        alpha=1e-4,
+        max_iter=50,
+        tol=1e-3,
+        class_weight='balanced',
+        n_jobs=n_jobs,
+        random_state=42
+    )
+
+
+def make_ensemble_pair(C: float = 3.0):
+    """The original per-run pair: 300-tree RandomForest + probability SVC."""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.svm import SVC
+
+    rf_model = RandomForestClassifier(
+        n_estimators=300,
+        criterion='entropy',
+        class_weight='balanced',
+        random_state=42
+    )
+    svm_model = SVC(
+        kernel='linear',
+        C=C,
+        class_weight='balanced',
+        probability=True,
+        random_state=42
+    )
+    return rf_model, svm_model
+
+
+def make_model_pair(fast: bool = True, C: float = 3.0, n_jobs: int = -1):
+    """Returns (model_a, model_b, (name_a, name_b)) for soft voting."""
+    if fast:
+        return make_sgd_classifier(n_jobs), NearestCentroidClassifier(), ("SGD", "Centroid")
+    rf_model, svm_model = make_ensemble_pair(C)
+    return rf_model, svm_model, ("RF", "SVM")
+
+
+def _soft_vote(model_a, model_b, X):
+    probs = (model_a.predict_proba(X) + model_b.predict_proba(X)) / 2.0
+    return model_a.classes_[np.argmax(probs, axis=1)]
+
+
+def compare_with_ensemble(X, y, n_splits: int = 3) -> dict:
+    """
+    Stratified k-fold comparison of the fast pair against the RF + SVC
+    ensemble on the same TF-IDF matrix.
+
+    Returns {"fast": {...}, "ensemble": {...}} with mean accuracy, weighted
+    precision and fit seconds per fold.
+    """
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.metrics import accuracy_score, precision_score
+
+    y = np.asarray(y)
+    n_splits = max(2, min(n_splits, np.bincount(np.unique(y, return_inverse=True)[1]).min()))
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+
+    report = {}
+    for mode, fast in (("fast", True), ("ensemble", False)):
+        accuracy, precision, seconds = [], [], []
+        for train_idx, test_idx in folds.split(X, y):
+            model_a, model_b, _ = make_model_pair(fast)
+            start = time.perf_counter()
+            model_a.fit(X[train_idx], y[train_idx])
+            model_b.fit(X[train_idx], y[train_idx])
+            seconds.append(time.perf_counter() - start)
+
+            preds = _soft_vote(model_a, model_b, X[test_idx])
+            accuracy.append(accuracy_score(y[test_idx], preds))
+            precision.append(precision_score(y[test_idx], preds, average='weighted', zero_division=0))
+
+        report[mode] = {
+            "accuracy": float(np.mean(accuracy)),
+            "precision": float(np.mean(precision)),
+            "fit_seconds": float(np.mean(seconds)),
+            "folds": n_splits,
+        }
+    return report
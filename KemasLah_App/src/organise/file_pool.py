@@ -0,0 +1,78 @@
+"""
+file_pool.py
+------------
+Streaming file pool for Smart Organise.
+
+The loose-files branch used to os.walk every selected folder into one list
+and then split it with `f not in pool_images and f not in pool_videos` —
+a list-membership test per file, O(n²) in the size of the pool (the same
+pattern built text_files from the selection). The pool is now:
+
+    • walked lazily with os.scandir (symlinks not followed), so nothing is
+      materialised before it is needed
+    • partitioned in the same pass by an extension → bucket dictionary,
+      one hash lookup per file
+
+Text files are then read and vectorised in chunks (see
+StreamingTfidfVectorizer), so a selection holding a million files only
+keeps paths and a bounded sparse matrix in memory.
+
+Usage:
+    from src.organise.file_pool import iter_pool, partition_by_type
+    pool = partition_by_type(iter_pool(files, folders), IMAGE_EXTENSIONS, VIDEO_EXTENSIONS)
+    pool.images, pool.videos, pool.text, pool.total
+"""
+
+import os
+
+
+class FilePool:
+    __slots__ = ("images", "videos", "text")
+
+    def __init__(self):
+        self.images = []
+        self.videos = []
+        self.text = []
+
+    @property
+    def total(self) -> int:
+        return len(self.images) + len(self.videos) + len(self.text)
+
+
+def iter_pool(files, folders, should_cancel=None):
+    """Yields the selected files, then every file under the selected folders."""
+    yield from files
+    for folder in folders:
+        stack = [folder]
+        while stack:
+            if should_cancel is not None and should_cancel():
+                raise InterruptedError("Smart organise cancelled.")
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+            subfolders = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subfolders.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path
+                except OSError:
+                    continue
+            # Depth-first, in name order at every level
+            stack.extend(reversed(subfolders))
+
+
+def partition_by_type(paths, image_exts, video_exts) -> FilePool:
+    """Splits paths into images, videos and everything else in a single pass."""
+    pool = FilePool()
+    dispatch = {ext: pool.images for ext in image_exts}
+    dispatch.update({ext: pool.videos for ext in video_exts})
+    text = pool.text
+    splitext = os.path.splitext
+    for path in paths:
+        dispatch.get(splitext(path)[1].lower(), text).append(path)
+    return pool
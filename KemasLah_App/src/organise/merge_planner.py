@@ -0,0 +1,130 @@
+"""
+merge_planner.py
+----------------
+Plans folder merges for Smart Organise's "two or more folders selected"
+mode.
+
+The merge branch used to compute a dense n×n cosine_similarity over the
+folder profiles, look for the single most similar pair with a Python double
+loop, and merge just that one pair per run. The planner works on the sparse
+TF-IDF profile matrix instead:
+
+    • top_k_pairs — each folder's k most similar folders, from row blocks of
+      the sparse X·Xᵀ product (np.argpartition per block); the full n×n
+      matrix is never held in memory
+    • plan_merges — agglomerates the candidate pairs, most similar first:
+      two groups merge while the cosine similarity of their summed profiles
+      (centroid linkage) stays above the threshold, so one pass yields the
+      whole multi-step merge plan
+
+Each step moves the smaller group's root folder into the larger one (by
+entry count, as before). Roots never move before they are merged, so the
+steps can be applied in order and undone in reverse.
+
+Usage:
+    from src.organise.merge_planner import plan_merges
+    steps = plan_merges(tfidf_matrix, sizes=[len(os.listdir(f)) for f in folders])
+    for child, parent, similarity in steps:
+        shutil.move(folders[child], os.path.join(folders[parent], ...))
+"""
+
+import numpy as np
+from scipy import sparse
+
+
+DEFAULT_MERGE_THRESHOLD = 0.3
+TOP_K = 5
+
+# Upper bound on dense similarity entries held per block (rows × n)
+MAX_BLOCK_ENTRIES = 4_000_000
+
+
+def top_k_pairs(X, k: int = TOP_K, min_similarity: float = 0.0):
+    """
+    [(similarity, i, j)] with i < j, best first: every row's `k` most
+    similar other rows of the (L2-normalised) sparse matrix `X`.
+    """
+    X = sparse.csr_matrix(X)
+    n = X.shape[0]
+    if n < 2:
+        return []
+    k = min(k, n - 1)
+    XT = X.T.tocsc()
+    block_rows = max(1, min(n, MAX_BLOCK_ENTRIES // n))
+
+    best = {}
+    for start in range(0, n, block_rows):
+        stop = min(n, start + block_rows)
+        sims = (X[start:stop] @ XT).toarray()
+        rows = np.arange(stop - start)
+        sims[rows, rows + start] = -np.inf          # ignore self-similarity
+
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        for r, cols in enumerate(top):
+            i = start + r
+            for j in cols:
+                sim = sims[r, j]
+                if sim <= min_similarity:
+                    continue
+                pair = (i, int(j)) if i < j else (int(j), i)
+                if sim > best.get(pair, -1.0):
+                    best[pair] = float(sim)
+
+    return sorted(((sim, i, j) for (i, j), sim in best.items()), reverse=True)
+
+
+def _cosine(u, v) -> float:
+    norm = np.sqrt(u.multiply(u).sum() * v.multiply(v).sum())
+    return float(u.multiply(v).sum() / norm) if norm else 0.0
+
+
+def plan_merges(X, sizes, threshold: float = DEFAULT_MERGE_THRESHOLD, k: int = TOP_K, force_best: bool = True):
+    """
+    Hierarchical merge plan over the rows of `X` (one row per folder).
+
+    sizes      : entries per folder; the larger group is kept as the parent
+    threshold  : minimum centroid cosine similarity for two groups to merge
+    force_best : with no pair above the threshold, still merge the single
+                 most similar pair (the old behaviour)
+
+    Returns [(child, parent, similarity)] row indices in execution order.
+    """
+    from sklearn.preprocessing import normalize
+
+    X = normalize(sparse.csr_matrix(X))
+    pairs = top_k_pairs(X, k)
+
+    n = X.shape[0]
+    root_of = list(range(n))
+    group_size = list(sizes)
+    group_sum = [X[i] for i in range(n)]
+
+    def find(i):
+        while root_of[i] != i:
+            root_of[i] = root_of[root_of[i]]
+            i = root_of[i]
+        return i
+
+    steps = []
+    for sim, i, j in pairs:
+        if sim < threshold:
+            break
+        a, b = find(i), find(j)
+        if a == b:
+            continue
+        linkage = _cosine(group_sum[a], group_sum[b])
+        if linkage < threshold:
+            continue
+
+        parent, child = (a, b) if group_size[a] >= group_size[b] else (b, a)
+        root_of[child] = parent
+        group_sum[parent] = group_sum[parent] + group_sum[child]
+        group_size[parent] += group_size[child]
+        steps.append((child, parent, linkage))
+
+    if not steps and force_best and pairs:
+        sim, i, j = pairs[0]
+        parent, child = (i, j) if sizes[i] >= sizes[j] else (j, i)
+        steps.append((child, parent, sim))
+
+    return steps
@@ -0,0 +1,605 @@
+"""
+move_engine.py
+--------------
+Batched, journaled file moves for applying Smart Organise plans.
+
+Moving files one at a time used to cost, per file: an os.makedirs call, an
+os.path.exists probe for every "_copyN" candidate name, and a shutil.move
+that falls back to a serial copy + delete whenever the destination is on
+another drive. The engine instead:
+
+    • groups moves by destination folder — each folder is created and
+      listed once, and collision-free names are picked from that cached
+      listing (names handed out are reserved in it)
+    • tries a rename first (same filesystem: a metadata-only operation),
+      never replacing a file created in the destination since it was
+      listed — the next "_copyN" name is taken instead
+    • hands cross-device moves to a thread pool, copying with
+      os.copy_file_range where available (in-kernel, reflinks on CoW
+      filesystems), else shutil.copyfile (sendfile / fcopyfile), to an
+      engine-owned temporary name that is renamed into place, then
+      deleting the source
+    • writes every move to an append-only JSONL journal: a batch of
+      "intent" records is flushed and fsync'ed before the batch runs, and
+      "done" records follow once it finished
+
+While a run is in progress its journal is named <run_id>.partial.jsonl
+and its owner holds an exclusive lock on <run_id>.lock; closing it renames
+the journal to <run_id>.jsonl. recover_incomplete_runs() looks only at
+*.partial.jsonl files whose lock it can take (the owner crashed, so the OS
+released it), settles each unfinished move and closes the journal. It
+only ever deletes what the journal proves the engine created: a "copy"
+record names the temporary file of a cross-device copy, a "placed" record
+says that copy was renamed to its destination, and a destination that is
+a hard link to its still-present source is a half-done rename. Anything
+else found at a destination is left alone and the move marked failed.
+Runs still in progress, in this process or another, are left alone.
+
+Usage:
+    from src.organise.move_engine import MoveEngine, MoveJournal
+    journal = MoveJournal(kind="organise", label="Documents")
+    with MoveEngine(journal) as engine:
+        new_paths = engine.move_files([(src, dest_folder), ...])
+        new_path = engine.move_folder(folder, target_path)
+    journal.close()
+"""
+
+import os
+import json
+import time
+import uuid
+import errno
+import shutil
+import glob
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+from src.utils.app_data import get_app_data_dir
+
+
+JOURNAL_DIR = "journal"
+PARTIAL_SUFFIX = ".partial.jsonl"
+LOCK_SUFFIX = ".lock"
+
+BATCH_SIZE = 256
+COPY_WORKERS = 4
+COPY_CHUNK = 64 * 1024 * 1024
+
+# errno.EXDEV on POSIX; ERROR_NOT_SAME_DEVICE (17) on Windows
+_CROSS_DEVICE = {errno.EXDEV}
+_WIN_NOT_SAME_DEVICE = 17
+
+
+def journal_dir() -> str:
+    path = os.path.join(get_app_data_dir(), JOURNAL_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _is_cross_device(error: OSError) -> bool:
+    return error.errno in _CROSS_DEVICE or getattr(error, "winerror", None) == _WIN_NOT_SAME_DEVICE
+
+
+def _open_lock(path):
+    """Opens `path` and takes an exclusive, non-blocking lock on it; None when another owner holds it."""
+    f = open(path, 'a+')
+    try:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _release_lock(f, path):
+    f.close()                       # closing the handle releases the lock
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _exists_error(dst) -> FileExistsError:
+    return FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+
+
+def _rename_no_replace(src: str, dst: str):
+    """
+    os.rename that never replaces an existing `dst` (FileExistsError instead),
+    even when something appeared there after the destination was listed.
+    """
+    if os.name == "nt":
+        os.rename(src, dst)         # already refuses to overwrite on Windows
+        return
+    if os.path.isdir(src) or os.path.islink(src):
+        # rename(2) would silently replace an empty directory
+        if os.path.lexists(dst):
+            raise _exists_error(dst)
+        os.rename(src, dst)
+        return
+    try:
+        # link(2) fails atomically when dst exists
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if _is_cross_device(e):
+            raise
+        # No hard links on this filesystem (FAT, some network shares)
+        if os.path.lexists(dst):
+            raise _exists_error(dst)
+        os.rename(src, dst)
+        return
+    os.unlink(src)
+
+
+def copy_file_fast(src: str, dst: str):
+    """Copies data and metadata; refuses to overwrite `dst`."""
+    copied = False
+    with open(src, 'rb') as fsrc, open(dst, 'xb') as fdst:
+        if hasattr(os, "copy_file_range"):
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_CHUNK):
+                    pass
+                copied = True
+            except OSError:
+                pass
+    if not copied:
+        # dst was created above, so overwriting it here is safe
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def _temp_name(dst: str) -> str:
+    folder, name = os.path.split(dst)
+    return os.path.join(folder, f".{name}.{uuid.uuid4().hex[:8]}.kemaslah-copy")
+
+
+def _move_cross_device(src: str, dst: str, journal=None, seq=None):
+    """
+    Copies to an engine-owned temporary name beside `dst`, renames it into
+    place (never replacing anything) and deletes `src`. Each step is
+    journaled so recovery knows exactly which files the engine created.
+    """
+    tmp = _temp_name(dst)
+    if journal is not None:
+        journal.record("copy", sync=True, seq=seq, tmp=tmp)
+    try:
+        copy_file_fast(src, tmp)
+        _rename_no_replace(tmp, dst)
+    except BaseException:
+        _remove_partial(tmp)
+        raise
+    if journal is not None:
+        journal.record("placed", sync=True, seq=seq)
+    try:
+        os.remove(src)
+    except BaseException:
+        if os.path.exists(src):
+            _remove_partial(dst)    # the copy placed just above
+        raise
+
+
+def _remove_partial(dst):
+    try:
+        os.remove(dst)
+    except OSError:
+        pass
+
+
+def _move_folder_cross_device(src: str, dst: str):
+    # shutil.move would move src *into* an existing folder
+    if os.path.lexists(dst):
+        raise _exists_error(dst)
+    shutil.move(src, dst)
+
+
+class _Deferred(Exception):
+    """A cross-device file move, handed to the copy pool."""
+
+
+class MoveJournal:
+    """Append-only JSONL record of one run's moves (write-ahead, for crash recovery)."""
+
+    def __init__(self, kind="organise", label="", run_id=None):
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.kind = kind
+        self.label = label
+        self.path = os.path.join(journal_dir(), self.run_id + PARTIAL_SUFFIX)
+        self.final_path = os.path.join(journal_dir(), self.run_id + ".jsonl")
+        self.lock_path = os.path.join(journal_dir(), self.run_id + LOCK_SUFFIX)
+        self._seq = 0
+        # Held until close(): recovery never touches a journal whose owner is alive
+        self._lock = _open_lock(self.lock_path)
+        if self._lock is None:
+            raise RuntimeError(f"Move journal {self.run_id} is already in use.")
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._file_lock = threading.Lock()       # copy-pool threads journal too
+        self._write([{"op": "run", "run_id": self.run_id, "kind": kind, "label": label,
+                      "started": time.time()}], sync=True)
+
+    def _write(self, records, sync=False):
+        with self._file_lock:
+            self._file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def intents(self, moves) -> list[int]:
+        """Logs [(src, dst)] before they happen; returns their sequence numbers."""
+        seqs, records = [], []
+        for src, dst in moves:
+            self._seq += 1
+            seqs.append(self._seq)
+            records.append({"op": "intent", "seq": self._seq, "src": src, "dst": dst})
+        if records:
+            self._write(records, sync=True)
+        return seqs
+
+    def done(self, seqs):
+        if seqs:
+            self._write([{"op": "done", "seq": s} for s in seqs])
+
+    def failed(self, seq, error):
+        self._write([{"op": "failed", "seq": seq, "error": str(error)}])
+
+    def record(self, op, sync=False, **fields):
+        """Any other event of the run (created folders, the archive a run produced, ...)."""
+        self._write([dict(op=op, **fields)], sync=sync)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._write([{"op": "end", "finished": time.time()}], sync=True)
+        self._file.close()
+        os.replace(self.path, self.final_path)
+        _release_lock(self._lock, self.lock_path)
+
+
+def read_journal(path) -> list[dict]:
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break               # torn last line after a crash
+    except OSError:
+        pass
+    return records
+
+
+def recover_incomplete_runs() -> list[tuple[str, int]]:
+    """
+    Settles runs interrupted by a crash. Returns [(run_id, moves settled)].
+
+    Journals whose run is still in progress (its lock is held) are skipped.
+    A logged move with no outcome is marked done when only its destination
+    exists (the rename happened); otherwise it is marked failed. The
+    destination is only removed when the journal shows the engine put it
+    there, and a logged temporary copy is always removed.
+    """
+    recovered = []
+    for path in glob.glob(os.path.join(journal_dir(), "*" + PARTIAL_SUFFIX)):
+        lock_path = path[:-len(PARTIAL_SUFFIX)] + LOCK_SUFFIX
+        lock = _open_lock(lock_path)
+        if lock is None:
+            continue
+        try:
+            settled = _recover_journal(path)
+        finally:
+            _release_lock(lock, lock_path)
+        if settled is not None:
+            recovered.append((os.path.basename(path)[:-len(PARTIAL_SUFFIX)], settled))
+    return recovered
+
+
+def _same_file(a, b) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _recover_journal(path) -> int | None:
+    """Settles one crashed run's journal; returns the moves settled (None on failure)."""
+    if not os.path.exists(path):
+        return None                 # closed by its owner before the lock was taken
+    records = read_journal(path)
+    settled = {r["seq"] for r in records if r.get("op") in ("done", "failed")}
+    temp_copies = {r["seq"]: r["tmp"] for r in records if r.get("op") == "copy"}
+    placed = {r["seq"] for r in records if r.get("op") == "placed"}
+    outcomes = []
+    for r in records:
+        if r.get("op") != "intent" or r["seq"] in settled:
+            continue
+        seq, src, dst = r["seq"], r["src"], r["dst"]
+        if seq in temp_copies:
+            _remove_partial(temp_copies[seq])
+        if os.path.exists(dst) and not os.path.exists(src):
+            outcomes.append({"op": "done", "seq": seq, "recovered": True})
+            continue
+        if os.path.isfile(dst) and os.path.isfile(src) and (seq in placed or _same_file(src, dst)):
+            # The engine's own copy, or the link of a rename cut short: src is intact
+            _remove_partial(dst)
+        outcomes.append({"op": "failed", "seq": seq, "error": "interrupted", "recovered": True})
+
+    outcomes.append({"op": "end", "finished": time.time(), "recovered": True})
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(o, ensure_ascii=False) + "\n" for o in outcomes))
+        os.replace(path, path[:-len(PARTIAL_SUFFIX)] + ".jsonl")
+    except OSError as e:
+        print(f"Could not recover move journal {path}: {e}")
+        return None
+    return len(outcomes) - 1
+
+
+class MoveEngine:
+    """Moves files in destination-grouped batches, journaling every operation."""
+
+    def __init__(self, journal: MoveJournal | None = None, max_workers: int = COPY_WORKERS,
+                 should_cancel=None, progress=None):
+        self.journal = journal
+        self.should_cancel = should_cancel
+        self.progress = progress
+        self._listings: dict[str, set] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def _cancelled(self) -> bool:
+        return self.should_cancel is not None and self.should_cancel()
+
+    def _ensure_folder(self, folder):
+        """os.makedirs, journaling every folder it creates (so undo can prune them)."""
+        missing = []
+        head = folder
+        while head and not os.path.isdir(head):
+            missing.append(head)
+            parent = os.path.dirname(head)
+            if parent == head:
+                break
+            head = parent
+        if not missing:
+            return
+        os.makedirs(folder, exist_ok=True)
+        if self.journal:
+            for path in reversed(missing):
+                self.journal.record("mkdir", path=path)
+
+    def _listing(self, folder) -> set:
+        names = self._listings.get(folder)
+        if names is None:
+            self._ensure_folder(folder)
+            names = {os.path.normcase(n) for n in os.listdir(folder)}
+            self._listings[folder] = names
+        return names
+
+    def _reserve(self, folder, file_name) -> str:
+        """Collision-free name in `folder` ("name_copyN.ext"), reserved in the cached listing."""
+        names = self._listing(folder)
+        candidate = file_name
+        base, ext_name = os.path.splitext(file_name)
+        counter = 1
+        while os.path.normcase(candidate) in names:
+            candidate = f"{base}_copy{counter}{ext_name}"
+            counter += 1
+        names.add(os.path.normcase(candidate))
+        return os.path.join(folder, candidate)
+
+    def _next_free(self, dst, src) -> str:
+        """`dst` turned out to be taken: re-lists its folder and reserves another name."""
+        folder = os.path.dirname(dst)
+        try:
+            self._listing(folder).update(os.path.normcase(n) for n in os.listdir(folder))
+        except OSError:
+            pass
+        return self._reserve(folder, os.path.basename(src))
+
+    def _retarget(self, seq, src, dst, error):
+        """Journals the failed attempt at `dst` and the intent for the next free name."""
+        new_dst = self._next_free(dst, src)
+        if not self.journal:
+            return None, new_dst
+        self.journal.failed(seq, error)
+        return self.journal.intents([(src, new_dst)])[0], new_dst
+
+    def _release(self, path):
+        names = self._listings.get(os.path.dirname(path))
+        if names is not None:
+            names.discard(os.path.normcase(os.path.basename(path)))
+
+    def _run_batch(self, batch, results, pending, rename_taken=True):
+        """
+        Journals and executes [(index, src, dst)]: renames now, cross-device
+        file moves queued on the pool (appended to `pending`). A destination
+        taken since its folder was listed gets the next free name when
+        `rename_taken`, else the move fails.
+        """
+        seqs = self.journal.intents([(src, dst) for _, src, dst in batch]) \
+            if self.journal else [None] * len(batch)
+
+        done = []
+        for (i, src, dst), seq in zip(batch, seqs):
+            while True:
+                try:
+                    self._move_now(src, dst)
+                    error = None
+                except FileExistsError as e:
+                    if rename_taken:
+                        seq, dst = self._retarget(seq, src, dst, e)
+                        continue
+                    error = e
+                except _Deferred:
+                    pending.append((self._pool.submit(_move_cross_device, src, dst, self.journal, seq),
+                                    i, seq, src, dst, rename_taken))
+                    error = _Deferred
+                except OSError as e:
+                    error = e
+                break
+            if error is _Deferred:
+                continue
+            if error is not None:
+                self._fail(seq, src, dst, error)
+                continue
+            results[i] = dst
+            done.append(seq)
+        if self.journal:
+            self.journal.done(done)
+
+    def _move_now(self, src, dst):
+        """Renames, or moves a folder across devices; raises _Deferred for a cross-device file."""
+        try:
+            _rename_no_replace(src, dst)
+        except FileExistsError:
+            raise
+        except OSError as e:
+            if not _is_cross_device(e):
+                raise
+            if not os.path.isdir(src):
+                raise _Deferred() from e
+            # Folders synchronously: later moves in the batch may be inside them
+            _move_folder_cross_device(src, dst)
+
+    def _fail(self, seq, src, dst, error):
+        self._release(dst)
+        if self.journal:
+            self.journal.failed(seq, error)
+        print(f"Could not move {src}: {error}")
+
+    def _finish_pending(self, results, pending):
+        for future, i, seq, src, dst, rename_taken in pending:
+            while True:
+                try:
+                    future.result()
+                except FileExistsError as e:
+                    if rename_taken:
+                        # Taken since the folder was listed: copy again under the next free name
+                        seq, dst = self._retarget(seq, src, dst, e)
+                        future = self._pool.submit(_move_cross_device, src, dst, self.journal, seq)
+                        continue
+                    self._fail(seq, src, dst, e)
+                except Exception as e:
+                    self._fail(seq, src, dst, e)
+                else:
+                    results[i] = dst
+                    if self.journal:
+                        self.journal.done([seq])
+                break
+
+    def move_files(self, moves) -> list:
+        """
+        Moves [(source file, destination folder)]. Returns the new path per
+        move, in input order (None for moves skipped, failed or cancelled).
+        """
+        results = [None] * len(moves)
+        by_folder: dict[str, list[int]] = {}
+        for i, (src, dest_folder) in enumerate(moves):
+            by_folder.setdefault(dest_folder, []).append(i)
+
+        pending = []
+        finished = 0
+        for dest_folder, indices in by_folder.items():
+            for start in range(0, len(indices), BATCH_SIZE):
+                if self._cancelled():
+                    break
+                batch = [
+                    (i, moves[i][0], self._reserve(dest_folder, os.path.basename(moves[i][0])))
+                    for i in indices[start:start + BATCH_SIZE] if os.path.exists(moves[i][0])
+                ]
+                self._run_batch(batch, results, pending)
+
+                finished += len(batch)
+                if self.progress is not None:
+                    self.progress(f"Moved {finished}/{len(moves)} file(s)...")
+
+        self._finish_pending(results, pending)
+        return results
+
+    def move_exact(self, moves) -> list:
+        """
+        Moves [(source, exact destination path)] — used to put files back.
+        Moves whose destination is already taken are skipped. Returns the
+        destination per move (None when skipped or failed).
+        """
+        results = [None] * len(moves)
+        pending = []
+        for start in range(0, len(moves), BATCH_SIZE):
+            if self._cancelled():
+                break
+            batch = []
+            for i in range(start, min(len(moves), start + BATCH_SIZE)):
+                src, dst = moves[i]
+                # src is not checked up front: in a reversed folder merge it
+                # only reappears once an earlier move of the batch ran
+                if os.path.exists(dst):
+                    continue
+                self._ensure_folder(os.path.dirname(dst))
+                batch.append((i, src, dst))
+            self._run_batch(batch, results, pending, rename_taken=False)
+
+            if self.progress is not None:
+                self.progress(f"Restored {min(len(moves), start + BATCH_SIZE)}/{len(moves)} item(s)...")
+
+        self._finish_pending(results, pending)
+        return results
+
+    def move_folder(self, src, target_path):
+        """
+        Moves a whole folder to `target_path` ("_merged", "_merged2", ...
+        appended while taken). Returns the new path.
+        """
+        if not os.path.exists(src):
+            return None
+        requested = target_path
+        alternatives = (f"{requested}_merged" + (str(n) if n > 1 else "") for n in itertools.count(1))
+        while os.path.lexists(target_path):
+            target_path = next(alternatives)
+        self._ensure_folder(os.path.dirname(target_path))
+        seq = self.journal.intents([(src, target_path)])[0] if self.journal else None
+        while True:
+            try:
+                try:
+                    _rename_no_replace(src, target_path)
+                except FileExistsError:
+                    raise
+                except OSError as e:
+                    if not _is_cross_device(e):
+                        raise
+                    _move_folder_cross_device(src, target_path)
+            except FileExistsError as e:
+                # Created since it was checked: journal the attempt and take the next name
+                while os.path.lexists(target_path):
+                    target_path = next(alternatives)
+                if self.journal:
+                    self.journal.failed(seq, e)
+                    seq = self.journal.intents([(src, target_path)])[0]
+                continue
+            except OSError as e:
+                if self.journal:
+                    self.journal.failed(seq, e)
+                raise
+            break
+        if self.journal:
+            self.journal.done([seq])
+        self._listings.pop(os.path.dirname(target_path), None)
+        return target_path
@@ -0,0 +1,119 @@
+"""
+pipelines.py
+------------
+Concurrent pipelines for Smart Organise.
+
+In the mixed branches of SmartOrganiseWorker the CNN media pipeline ran to
+completion before the first text file was read. The two barely compete for
+the same resources — media is PyTorch inference (which releases the GIL
+inside its kernels), text is sandboxed extraction (a separate process) and
+sparse sklearn — so they now overlap:
+
+    • PipelineRunner.start() runs a pipeline on a background thread and
+      run() runs one on the calling thread; join() waits for both and
+      re-raises the first failure (a real error wins over a cancellation)
+    • split_cpu_budget() divides the machine's cores between pipelines,
+      and torch_threads() caps PyTorch's intra-op pool to the media share
+      while the media pipeline runs
+    • each pipeline fills its own OrganisePlan, merged in a fixed order
+      afterwards, so the preview and metrics read the same as before
+
+Wall-clock time drops from the sum of the two pipelines to roughly the
+slower of them.
+
+Usage:
+    from src.organise.pipelines import PipelineRunner, split_cpu_budget
+    budget = split_cpu_budget({"media": MEDIA_SHARE, "text": TEXT_SHARE})
+    runner = PipelineRunner(on_failure=worker.stop)
+    runner.start("media", classify_media, images, budget["media"])
+    runner.run("text", sort_text, text_files, budget["text"])
+    results = runner.join()
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+
+# Relative CPU shares when both pipelines run. CNN inference scales with
+# cores; the text pipeline is mostly one sandbox process plus sparse sklearn.
+MEDIA_SHARE = 3
+TEXT_SHARE = 1
+
+
+def split_cpu_budget(shares: dict) -> dict:
+    """{name: share} -> {name: cores}, proportional, at least one core each."""
+    cores = os.cpu_count() or 1
+    total = sum(shares.values()) or 1
+    return {name: max(1, int(cores * share / total)) for name, share in shares.items()}
+
+
+@contextmanager
+def torch_threads(count):
+    """Limits PyTorch's intra-op thread pool for the duration of the block."""
+    try:
+        import torch
+    except ImportError:
+        torch = None
+    previous = torch.get_num_threads() if torch is not None else None
+    if torch is not None:
+        torch.set_num_threads(max(1, count))
+    try:
+        yield
+    finally:
+        if torch is not None:
+            torch.set_num_threads(previous)
+
+
+class PipelineRunner:
+    """Runs named pipelines side by side and collects their results and timings."""
+
+    def __init__(self, on_failure=None):
+        # on_failure lets a failing pipeline cancel the others (e.g. worker.stop)
+        self.on_failure = on_failure
+        self.timings = {}
+        self.results = {}
+        self._errors = []
+        self._threads = []
+        self._names = []
+        self._started = time.perf_counter()
+
+    def _call(self, name, fn, args):
+        self._names.append(name)
+        start = time.perf_counter()
+        try:
+            self.results[name] = fn(*args)
+        except BaseException as e:
+            self._errors.append(e)
+            if self.on_failure is not None:
+                self.on_failure()
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def start(self, name, fn, *args):
+        """Runs fn(*args) on a background thread."""
+        thread = threading.Thread(target=self._call, args=(name, fn, args),
+                                  name=f"organise-{name}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def run(self, name, fn, *args):
+        """Runs fn(*args) on the calling thread, alongside anything started."""
+        self._call(name, fn, args)
+
+    def join(self) -> dict:
+        """Waits for every pipeline; returns {name: result} or raises the first failure."""
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        self.timings["wall"] = time.perf_counter() - self._started
+        if self._errors:
+            real = [e for e in self._errors if not isinstance(e, InterruptedError)]
+            raise (real or self._errors)[0]
+        return self.results
+
+    def report(self) -> str:
+        """One metrics line: per-pipeline seconds and the overall wall clock."""
+        parts = [f"{name} {self.timings[name]:.1f}s" for name in self._names if name in self.timings]
+        return f"   • Pipelines: {' ‖ '.join(parts)} → wall {self.timings.get('wall', 0.0):.1f}s\n"
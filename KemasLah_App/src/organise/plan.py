@@ -0,0 +1,312 @@
+"""
+plan.py
+-------
+Dry-run plans for Smart Organise.
+
+SmartOrganiseWorker used to interleave analysis with shutil.move, so when a
+user rejected the result and tried again the whole analysis (reading,
+vectorising, training, CNN inference) ran a second time. Organising is now
+split in two:
+
+    plan  — the worker analyses the selection and returns an OrganisePlan:
+            a list of steps (source → destination, reason, confidence)
+            without touching a single file
+    apply — apply_plan() executes a plan (or the subset of steps the user
+            kept in the preview) through the journaled MoveEngine and
+            returns the move history for undo
+
+Plans serialise to JSON. OrganisePlanCache keeps the last plan for each
+selection under ~/.kemaslah/organise_plans/, stamped with the (size, mtime)
+of every file in the selection, so re-running Smart Organise on an
+unchanged selection (e.g. after "Undo Changes") previews instantly.
+
+A saved plan can be applied (and any past run undone) without the GUI:
+
+    python -m src.organise.plan apply my_plan.json
+    python -m src.organise.plan history
+    python -m src.organise.plan undo <run_id>
+
+Usage:
+    from src.organise.plan import OrganisePlan, OrganisePlanCache, apply_plan
+    plan = OrganisePlan(current_view_path)
+    plan.add_move(path, dest_folder, reason="cnn", confidence=0.91, message="✓ CNN: ...")
+    move_history, applied, run_id = apply_plan(plan, plan.steps)
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from itertools import groupby
+
+from src.organise.move_engine import MoveEngine, MoveJournal, recover_incomplete_runs
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
+
+
+PLAN_VERSION = 1
+RESULTS_HEADER = "🤖 AI Smart Organise Complete!\n\n"
+
+# Cached plans kept on disk (oldest removed first)
+MAX_CACHED_PLANS = 50
+
+
+class PlanStep:
+    """
+    One planned move.
+
+    kind        : "file"   — destination is the folder the file goes into
+                             (name collisions are resolved when applied)
+                  "folder" — destination is the folder's new full path
+    reason      : short machine-readable reason ("keyword", "consensus", ...)
+    confidence  : 0..1, or None when the method has no confidence
+    message     : the line shown for this step in the results list
+    """
+
+    __slots__ = ("kind", "source", "destination", "reason", "confidence", "message")
+
+    def __init__(self, kind, source, destination, reason="", confidence=None, message=""):
+        self.kind = kind
+        self.source = source
+        self.destination = destination
+        self.reason = reason
+        self.confidence = confidence
+        self.message = message
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data) -> "PlanStep":
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+class OrganisePlan:
+    """Everything a Smart Organise run decided, ready to preview or apply."""
+
+    def __init__(self, current_view_path, steps=None, notes=None, metrics_message="",
+                 unsupported_files=None, error_message="", created=None):
+        self.current_view_path = current_view_path
+        self.steps: list[PlanStep] = steps or []
+        self.notes: list[str] = notes or []
+        self.metrics_message = metrics_message
+        self.unsupported_files = unsupported_files or []
+        self.error_message = error_message
+        self.created = created or time.time()
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add_move(self, source, dest_folder, reason="", confidence=None, message=""):
+        self.steps.append(PlanStep("file", source, dest_folder, reason, confidence, message))
+
+    def add_folder_move(self, source, target_path, reason="", confidence=None, message=""):
+        self.steps.append(PlanStep("folder", source, target_path, reason, confidence, message))
+
+    def note(self, line):
+        """A results line that is not tied to a move (warnings, skipped files)."""
+        self.notes.append(line)
+
+    def merge(self, other: "OrganisePlan"):
+        """Appends another plan's steps and notes (e.g. from a concurrent pipeline)."""
+        self.steps.extend(other.steps)
+        self.notes.extend(other.notes)
+        self.unsupported_files.extend(other.unsupported_files)
+
+    def results_message(self, steps=None) -> str:
+        """The results text for `steps` (default: every step) plus the notes."""
+        steps = self.steps if steps is None else steps
+        lines = [s.message for s in steps if s.message] + self.notes
+        return RESULTS_HEADER + "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PLAN_VERSION,
+            "current_view_path": self.current_view_path,
+            "created": self.created,
+            "steps": [s.to_dict() for s in self.steps],
+            "notes": self.notes,
+            "metrics_message": self.metrics_message,
+            "unsupported_files": self.unsupported_files,
+            "error_message": self.error_message,
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "OrganisePlan":
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError("Unsupported organise plan version.")
+        return cls(
+            data["current_view_path"],
+            steps=[PlanStep.from_dict(s) for s in data.get("steps", [])],
+            notes=data.get("notes", []),
+            metrics_message=data.get("metrics_message", ""),
+            unsupported_files=data.get("unsupported_files", []),
+            error_message=data.get("error_message", ""),
+            created=data.get("created"),
+        )
+
+    def save(self, path):
+        save_json_atomic(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path) -> "OrganisePlan":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def selection_stamp(selected_paths) -> str:
+    """Hash of (path, size, mtime) for every file in the selection (folders walked)."""
+    digest = hashlib.sha1()
+    for path in sorted(selected_paths):
+        if os.path.isdir(path):
+            files = []
+            for root, dirs, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names)
+        else:
+            files = [path]
+        for file_path in sorted(files):
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            digest.update(f"{file_path}\0{st.st_size}\0{st.st_mtime}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+class OrganisePlanCache:
+    """Last plan per (selection, view folder, mode), valid while the selection is unchanged."""
+
+    DIR_NAME = "organise_plans"
+
+    @staticmethod
+    def _key(selected_paths, current_view_path, mode):
+        raw = json.dumps([sorted(os.path.normcase(p) for p in selected_paths),
+                          os.path.normcase(current_view_path), mode])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, selected_paths, current_view_path, mode):
+        return app_data_path(self.DIR_NAME, f"{self._key(selected_paths, current_view_path, mode)}.json")
+
+    def get(self, selected_paths, current_view_path, mode=""):
+        data = load_json(self._path(selected_paths, current_view_path, mode), {})
+        if not data or data.get("stamp") != selection_stamp(selected_paths):
+            return None
+        try:
+            return OrganisePlan.from_dict(data["plan"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def put(self, selected_paths, current_view_path, mode, plan: OrganisePlan):
+        path = self._path(selected_paths, current_view_path, mode)
+        try:
+            save_json_atomic(path, {"stamp": selection_stamp(selected_paths), "plan": plan.to_dict()})
+        except OSError as e:
+            print(f"Could not cache organise plan: {e}")
+            return
+        self._prune(os.path.dirname(path))
+
+    @staticmethod
+    def _prune(folder):
+        try:
+            entries = sorted(
+                (os.path.getmtime(os.path.join(folder, n)), os.path.join(folder, n))
+                for n in os.listdir(folder) if n.endswith(".json")
+            )
+        except OSError:
+            return
+        for _, stale in entries[:-MAX_CACHED_PLANS]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def apply_plan(plan: OrganisePlan, steps=None, should_cancel=None, progress=None):
+    """
+    Executes `steps` (default: all of the plan's steps) in order through the
+    journaled MoveEngine: runs of file steps are moved as one batch, folder
+    steps one at a time.
+
+    Returns (move_history, applied_steps, run_id); move_history is
+    [(new_path, old_path)] in execution order, and run_id names the journal
+    that rollback_run() undoes. Steps whose source has disappeared since
+    planning are skipped.
+    """
+    steps = plan.steps if steps is None else steps
+    move_history, applied = [], []
+
+    journal = MoveJournal(kind="organise", label=plan.current_view_path)
+    try:
+        with MoveEngine(journal, should_cancel=should_cancel, progress=progress) as engine:
+            for kind, group in groupby(steps, key=lambda s: s.kind):
+                if should_cancel is not None and should_cancel():
+                    break
+                group = list(group)
+
+                if kind == "file":
+                    new_paths = engine.move_files([(s.source, s.destination) for s in group])
+                else:
+                    new_paths = []
+                    for step in group:
+                        if progress is not None:
+                            progress(f"Moving folder {os.path.basename(step.source)}...")
+                        try:
+                            new_paths.append(engine.move_folder(step.source, step.destination))
+                        except OSError as e:
+                            print(f"Could not move {step.source}: {e}")
+                            new_paths.append(None)
+
+                for step, new_path in zip(group, new_paths):
+                    if new_path is not None:
+                        move_history.append((new_path, step.source))
+                        applied.append(step)
+    finally:
+        journal.close()
+
+    return move_history, applied, journal.run_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply saved Smart Organise plans and undo past runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    apply_cmd = sub.add_parser("apply", help="execute every step of a plan file")
+    apply_cmd.add_argument("plan_file")
+    show_cmd = sub.add_parser("show", help="print a plan's steps without moving anything")
+    show_cmd.add_argument("plan_file")
+    undo_cmd = sub.add_parser("undo", help="roll back a finished organise or archive run")
+    undo_cmd.add_argument("run_id")
+    sub.add_parser("history", help="list runs that can be undone")
+    args = parser.parse_args(argv)
+
+    if args.command == "history":
+        from src.organise.undo_journal import list_runs
+        for run in list_runs():
+            state = "undone" if run.undone else f"{run.moves} move(s)"
+            print(f"{run.run_id}  {run.kind:<8} {state:<14} {run.label}")
+        return 0
+
+    if args.command == "undo":
+        from src.organise.undo_journal import rollback_run
+        recover_incomplete_runs()
+        restored, skipped = rollback_run(args.run_id, progress=print)
+        print(f"Restored {restored} item(s); {skipped} skipped.")
+        return 0
+
+    plan = OrganisePlan.load(args.plan_file)
+    if args.command == "show":
+        for step in plan.steps:
+            conf = f" ({step.confidence:.0%})" if step.confidence is not None else ""
+            print(f"{step.source} -> {step.destination} [{step.reason}]{conf}")
+        return 0
+
+    for run_id, settled in recover_incomplete_runs():
+        print(f"Recovered interrupted run {run_id} ({settled} move(s) settled).")
+    move_history, applied, run_id = apply_plan(plan, progress=print)
+    print(f"Applied {len(applied)}/{len(plan.steps)} step(s). Undo with: "
+          f"python -m src.organise.plan undo {run_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+profile_store.py
+----------------
+Persistent per-folder content profiles for Smart Organise.
+
+Every Smart Organise run used to os.walk each selected destination folder and
+re-read every file in it (read_ultimate_precision_content) just to build
+training documents or folder-similarity profiles — even though destination
+folders rarely change between runs. The store keeps, per folder, each file's
+weighted token segments (the input of WeightedTfidfVectorizer's term
+counts) together with the (size, mtime) fingerprint they were built from:
+
+    ~/.kemaslah/organise_profiles/<sha1 of folder>.json
+        {"folder": ..., "files": {relative path: {"fingerprint": [size, mtime],
+                                                  "segments": [[tokens, weight], ...],
+                                                  "unsupported": bool}}}
+
+A run only stats the folder's files: unchanged ones are served from the
+store, added or modified ones are read, and deleted ones are dropped. The
+cost of preparing a destination folder scales with what changed since the
+last run, not with the size of the folder.
+
+Usage:
+    from src.organise.profile_store import FolderProfileStore
+    store = FolderProfileStore(read_document)     # read_document(path) → (doc, unsupported)
+    entries, stats = store.documents(folder)
+    for path, doc, unsupported in entries:
+        ...
+    # stats → {"reused": 120, "read": 3, "removed": 1}
+"""
+
+import os
+import hashlib
+
+from src.extraction.token_pipeline import OrganiseDocument
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
+
+
+STORE_VERSION = 1
+
+
+def _fingerprint(path):
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime]
+    except OSError:
+        return None
+
+
+def _walk_files(folder):
+    """Every file under `folder`, in a stable (sorted) order."""
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+class FolderProfileStore:
+    """Fingerprint-checked cache of OrganiseDocuments for every file in a folder."""
+
+    DIR_NAME = "organise_profiles"
+
+    def __init__(self, read_document):
+        self.read_document = read_document
+
+    @classmethod
+    def _cache_path(cls, folder):
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(folder)).encode("utf-8")).hexdigest()[:16]
+        return app_data_path(cls.DIR_NAME, f"{key}.json")
+
+    def _load(self, folder):
+        data = load_json(self._cache_path(folder), {})
+        if data.get("version") != STORE_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def _save(self, folder, files):
+        try:
+            save_json_atomic(self._cache_path(folder), {
+                "version": STORE_VERSION,
+                "folder": folder,
+                "files": files,
+            })
+        except OSError as e:
+            print(f"Could not save organise profile for {folder}: {e}")
+
+    def documents(self, folder, max_tokens=None):
+        """
+        [(path, OrganiseDocument, unsupported)] for every file under `folder`,
+        reading only files that are new or changed since the last call.
+
+        With `max_tokens`, no new files are read once the documents returned
+        so far hold that many tokens (unchanged records are still kept).
+        Errors from read_document (e.g. InterruptedError) propagate; files
+        read before the error are saved first.
+        """
+        old = self._load(folder)
+        files = {}
+        entries = []
+        stats = {"reused": 0, "read": 0, "removed": 0}
+        total_tokens = 0
+        completed = False
+
+        try:
+            for path in _walk_files(folder):
+                fingerprint = _fingerprint(path)
+                if fingerprint is None:
+                    continue
+                key = os.path.relpath(path, folder).replace(os.sep, '/')
+                record = old.get(key)
+                fresh = record is not None and record.get("fingerprint") == fingerprint
+
+                if max_tokens is not None and total_tokens > max_tokens:
+                    if fresh:
+                        files[key] = record
+                    continue
+
+                if fresh:
+                    doc = OrganiseDocument.from_record(record["segments"])
+                    stats["reused"] += 1
+                else:
+                    doc, unsupported = self.read_document(path)
+                    record = {"fingerprint": fingerprint, "segments": doc.to_record(), "unsupported": unsupported}
+                    stats["read"] += 1
+
+                files[key] = record
+                total_tokens += doc.token_count
+                entries.append((path, doc, record.get("unsupported", False)))
+            completed = True
+        finally:
+            if not completed:
+                # Interrupted: keep the records this run never reached
+                for key, record in old.items():
+                    files.setdefault(key, record)
+            stats["removed"] = len(old.keys() - files.keys())
+            if stats["read"] or stats["removed"]:
+                self._save(folder, files)
+
+        return entries, stats
@@ -0,0 +1,137 @@
+"""
+topic_model.py
+--------------
+"Categorise by topic" for Smart Organise, using the pretrained BBC News
+models that AI/train_ai.py saves (tfidf_vectorizer.pkl plus
+ensemble_model.pkl / svm_model.pkl / rf_model.pkl).
+
+Every other organise mode trains new models on each run. Topic mode trains
+nothing: the artifacts are loaded once per process (joblib, memory-mapped so
+large forests are paged in rather than copied) and files are classified in
+batches through a pure transform + predict path:
+
+    raw text batch → vectorizer.transform → model.predict (+ predict_proba)
+
+Loose documents land in the five BBC folders — Business & Finance,
+Technology & IT, Politics & Government, Sports, Entertainment & Media.
+
+The most complete artifact available is used: the ensemble, then the SVM,
+then the Random Forest. benchmark() times the classify path in files/sec
+(see AI/benchmark_topic_model.py).
+
+Usage:
+    from src.organise.topic_model import TopicClassifier, topic_mode_enabled
+    classifier = TopicClassifier.shared()        # None when the .pkl files are missing
+    for label, confidence in classifier.classify(texts):
+        ...
+"""
+
+import os
+import time
+import threading
+
+
+SETTINGS_KEY = "organise/topic_mode"
+DEFAULT_TOPIC_MODE = False
+
+MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "AI"
+)
+VECTORIZER_FILE = "tfidf_vectorizer.pkl"
+# Preferred first
+MODEL_FILES = ("ensemble_model.pkl", "svm_model.pkl", "rf_model.pkl")
+
+DEFAULT_BATCH_SIZE = 256
+
+
+def topic_mode_enabled() -> bool:
+    """Reads the "Categorise by topic" switch from QSettings (default off)."""
+    try:
+        from PyQt6.QtCore import QSettings
+        s = QSettings("Kemaslah", "SmartFileManager")
+        return s.value(SETTINGS_KEY, DEFAULT_TOPIC_MODE, bool)
+    except Exception:
+        return DEFAULT_TOPIC_MODE
+
+
+class TopicClassifier:
+    """Pretrained vectorizer + classifier, loaded once and shared by every run."""
+
+    _shared = None
+    _shared_error = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, model_dir=MODEL_DIR):
+        import joblib
+
+        start = time.perf_counter()
+        vectorizer_path = os.path.join(model_dir, VECTORIZER_FILE)
+        if not os.path.exists(vectorizer_path):
+            raise FileNotFoundError(f"{VECTORIZER_FILE} not found in {model_dir} — run AI/train_ai.py.")
+
+        for name in MODEL_FILES:
+            model_path = os.path.join(model_dir, name)
+            if os.path.exists(model_path):
+                break
+        else:
+            raise FileNotFoundError(f"No pretrained topic model found in {model_dir} — run AI/train_ai.py.")
+
+        self.vectorizer = joblib.load(vectorizer_path, mmap_mode='r')
+        self.model = joblib.load(model_path, mmap_mode='r')
+        self.model_name = name
+        # A hard-voting ensemble has no predict_proba
+        self.has_confidence = hasattr(self.model, "predict_proba")
+        # Fails fast on artifacts pickled by an incompatible scikit-learn
+        self.classify(["probe"])
+        self.load_seconds = time.perf_counter() - start
+
+    @classmethod
+    def shared(cls, model_dir=MODEL_DIR):
+        """The process-wide classifier, or None if the artifacts cannot be loaded."""
+        with cls._shared_lock:
+            if cls._shared is None and cls._shared_error is None:
+                try:
+                    cls._shared = cls(model_dir)
+                except Exception as e:
+                    print(f"Topic model unavailable: {e}")
+                    cls._shared_error = str(e)
+            return cls._shared
+
+    @property
+    def categories(self) -> list[str]:
+        return [str(c) for c in self.model.classes_]
+
+    def classify(self, texts, batch_size=DEFAULT_BATCH_SIZE, with_confidence=True) -> list[tuple]:
+        """[(category, confidence or None)] for each text, in order."""
+        results = []
+        want_confidence = with_confidence and self.has_confidence
+        for start in range(0, len(texts), batch_size):
+            X = self.vectorizer.transform(texts[start:start + batch_size])
+            if want_confidence:
+                probs = self.model.predict_proba(X)
+                best = probs.argmax(axis=1)
+                classes = self.model.classes_
+                results.extend((str(classes[j]), float(probs[i, j])) for i, j in enumerate(best))
+            else:
+                results.extend((str(label), None) for label in self.model.predict(X))
+        return results
+
+
+def benchmark(texts, batch_size=DEFAULT_BATCH_SIZE, repeats=3, with_confidence=True, classifier=None) -> dict:
+    """Best-of-`repeats` classify throughput on `texts` (reading excluded)."""
+    classifier = classifier or TopicClassifier.shared()
+    if classifier is None:
+        raise FileNotFoundError("Pretrained topic model not available.")
+    best = float("inf")
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        classifier.classify(texts, batch_size=batch_size, with_confidence=with_confidence)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "model": classifier.model_name,
+        "files": len(texts),
+        "batch_size": batch_size,
+        "seconds": best,
+        "files_per_second": len(texts) / best if best > 0 else float("inf"),
+        "load_seconds": classifier.load_seconds,
+    }
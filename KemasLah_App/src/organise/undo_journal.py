@@ -0,0 +1,185 @@
+"""
+undo_journal.py
+---------------
+Undo for any past Smart Organise or Smart Archive run, read from the move
+journals MoveEngine writes to ~/.kemaslah/journal/.
+
+The results dialog used to keep move_history in memory only, and rolled
+back with a serial shutil.move loop plus an os.listdir per move to spot
+empty folders — once the dialog closed (or the app crashed) nothing could
+be undone. Every run's journal now survives on disk, and rollback_run():
+
+    • replays the run's completed moves in reverse, in journaled batches
+      through MoveEngine.move_exact (renames; cross-device copies in
+      parallel) — the rollback is itself a journaled "undo" run
+    • for archive runs whose staging folder was zipped away, extracts each
+      archived item from the zip back to where it came from, then removes
+      the zip
+    • removes the folders the run created, deepest first, in one pass
+      (os.rmdir simply fails on folders that are not empty)
+    • appends an "undone" record to the original journal
+
+Usage:
+    from src.organise.undo_journal import list_runs, rollback_run
+    for run in list_runs():
+        print(run.run_id, run.kind, run.moves, run.undone)
+    restored, skipped = rollback_run(run.run_id)
+"""
+
+import os
+import glob
+import json
+import time
+import zipfile
+import shutil
+
+from src.organise.move_engine import MoveEngine, MoveJournal, journal_dir, read_journal, PARTIAL_SUFFIX
+
+
+# Runs listed in the undo history (newest first)
+MAX_LISTED_RUNS = 100
+
+
+class RunSummary:
+    __slots__ = ("run_id", "kind", "label", "started", "moves", "undone", "path")
+
+    def __init__(self, run_id, kind, label, started, moves, undone, path):
+        self.run_id = run_id
+        self.kind = kind
+        self.label = label
+        self.started = started
+        self.moves = moves
+        self.undone = undone
+        self.path = path
+
+
+def _journal_path(run_id) -> str:
+    return os.path.join(journal_dir(), f"{run_id}.jsonl")
+
+
+def _completed_moves(records):
+    """[(src, dst)] of every move that finished, in the order they were made."""
+    intents = {r["seq"]: (r["src"], r["dst"]) for r in records if r.get("op") == "intent"}
+    done = [r["seq"] for r in records if r.get("op") == "done"]
+    return [intents[seq] for seq in sorted(done) if seq in intents]
+
+
+def summarise(path) -> RunSummary | None:
+    records = read_journal(path)
+    if not records or records[0].get("op") != "run":
+        return None
+    head = records[0]
+    return RunSummary(
+        head.get("run_id"), head.get("kind", ""), head.get("label", ""), head.get("started", 0),
+        sum(1 for r in records if r.get("op") == "done"),
+        any(r.get("op") == "undone" for r in records),
+        path,
+    )
+
+
+def list_runs(kinds=("organise", "archive"), limit=MAX_LISTED_RUNS) -> list[RunSummary]:
+    """Finished runs that moved something, newest first."""
+    paths = [p for p in glob.glob(os.path.join(journal_dir(), "*.jsonl")) if not p.endswith(PARTIAL_SUFFIX)]
+    paths.sort(reverse=True)            # run ids start with a timestamp
+    runs = []
+    for path in paths:
+        run = summarise(path)
+        if run is None or run.kind not in kinds or not run.moves:
+            continue
+        runs.append(run)
+        if len(runs) >= limit:
+            break
+    return runs
+
+
+def _zip_mtime(info):
+    """A member's stored modification time as a timestamp (ZIP keeps local time)."""
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return None
+
+
+def _extract_from_archive(zip_path, staging, moves, progress=None):
+    """Restores archived items (dst inside `staging`) from the zip to their src, with their mtimes."""
+    restored, skipped = 0, 0
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = zf.infolist()
+        for i, (src, dst) in enumerate(moves, start=1):
+            prefix = os.path.relpath(dst, staging).replace(os.sep, '/')
+            members = [m for m in infos if m.filename == prefix or m.filename.startswith(prefix + '/')]
+            if not members or os.path.exists(src):
+                skipped += 1
+                continue
+            folders = []
+            for info in members:
+                rest = info.filename[len(prefix):].lstrip('/')
+                target = os.path.join(src, *rest.split('/')) if rest else src
+                mtime = _zip_mtime(info)
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    folders.append((target, mtime))
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zf.open(info) as fsrc, open(target, 'wb') as fdst:
+                    shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+                if mtime is not None:
+                    os.utime(target, (mtime, mtime))
+            # Folders last, deepest first: writing their contents moved their mtimes
+            for target, mtime in sorted(folders, key=lambda f: f[0].count(os.sep), reverse=True):
+                if mtime is not None:
+                    os.utime(target, (mtime, mtime))
+            restored += 1
+            if progress is not None:
+                progress(f"Restored {i}/{len(moves)} item(s) from {os.path.basename(zip_path)}...")
+    return restored, skipped
+
+
+def _prune_created_folders(records):
+    created = [r["path"] for r in records if r.get("op") == "mkdir"]
+    for folder in sorted(set(created), key=lambda p: p.count(os.sep), reverse=True):
+        try:
+            os.rmdir(folder)
+        except OSError:
+            pass
+
+
+def rollback_run(run_id, should_cancel=None, progress=None) -> tuple[int, int]:
+    """
+    Undoes a finished run. Returns (items restored, items skipped because
+    they were moved or replaced since). Raises ValueError for an unknown or
+    already undone run.
+    """
+    path = _journal_path(run_id)
+    records = read_journal(path)
+    if not records:
+        raise ValueError(f"No journal found for run {run_id}.")
+    if any(r.get("op") == "undone" for r in records):
+        raise ValueError("This run has already been undone.")
+
+    moves = _completed_moves(records)
+    archive = next((r for r in records if r.get("op") == "archive"), None)
+    undo_journal = MoveJournal(kind="undo", label=run_id)
+    try:
+        if archive is not None and not os.path.isdir(archive["staging"]) and os.path.exists(archive["zip"]):
+            restored, skipped = _extract_from_archive(archive["zip"], archive["staging"], moves, progress)
+            if not skipped:
+                os.remove(archive["zip"])
+                undo_journal.record("removed", path=archive["zip"])
+        else:
+            back = [(dst, src) for src, dst in reversed(moves)]
+            with MoveEngine(undo_journal, should_cancel=should_cancel, progress=progress) as engine:
+                results = engine.move_exact(back)
+            restored = sum(1 for r in results if r is not None)
+            skipped = len(back) - restored
+    finally:
+        undo_journal.close()
+
+    _prune_created_folders(records)
+    if archive is not None:
+        _prune_created_folders([{"op": "mkdir", "path": archive["staging"]}])
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"op": "undone", "by": undo_journal.run_id, "at": time.time(),
+                            "restored": restored, "skipped": skipped}) + "\n")
+    return restored, skipped
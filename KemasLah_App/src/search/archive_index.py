@@ -0,0 +1,136 @@
+"""
+archive_index.py
+----------------
+Searchable cache of ZIP archive contents (e.g. Smart Archive's
+Kemaslah_Archive/Archive_YYYY-MM-DD.zip files).
+
+Each archive is read once through the extraction sandbox — members are
+streamed from the central directory, never unpacked to disk — and its
+member names plus lower-cased text are stored in
+~/.kemaslah/archive_index/, keyed by the archive's (size, mtime).
+Later searches reuse the cache until the archive changes.
+
+Archive members are addressed with virtual paths that look like a folder
+inside the archive:
+
+    C:/Users/me/Documents/Kemaslah_Archive/Archive_2024-05-01.zip/reports/q1.pdf
+
+Usage:
+    from src.search.archive_index import ArchiveIndex
+    archives = ArchiveIndex(extractor)           # a BudgetedExtractor
+    for member_path, text in archives.members(zip_path):
+        ...
+    for member_name, text in archives.entries(zip_path):   # names relative to the archive
+        ...
+"""
+
+import os
+import hashlib
+
+from src.extraction.text_extractor import file_extension
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
+
+
+ARCHIVE_TYPES = {'zip'}
+
+# Text kept per member in the cache (characters)
+MAX_MEMBER_CHARS = 20000
+
+
+def is_archive(path: str) -> bool:
+    return file_extension(path) in ARCHIVE_TYPES
+
+
+def member_path(archive_path: str, member_name: str) -> str:
+    return os.path.join(archive_path, *member_name.split('/'))
+
+
+def split_archive_path(path: str):
+    """(archive_path, member_name) for a virtual member path, else (None, None)."""
+    head = path
+    while True:
+        parent = os.path.dirname(head)
+        if parent == head:
+            return None, None
+        if is_archive(parent) and os.path.isfile(parent):
+            member = os.path.relpath(path, parent).replace(os.sep, '/')
+            return parent, member
+        head = parent
+
+
+def path_exists(path: str) -> bool:
+    """os.path.exists that also accepts archive member paths whose archive still exists."""
+    return os.path.exists(path) or split_archive_path(path)[0] is not None
+
+
+def describe_path(path: str) -> str:
+    """Display name: 'q1.pdf (in Archive_2024-05-01.zip)' for archive members."""
+    if os.path.exists(path):
+        return os.path.basename(path)
+    archive, _ = split_archive_path(path)
+    if archive is None:
+        return os.path.basename(path)
+    return f"{os.path.basename(path)} (in {os.path.basename(archive)})"
+
+
+def _fingerprint(path):
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime]
+    except OSError:
+        return None
+
+
+class ArchiveIndex:
+    """Per-archive member cache backed by one JSON file per archive."""
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+
+    @staticmethod
+    def _cache_path(archive_path):
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(archive_path)).encode("utf-8")).hexdigest()[:16]
+        return app_data_path("archive_index", f"{key}.json")
+
+    def cached_members(self, archive_path):
+        """Cached [(member_name, text)] if the archive is unchanged since it was read, else None."""
+        cache = load_json(self._cache_path(archive_path), {})
+        if cache.get("fingerprint") != _fingerprint(archive_path):
+            return None
+        return [tuple(m) for m in cache.get("members", [])]
+
+    def entries(self, archive_path, should_cancel=None):
+        """[(member_name, lower-cased text)], read through the cache."""
+        members = self.cached_members(archive_path)
+        if members is not None:
+            return members
+
+        fingerprint = _fingerprint(archive_path)
+        entries = self.extractor.extract_archive(
+            archive_path, should_cancel=should_cancel,
+            max_pages=5, max_paragraphs=50, max_rows=100, max_chars=MAX_MEMBER_CHARS
+        )
+        members = [
+            (name, " ".join(chunks).lower()[:MAX_MEMBER_CHARS])
+            for name, chunks in entries
+        ]
+        if should_cancel is None or not should_cancel():
+            try:
+                save_json_atomic(self._cache_path(archive_path), {
+                    "archive": archive_path,
+                    "fingerprint": fingerprint,
+                    "members": members,
+                })
+            except OSError as e:
+                print(f"Could not cache archive index for {archive_path}: {e}")
+        return members
+
+    def members(self, archive_path, should_cancel=None):
+        """
+        [(virtual member path, lower-cased text)] for every file in the archive.
+        Raises the extractor's errors (ExtractionError, InterruptedError).
+        """
+        return [
+            (member_path(archive_path, name), text)
+            for name, text in self.entries(archive_path, should_cancel)
+        ]
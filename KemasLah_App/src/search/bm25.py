@@ -0,0 +1,64 @@
+"""
+bm25.py
+-------
+Okapi BM25 ranking over a SemanticIndex's stored term-count matrix.
+
+The semantic index already keeps raw (hashed) term counts per document, so
+BM25 needs no extra storage: document lengths come from the same rows, and
+the index keeps document frequencies and the total length up to date as
+rows are added or retired, so scoring a batch never recounts the corpus.
+Only the query's columns are touched when scoring.
+
+Usage:
+    from src.search.bm25 import BM25Scorer
+    scorer = BM25Scorer(index)
+    scores = scorer.score("quarterly revenue")            # one score per index row
+    scores = scorer.score("quarterly revenue", rows=[3, 7])
+"""
+
+import numpy as np
+
+
+class BM25Scorer:
+    """
+    Parameters
+    ----------
+    index : SemanticIndex
+        Supplies term counts per row, live document frequencies and the
+        total document length, plus the `vectorizer`.
+    k1, b : standard BM25 term-saturation and length-normalisation knobs.
+    """
+
+    def __init__(self, index, k1: float = 1.5, b: float = 0.75):
+        self.index = index
+        self.k1 = k1
+        self.b = b
+
+    def query_columns(self, text: str) -> np.ndarray:
+        q = self.index.vectorizer.transform([text]).tocsr()
+        return np.unique(q.indices)
+
+    def score(self, text: str, rows=None) -> np.ndarray:
+        """BM25 scores for every index row (or only `rows`, in that order)."""
+        n_docs = len(self.index)
+        if n_docs == 0:
+            return np.zeros(0 if rows is None else len(rows))
+
+        if rows is None:
+            sub = self.index.matrix
+            doc_len = np.asarray(sub.sum(axis=1)).ravel()
+        else:
+            sub, doc_len = self.index.rows(rows)
+
+        cols = self.query_columns(text)
+        if len(cols) == 0 or sub.shape[0] == 0:
+            return np.zeros(sub.shape[0])
+
+        df = self.index.doc_freq[cols]
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        avgdl = (self.index.total_length / n_docs) or 1.0
+
+        tf = sub[:, cols].toarray()
+        norm = self.k1 * (1.0 - self.b + self.b * doc_len / avgdl)
+        contrib = tf * (self.k1 + 1.0) / (tf + norm[:, None])
+        return contrib @ idf
@@ -0,0 +1,293 @@
+"""
+filename_index.py
+-----------------
+Persistent trigram index over file and folder names in the user's library
+folders (Desktop, Documents, Downloads, Pictures, Videos, Music).
+
+Smart Search used to find filename matches by walking every directory under
+the current folder and testing `query in name.lower()` one entry at a time.
+With this index, filename hits are a handful of set intersections:
+
+    • every name is split into lower-case trigrams ("\\x00" marks the start
+      of the name, so prefixes are trigrams too)
+    • substring  — intersect the postings of the query's trigrams, then
+                   confirm with the query matcher
+    • prefix     — the same, anchored with the start marker ("rep*")
+    • fuzzy      — rank names by the share of query trigrams they contain
+                   (used when nothing matches exactly)
+
+The list of names and each directory's mtime are stored in
+~/.kemaslah/filename_index.json; postings are rebuilt in memory when the
+index loads. refresh() is incremental: a directory is only re-listed when its
+mtime changed (entries were added, removed or renamed inside it).
+
+Usage:
+    from src.search.filename_index import FilenameIndex
+    index = FilenameIndex.shared()
+    index.refresh()                                     # background thread
+    total, hits = index.find(QueryMatcher("invoice"), under="C:/Users/me/Documents")
+    # hits → [(name, full_path, is_dir), ...] (first `limit`), total → full count
+"""
+
+import os
+import threading
+from collections import defaultdict
+
+from src.search.query_matcher import term_variant
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
+
+
+LIBRARY_FOLDERS = ("Desktop", "Documents", "Downloads", "Pictures", "Videos", "Music")
+
+START_MARK = "\x00"
+
+# Share of the query's trigrams a name must contain to count as a fuzzy hit
+FUZZY_THRESHOLD = 0.3
+
+
+def get_library_roots():
+    home = os.path.expanduser("~")
+    folders = [os.path.join(home, name) for name in LIBRARY_FOLDERS]
+    return [folder for folder in folders if os.path.isdir(folder)]
+
+
+def name_trigrams(name: str) -> set:
+    s = START_MARK + name.lower()
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def text_trigrams(text: str, anchored: bool = False) -> set:
+    s = (START_MARK if anchored else "") + text.lower()
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _is_under(path: str, folder: str) -> bool:
+    path, folder = os.path.normcase(path), os.path.normcase(folder.rstrip("\\/"))
+    return path.startswith(folder + os.sep)
+
+
+class FilenameIndex:
+    """In-memory trigram postings over library folder names, persisted between runs."""
+
+    FILE_NAME = "filename_index.json"
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "FilenameIndex":
+        """The process-wide index (loaded from disk on first use)."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self, roots=None, path: str | None = None):
+        self.roots = [os.path.abspath(r) for r in (roots or get_library_roots())]
+        self.path = path or app_data_path(self.FILE_NAME)
+
+        self.paths: list = []           # id → full path (None once removed)
+        self.names: list[str] = []      # id → lower-case name
+        self.is_dir: list[bool] = []
+        self.ids: dict[str, int] = {}
+        self.children: dict[str, set] = defaultdict(set)
+        self.dir_mtimes: dict[str, float] = {}
+        self.postings: dict[str, set] = defaultdict(set)
+
+        self.refreshed = False          # True after one full refresh this session
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load()
+
+    # ── persistence ──────────────────────────────────────────────────────────
+
+    def _load(self):
+        data = load_json(self.path, {})
+        if [os.path.normcase(r) for r in data.get("roots", [])] != [os.path.normcase(r) for r in self.roots]:
+            return
+        with self._lock:
+            for path, is_dir in data.get("entries", []):
+                self._add(path, is_dir)
+            self.dir_mtimes = data.get("dir_mtimes", {})
+        self._dirty = False
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = [[p, d] for p, d in zip(self.paths, self.is_dir) if p is not None]
+            snapshot = {"roots": self.roots, "entries": entries, "dir_mtimes": dict(self.dir_mtimes)}
+            self._dirty = False
+        try:
+            save_json_atomic(self.path, snapshot)
+        except OSError as e:
+            print(f"Could not save filename index: {e}")
+
+    # ── maintenance ──────────────────────────────────────────────────────────
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def ready(self) -> bool:
+        """Usable for queries: loaded from disk or refreshed at least once."""
+        return bool(self.ids) or self.refreshed
+
+    def covers(self, folder: str) -> bool:
+        folder = os.path.abspath(folder)
+        return any(
+            os.path.normcase(folder) == os.path.normcase(r) or _is_under(folder, r)
+            for r in self.roots
+        )
+
+    def _add(self, path, is_dir):
+        if path in self.ids:
+            return
+        entry_id = len(self.paths)
+        name = os.path.basename(path).lower()
+        self.paths.append(path)
+        self.names.append(name)
+        self.is_dir.append(bool(is_dir))
+        self.ids[path] = entry_id
+        self.children[os.path.dirname(path)].add(entry_id)
+        for gram in name_trigrams(name):
+            self.postings[gram].add(entry_id)
+        self._dirty = True
+
+    def _remove(self, path):
+        entry_id = self.ids.pop(path, None)
+        if entry_id is None:
+            return
+        for gram in name_trigrams(self.names[entry_id]):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self.postings[gram]
+        self.children[os.path.dirname(path)].discard(entry_id)
+        if self.is_dir[entry_id]:
+            for child_id in list(self.children.pop(path, ())):
+                self._remove(self.paths[child_id])
+            self.dir_mtimes.pop(path, None)
+        self.paths[entry_id] = None
+        self._dirty = True
+
+    def _refresh_dir(self, folder):
+        """Brings one directory's entries up to date; returns its subdirectories."""
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            return []
+
+        with self._lock:
+            known = {self.paths[i]: self.is_dir[i] for i in self.children.get(folder, ())}
+            if self.dir_mtimes.get(folder) == mtime:
+                return [p for p, d in known.items() if d]
+
+        current = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith(('.', '$')):
+                        continue
+                    try:
+                        current[entry.path] = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError:
+            return []
+
+        with self._lock:
+            for path, was_dir in known.items():
+                if path not in current or current[path] != was_dir:
+                    self._remove(path)
+            for path, is_dir in current.items():
+                self._add(path, is_dir)
+            self.dir_mtimes[folder] = mtime
+            self._dirty = True
+
+        return [p for p, d in current.items() if d]
+
+    def refresh(self, should_cancel=None) -> None:
+        """Incrementally re-syncs every library root with the disk."""
+        stack = list(self.roots)
+        while stack:
+            if should_cancel is not None and should_cancel():
+                return
+            stack.extend(self._refresh_dir(stack.pop()))
+        self.refreshed = True
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def _candidates(self, text, anchored=False):
+        """Entry ids whose names contain every trigram of `text` (None = too short to narrow)."""
+        grams = text_trigrams(text, anchored)
+        if not grams:
+            return None
+        postings = sorted((self.postings.get(g, set()) for g in grams), key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def _collect(self, ids, accept, under, limit):
+        if ids is None:
+            ids = self.ids.values()
+        hits = []
+        for i in ids:
+            path = self.paths[i]
+            if path is None or not accept(self.names[i]):
+                continue
+            if under is not None and not _is_under(path, under):
+                continue
+            hits.append(i)
+        # Folders first, then shorter (closer) names
+        hits.sort(key=lambda i: (not self.is_dir[i], len(self.names[i]), self.names[i]))
+        return len(hits), [(os.path.basename(self.paths[i]), self.paths[i], self.is_dir[i]) for i in hits[:limit]]
+
+    def find(self, matcher, under=None, limit=100):
+        """Substring search with QueryMatcher semantics. Returns (total, first `limit` hits)."""
+        with self._lock:
+            candidates = None
+            for term in matcher.terms:
+                ids = self._candidates(term_variant(term))
+                if ids is None:
+                    if matcher.match_any:
+                        candidates = None
+                        break
+                    continue
+                if candidates is None:
+                    candidates = ids
+                elif matcher.match_any:
+                    candidates = candidates | ids
+                else:
+                    candidates = candidates & ids
+            return self._collect(candidates, matcher.matches, under, limit)
+
+    def find_prefix(self, prefix, under=None, limit=100):
+        prefix = prefix.lower()
+        with self._lock:
+            ids = self._candidates(prefix, anchored=True)
+            return self._collect(ids, lambda name: name.startswith(prefix), under, limit)
+
+    def find_fuzzy(self, text, under=None, limit=100, threshold=FUZZY_THRESHOLD):
+        """Names sharing at least `threshold` of the query's trigrams, best first."""
+        grams = text_trigrams(text.replace(" ", ""), anchored=True)
+        if not grams:
+            return 0, []
+        with self._lock:
+            shared = defaultdict(int)
+            for g in grams:
+                for i in self.postings.get(g, ()):
+                    shared[i] += 1
+            needed = threshold * len(grams)
+            scored = [
+                (count, i) for i, count in shared.items()
+                if count >= needed and (under is None or _is_under(self.paths[i], under))
+            ]
+            scored.sort(key=lambda s: (-s[0], len(self.names[s[1]])))
+            return len(scored), [
+                (os.path.basename(self.paths[i]), self.paths[i], self.is_dir[i]) for _, i in scored[:limit]
+            ]
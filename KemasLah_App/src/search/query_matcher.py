@@ -0,0 +1,217 @@
+"""
+query_matcher.py
+----------------
+Multi-term query matching for Smart Search (SearchWorker) and Deep Search
+(DeepSearchWorker).
+
+Every query term — plus the simple stem variant produced by the same
+suffix rule Smart Organise's tokeniser uses (token_pipeline.py) — is
+compiled into a single Aho-Corasick automaton. A document is scanned once,
+regardless of how many terms the query has, and the scan returns per-term
+hit counts that the callers use for ranking.
+
+Query syntax:
+    "invoice"                 → documents containing "invoice" (or "invoices", ...)
+    "annual report"           → documents containing every term; the exact
+                                phrase scores a bonus
+    "invoice or receipt"      → documents containing any term
+    "or"                      → documents containing "or" (a query made only
+                                of OR keywords is taken literally)
+
+Usage:
+    from src.search.query_matcher import QueryMatcher
+    matcher = QueryMatcher("annual reports")
+
+    hits = matcher.scan(text.lower())
+    if hits.is_match:
+        print(hits.score, hits.term_hits)   # → 7, {"annual": 3, "reports": 4}
+"""
+
+import re
+from collections import deque
+
+
+# Same suffix rule as src/extraction/token_pipeline.py
+STEM_SUFFIX_RE = re.compile(r'(ing|tion|ment|ies|s)$')
+
+# Stems shorter than this are too generic to match on ("station" → "sta")
+MIN_STEM_LENGTH = 4
+
+OR_KEYWORDS = {"or", "|"}
+
+
+def stem_term(term: str) -> str:
+    """Strips one common English suffix from a lowercase term."""
+    return STEM_SUFFIX_RE.sub('', term)
+
+
+def term_variant(term: str) -> str:
+    """
+    The pattern actually compiled for `term`.
+
+    Matching is substring based (like the original `query in text`), so a
+    stem always covers its surface form: "invoice" matches "invoices",
+    "invoiced" and "invoice". Only the shortest useful variant is kept so
+    each occurrence is counted once.
+    """
+    stem = stem_term(term)
+    if stem != term and len(stem) >= MIN_STEM_LENGTH:
+        return stem
+    return term
+
+
+class AhoCorasickAutomaton:
+    """
+    Classic Aho-Corasick automaton over a fixed set of patterns.
+    Scanning is O(len(text) + matches) whatever the number of patterns.
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = list(patterns)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if pattern:
+                self._insert(pattern, pattern_id)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str, pattern_id: int):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pattern_id)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Inherit the outputs of the failure state so matches that
+                # end inside a longer pattern are still reported
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def count(self, text: str, counts: list[int] | None = None) -> list[int]:
+        """Adds the number of occurrences of every pattern in `text` to `counts`."""
+        if counts is None:
+            counts = [0] * len(self.patterns)
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in out[state]:
+                counts[pattern_id] += 1
+        return counts
+
+
+class QueryHits:
+    """Per-term hit counts for one document (or one stream of chunks)."""
+
+    __slots__ = ("matcher", "counts")
+
+    def __init__(self, matcher: "QueryMatcher"):
+        self.matcher = matcher
+        self.counts = [0] * len(matcher.automaton.patterns)
+
+    @property
+    def term_hits(self) -> dict[str, int]:
+        return {
+            term: self.counts[pid]
+            for term, pid in zip(self.matcher.terms, self.matcher.term_pattern_ids)
+        }
+
+    @property
+    def phrase_hits(self) -> int:
+        pid = self.matcher.phrase_pattern_id
+        return self.counts[pid] if pid is not None else 0
+
+    @property
+    def is_match(self) -> bool:
+        term_counts = [self.counts[pid] for pid in self.matcher.term_pattern_ids]
+        if not term_counts:
+            return False
+        if self.matcher.match_any:
+            return any(term_counts)
+        return all(term_counts)
+
+    @property
+    def score(self) -> int:
+        """Total term occurrences; each exact phrase hit counts once per term."""
+        term_total = sum(self.counts[pid] for pid in self.matcher.term_pattern_ids)
+        return term_total + self.phrase_hits * len(self.matcher.terms)
+
+
+class QueryMatcher:
+    """
+    Compiles a search query into one automaton and scans lowercase text.
+
+    Parameters
+    ----------
+    query : str
+        Raw user query. Terms are separated by whitespace; an "or" token
+        switches the query from match-all to match-any.
+    """
+
+    def __init__(self, query: str):
+        self.query = query.lower().strip()
+
+        tokens = [t for t in self.query.split() if t]
+        self.match_any = any(t in OR_KEYWORDS for t in tokens)
+        terms = [t for t in tokens if t not in OR_KEYWORDS]
+        if not terms:
+            # A query of nothing but "or" / "|" is searched for literally
+            self.match_any = False
+            terms = tokens
+
+        # Preserve order but drop duplicate terms
+        self.terms: list[str] = list(dict.fromkeys(terms))
+
+        patterns: list[str] = []
+        pattern_ids: dict[str, int] = {}
+
+        def add_pattern(p):
+            if p not in pattern_ids:
+                pattern_ids[p] = len(patterns)
+                patterns.append(p)
+            return pattern_ids[p]
+
+        self.term_pattern_ids = [add_pattern(term_variant(t)) for t in self.terms]
+
+        self.phrase_pattern_id = None
+        if len(self.terms) > 1 and not self.match_any:
+            self.phrase_pattern_id = add_pattern(" ".join(self.terms))
+
+        self.automaton = AhoCorasickAutomaton(patterns)
+
+    def new_hits(self) -> QueryHits:
+        return QueryHits(self)
+
+    def feed(self, hits: QueryHits, text: str) -> QueryHits:
+        """Accumulates matches from one chunk (page, paragraph, row) into `hits`."""
+        if text:
+            self.automaton.count(text, hits.counts)
+        return hits
+
+    def scan(self, text: str) -> QueryHits:
+        """Scans a whole lowercase document in a single pass."""
+        return self.feed(self.new_hits(), text)
+
+    def matches(self, text: str) -> bool:
+        return self.scan(text).is_match
@@ -0,0 +1,160 @@
+"""
+result_cache.py
+---------------
+In-memory cache of Smart Search and Deep Search results, keyed by
+(query, root folder, mode), so repeating a search while browsing doesn't
+re-read every document.
+
+Results are stored per directory together with that directory's stamp:
+
+    (directory mtime, newest file mtime inside it, number of files)
+
+The directory mtime moves when entries are added, removed or renamed; the
+newest-file mtime catches documents edited in place. On a repeat search each
+directory's stamp is recomputed (a few stat calls) and only directories
+whose stamp changed are searched again — unchanged ones replay their cached
+hits without opening a single file.
+
+Entries are evicted least-recently-used once the estimated size of all
+cached results exceeds the memory cap.
+
+Usage:
+    from src.search.result_cache import SearchResultCache, directory_stamp
+    cache = SearchResultCache.shared()
+    entry = cache.get("invoice", "C:/Users/me/Documents", "smart")
+    hits = entry.hits_for(folder, directory_stamp(folder)) if entry else None
+    ...
+    cache.put("invoice", "C:/Users/me/Documents", "smart", CachedSearch(segments))
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Rough per-directory bookkeeping cost used by the size estimate
+_SEGMENT_OVERHEAD = 200
+
+
+def directory_stamp(folder, files=None):
+    """
+    [dir mtime, newest file mtime, file count] for `folder`, or None if it is
+    gone. `files` (names, as from os.walk) saves a directory listing.
+    """
+    try:
+        dir_mtime = os.stat(folder).st_mtime
+        if files is None:
+            with os.scandir(folder) as entries:
+                files = [e.name for e in entries if e.is_file()]
+    except OSError:
+        return None
+
+    newest, count = dir_mtime, 0
+    for name in files:
+        try:
+            mtime = os.stat(os.path.join(folder, name)).st_mtime
+        except OSError:
+            continue
+        count += 1
+        if mtime > newest:
+            newest = mtime
+    return [dir_mtime, newest, count]
+
+
+def _estimate_size(value) -> int:
+    if isinstance(value, str):
+        return 50 + 2 * len(value)
+    if isinstance(value, (list, tuple, set)):
+        return 60 + sum(_estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return 100 + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    return 32
+
+
+class CachedSearch:
+    """
+    One cached search.
+
+    segments : {folder: (stamp, hits)} — hits found directly inside `folder`
+    result   : optional whole-search payload (e.g. Deep Search's ranked list),
+               valid only while every segment's stamp is unchanged
+    """
+
+    __slots__ = ("segments", "result", "size")
+
+    def __init__(self, segments=None, result=None):
+        self.segments = segments or {}
+        self.result = result
+        self.size = sum(
+            _SEGMENT_OVERHEAD + _estimate_size(folder) + _estimate_size(hits)
+            for folder, (_, hits) in self.segments.items()
+        ) + _estimate_size(result)
+
+    def hits_for(self, folder, stamp):
+        """Cached hits for `folder` if its stamp is unchanged, else None."""
+        segment = self.segments.get(folder)
+        if segment is None or stamp is None or segment[0] != stamp:
+            return None
+        return segment[1]
+
+    def is_fresh(self) -> bool:
+        """True when no directory the search visited has changed since."""
+        return bool(self.segments) and all(
+            directory_stamp(folder) == stamp for folder, (stamp, _) in self.segments.items()
+        )
+
+
+class SearchResultCache:
+    """Process-wide LRU of CachedSearch entries under a memory cap."""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "SearchResultCache":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query, root, mode):
+        return (" ".join(query.lower().split()), os.path.normcase(os.path.abspath(root)), mode)
+
+    def get(self, query, root, mode):
+        key = self._key(query, root, mode)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, query, root, mode, entry: CachedSearch):
+        key = self._key(query, root, mode)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
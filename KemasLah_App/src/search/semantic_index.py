@@ -0,0 +1,317 @@
+"""
+semantic_index.py
+-----------------
+Persistent, incrementally maintained TF-IDF index for Deep Search's
+"Semantic AI Match" fallback.
+
+Previously every semantic search built a fresh TfidfVectorizer and ran
+fit_transform over the query plus every document in the folder. Now:
+
+    • documents are vectorised once with a stateless HashingVectorizer
+      (no vocabulary, so nothing ever needs refitting)
+    • raw term counts are stored per folder in ~/.kemaslah/semantic_index/
+      together with each file's (size, mtime) fingerprint
+    • IDF statistics are derived from document frequencies that are kept
+      up to date row by row, so adding or removing a file only touches its
+      own row
+    • new rows are appended as CSR blocks; replaced or removed rows are
+      retired in place, and the blocks are stacked once, when the index is
+      saved or queried
+    • a query is one sparse transform, one sparse mat-vec and an
+      argpartition top-k
+
+Scores are the same smoothed-IDF, L2-normalised cosine similarity that
+TfidfVectorizer + cosine_similarity produced.
+
+Usage:
+    from src.search.semantic_index import SemanticIndex
+    index = SemanticIndex("C:/Users/me/Documents")
+    index.sync(valid_files, docs)      # only changed files are re-vectorised
+    index.save()
+    index.query("quarterly revenue", top_k=5)   # → [(path, score), ...]
+"""
+
+import os
+import bisect
+import hashlib
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from src.search.archive_index import split_archive_path
+from src.utils.app_data import app_data_path, load_json, save_json_atomic
+
+
+N_FEATURES = 2 ** 18
+
+
+def file_fingerprint(path):
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime]
+    except OSError:
+        pass
+    # Archive members are fingerprinted by their archive
+    archive, _ = split_archive_path(path)
+    if archive is None:
+        return None
+    try:
+        st = os.stat(archive)
+    except OSError:
+        return None                 # the archive went away since it was checked
+    return [st.st_size, st.st_mtime]
+
+
+def make_hashing_vectorizer() -> HashingVectorizer:
+    # Same tokenisation as the per-query TfidfVectorizer it replaces
+    return HashingVectorizer(
+        n_features=N_FEATURES,
+        token_pattern=r'(?u)\b\w+\b',
+        alternate_sign=False,
+        norm=None,
+    )
+
+
+class SemanticIndex:
+    """Hashed document-term count matrix for one folder, persisted between runs."""
+
+    def __init__(self, folder: str, scope: str = "folder"):
+        # scope "folder" indexes a folder's own files; "tree" a whole subtree
+        self.folder = os.path.abspath(folder)
+        self.scope = scope
+        key_source = f"{scope}:{os.path.normcase(self.folder)}"
+        key = hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+        self._matrix_path = app_data_path("semantic_index", f"{key}.npz")
+        self._meta_path = app_data_path("semantic_index", f"{key}.json")
+
+        self.vectorizer = make_hashing_vectorizer()
+        self.fingerprints: dict[str, list] = {}
+
+        # Rows are appended in CSR blocks and stacked only by _compact(); a
+        # replaced or removed row stays in its block until then, but leaves _rows
+        self._blocks: list = []
+        self._block_starts: list[int] = []
+        self._block_lengths: list = []
+        self._row_paths: list[str] = []
+        self._rows: dict[str, int] = {}
+
+        # Corpus statistics over live rows, kept up to date row by row
+        self.doc_freq = np.zeros(N_FEATURES, dtype=np.int64)
+        self.total_length = 0.0
+
+        self._idf = None
+        self._norms = None
+        self._dirty = False
+        self._load()
+
+    # ── persistence ──────────────────────────────────────────────────────────
+
+    def _load(self):
+        meta = load_json(self._meta_path, {})
+        paths = meta.get("paths", [])
+        if not paths or not os.path.exists(self._matrix_path):
+            return
+        try:
+            matrix = sparse.load_npz(self._matrix_path).tocsr()
+        except Exception as e:
+            print(f"Semantic index unreadable, rebuilding: {e}")
+            return
+        if matrix.shape != (len(paths), N_FEATURES):
+            return
+
+        self.fingerprints = meta.get("fingerprints", {})
+        self._append(paths, matrix)
+        self._dirty = False
+
+    def save(self):
+        if not self._dirty:
+            return
+        matrix = self.matrix
+        tmp_path = self._matrix_path + ".tmp.npz"
+        sparse.save_npz(tmp_path, matrix, compressed=False)
+        os.replace(tmp_path, self._matrix_path)
+        save_json_atomic(self._meta_path, {
+            "folder": self.folder,
+            "paths": self._row_paths,
+            "fingerprints": self.fingerprints,
+        })
+        self._dirty = False
+
+    # ── row storage ──────────────────────────────────────────────────────────
+
+    def _append(self, paths, block):
+        block.sum_duplicates()          # unique columns per row, for doc_freq
+        lengths = np.asarray(block.sum(axis=1)).ravel()
+        self._block_starts.append(len(self._row_paths))
+        self._blocks.append(block)
+        self._block_lengths.append(lengths)
+        for p in paths:
+            self._rows[p] = len(self._row_paths)
+            self._row_paths.append(p)
+        self.doc_freq += np.bincount(block.indices, minlength=N_FEATURES)
+        self.total_length += float(lengths.sum())
+        self._invalidate()
+
+    def _locate(self, row):
+        b = bisect.bisect_right(self._block_starts, row) - 1
+        return b, row - self._block_starts[b]
+
+    def _retire(self, path):
+        row = self._rows.pop(path, None)
+        if row is None:
+            return
+        b, offset = self._locate(row)
+        block = self._blocks[b]
+        self.doc_freq[block.indices[block.indptr[offset]:block.indptr[offset + 1]]] -= 1
+        self.total_length -= float(self._block_lengths[b][offset])
+        self._invalidate()
+
+    def _compact(self):
+        """Stacks the blocks into one matrix, dropping retired rows."""
+        if len(self._blocks) <= 1 and len(self._rows) == len(self._row_paths):
+            return
+        if self._blocks:
+            matrix = sparse.vstack(self._blocks, format="csr")
+            lengths = np.concatenate(self._block_lengths)
+        else:
+            matrix = sparse.csr_matrix((0, N_FEATURES), dtype=np.float64)
+            lengths = np.zeros(0)
+        if len(self._rows) != len(self._row_paths):
+            # _rows is in insertion order, which is row order
+            keep = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            matrix = matrix[keep]
+            lengths = lengths[keep]
+            self._row_paths = list(self._rows)
+            self._rows = {p: i for i, p in enumerate(self._row_paths)}
+        self._blocks = [matrix]
+        self._block_starts = [0]
+        self._block_lengths = [lengths]
+
+    @property
+    def matrix(self):
+        """Every live row as one CSR matrix, in row order."""
+        self._compact()
+        if not self._blocks:
+            return sparse.csr_matrix((0, N_FEATURES), dtype=np.float64)
+        return self._blocks[0]
+
+    def rows(self, rows):
+        """(term counts, document lengths) of `rows`, in that order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return sparse.csr_matrix((0, N_FEATURES), dtype=np.float64), np.zeros(0)
+        owners = np.searchsorted(self._block_starts, rows, side="right") - 1
+        order = np.argsort(owners, kind="stable")
+        parts, lengths = [], []
+        for b in np.unique(owners):
+            offsets = rows[owners == b] - self._block_starts[b]
+            parts.append(self._blocks[b][offsets])
+            lengths.append(self._block_lengths[b][offsets])
+        # Undo the grouping by block
+        restore = np.empty_like(order)
+        restore[order] = np.arange(len(order))
+        matrix = sparse.vstack(parts, format="csr")[restore]
+        return matrix, np.concatenate(lengths)[restore]
+
+    # ── maintenance ──────────────────────────────────────────────────────────
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, path):
+        return path in self._rows
+
+    @property
+    def paths(self) -> list[str]:
+        """Indexed paths, in row order."""
+        return list(self._rows)
+
+    def stale_paths(self, paths) -> list[str]:
+        """Paths that are new or whose size/mtime changed since they were indexed."""
+        return [p for p in paths if self.fingerprints.get(p) != file_fingerprint(p)]
+
+    def row_indices(self, paths) -> list[int]:
+        return [self._rows[p] for p in paths if p in self._rows]
+
+    def remove_missing(self, live_paths) -> set:
+        """Drops rows for files not in `live_paths`; returns the dropped paths."""
+        dropped = set(self._rows).difference(live_paths)
+        for p in dropped:
+            self._retire(p)
+            self.fingerprints.pop(p, None)
+        return dropped
+
+    def upsert(self, paths, texts):
+        """Adds or replaces the rows for `paths` (texts are the extracted contents)."""
+        if not paths:
+            return
+        for p in paths:
+            self._retire(p)
+
+        self._append(paths, self.vectorizer.transform(texts).tocsr())
+        for p in paths:
+            self.fingerprints[p] = file_fingerprint(p)
+
+    def sync(self, paths, texts):
+        """
+        Makes the index mirror exactly `paths`: rows for files no longer
+        present are dropped and only new/modified files are re-vectorised.
+        """
+        self.remove_missing(paths)
+
+        stale = set(self.stale_paths(paths))
+        if stale:
+            pairs = [(p, t) for p, t in zip(paths, texts) if p in stale]
+            self.upsert([p for p, _ in pairs], [t for _, t in pairs])
+
+    def _invalidate(self):
+        self._idf = None
+        self._norms = None
+        self._dirty = True
+
+    # ── scoring ──────────────────────────────────────────────────────────────
+
+    def _ensure_statistics(self):
+        if self._idf is not None:
+            return
+        matrix = self.matrix
+        # Smoothed IDF, as TfidfVectorizer(smooth_idf=True)
+        self._idf = np.log((1.0 + len(self)) / (1.0 + self.doc_freq)) + 1.0
+
+        weighted_sq = (matrix.data * self._idf[matrix.indices]) ** 2
+        row_sq = sparse.csr_matrix(
+            (weighted_sq, matrix.indices, matrix.indptr), shape=matrix.shape
+        ).sum(axis=1)
+        self._norms = np.sqrt(np.asarray(row_sq).ravel())
+
+    def query(self, text: str, top_k: int = 5, min_score: float = 0.001):
+        """Returns up to `top_k` (path, cosine score) pairs, best first."""
+        if not self._rows:
+            return []
+        self._ensure_statistics()
+
+        q = self.vectorizer.transform([text]).tocsr()
+        if q.nnz == 0:
+            return []
+
+        q_weights = q.data * self._idf[q.indices]
+        q_norm = np.sqrt(np.dot(q_weights, q_weights))
+        # X·diag(idf)·q_w  — the document side of the IDF weighting folds into the query vector
+        w = sparse.csr_matrix(
+            (q_weights * self._idf[q.indices], (q.indices, np.zeros_like(q.indices))),
+            shape=(N_FEATURES, 1),
+        )
+        dots = np.asarray((self.matrix @ w).todense()).ravel()
+
+        denom = self._norms * q_norm
+        scores = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+        k = min(top_k, len(scores))
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        ranked = candidates[np.argsort(-scores[candidates])]
+
+        return [(self._row_paths[i], float(scores[i])) for i in ranked if scores[i] > min_score]
@@ -0,0 +1,55 @@
+"""
+app_data.py
+-----------
+Location of KemasLah's local, per-user state (indexes, caches, journals).
+
+Everything the desktop app persists between runs lives under one folder so
+it can be inspected or wiped in a single place:
+
+    ~/.kemaslah/            (override with the KEMASLAH_DATA_DIR env var)
+
+Usage:
+    from src.utils.app_data import app_data_path
+    path = app_data_path("extraction_quarantine.json")
+"""
+
+import os
+import json
+import tempfile
+
+
+def get_app_data_dir() -> str:
+    base = os.getenv("KEMASLAH_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".kemaslah")
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+def app_data_path(*parts: str) -> str:
+    """Absolute path of a file inside the app data folder (parent dirs created)."""
+    path = os.path.join(get_app_data_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path: str, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json_atomic(path: str, data):
+    """Writes JSON via a temp file + rename so a crash never leaves half a file."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
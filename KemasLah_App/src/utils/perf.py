@@ -0,0 +1,172 @@
+"""
+perf.py
+-------
+Stage-level timing for the organise, deep-search and CNN workers.
+
+The organise metrics report said how precise a run was but not where its
+time went — a slow run could have been PDF parsing, TF-IDF, model fitting
+or the file moves. A PerfRecorder collects named spans:
+
+    perf = PerfRecorder("organise")
+    with perf.span("read") as s:
+        ...
+        s.add(items=1, bytes=os.path.getsize(path))
+
+Spans with the same name accumulate (calls, wall seconds, CPU seconds,
+items, bytes), so a span around every file read adds up to one "read" row.
+CPU time is the calling thread's (time.thread_time), which keeps stages
+that run concurrently on different threads apart; work done in the
+extraction sandbox process shows up as wall time only. Recording is
+thread-safe.
+
+report() renders the "⏱️ STAGE TIMINGS" block for the AI Report panel and
+log() appends one JSON line per run to ~/.kemaslah/perf_log.jsonl for trend
+analysis (rotated to perf_log.1.jsonl past MAX_LOG_BYTES).
+
+Usage:
+    from src.utils.perf import PerfRecorder
+    perf = PerfRecorder("deep_search")
+    with perf.span("score", items=len(docs)):
+        ...
+    print(perf.report())
+    perf.log(query="invoice")
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from src.utils.app_data import app_data_path
+
+
+LOG_NAME = "perf_log.jsonl"
+MAX_LOG_BYTES = 5 * 1024 * 1024
+
+
+class StageStats:
+    __slots__ = ("calls", "wall", "cpu", "items", "bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.items = 0
+        self.bytes = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls, "wall": round(self.wall, 4), "cpu": round(self.cpu, 4),
+            "items": self.items, "bytes": self.bytes,
+        }
+
+
+class Span:
+    """Handle yielded by PerfRecorder.span(); add() counts work done inside it."""
+
+    __slots__ = ("items", "bytes")
+
+    def __init__(self, items=0, bytes=0):
+        self.items = items
+        self.bytes = bytes
+
+    def add(self, items=0, bytes=0):
+        self.items += items
+        self.bytes += bytes
+
+
+def _format_bytes(n) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class PerfRecorder:
+    """Named, accumulating wall/CPU spans for one worker run."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started = time.time()
+        self._start_wall = time.perf_counter()
+        self._stages: dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, items=0, bytes=0):
+        handle = Span(items, bytes)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield handle
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            with self._lock:
+                stats = self._stages.get(name)
+                if stats is None:
+                    stats = self._stages[name] = StageStats()
+                stats.calls += 1
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.items += handle.items
+                stats.bytes += handle.bytes
+
+    def stages(self) -> dict:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stages.items()}
+
+    @property
+    def total_wall(self) -> float:
+        return time.perf_counter() - self._start_wall
+
+    def report(self, title="⏱️ STAGE TIMINGS") -> str:
+        """Metrics block, one line per stage in the order stages were first used."""
+        stages = self.stages()
+        if not stages:
+            return ""
+        lines = [f"{title}:"]
+        for name, s in stages.items():
+            detail = f"{s['wall']:.2f}s wall, {s['cpu']:.2f}s CPU"
+            if s["items"]:
+                detail += f", {s['items']:,} item(s)"
+            if s["bytes"]:
+                detail += f", {_format_bytes(s['bytes'])}"
+            lines.append(f"   • {name}: {detail}")
+        lines.append(f"   • total: {self.total_wall:.2f}s wall")
+        return "\n".join(lines) + "\n\n"
+
+    def log(self, **extra):
+        """Appends this run to the JSONL performance log (never raises)."""
+        record = {
+            "at": self.started,
+            "kind": self.kind,
+            "total_wall": round(self.total_wall, 4),
+            "stages": self.stages(),
+        }
+        record.update(extra)
+        try:
+            path = app_data_path(LOG_NAME)
+            if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+                os.replace(path, app_data_path("perf_log.1.jsonl"))
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Could not write performance log: {e}")
+
+
+def read_log(kind=None, limit=None) -> list[dict]:
+    """Logged runs, oldest first (optionally one kind, optionally the last `limit`)."""
+    records = []
+    try:
+        with open(app_data_path(LOG_NAME), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if kind is None or record.get("kind") == kind:
+                    records.append(record)
+    except OSError:
+        return []
+    return records[-limit:] if limit else records